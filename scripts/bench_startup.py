@@ -0,0 +1,104 @@
+# 启动测量：对比完整版与 Mini 版启动器的启动耗时与内存
+#
+# 用法（在项目根目录执行）：
+#     python scripts/bench_startup.py            # 各启动 5 次
+#     python scripts/bench_startup.py -n 10 --only mini
+#
+# 每次在新进程中启动入口脚本，窗口显示后子进程输出耗时与常驻内存并退出（见 utils/startup_bench.py），
+# 完整版跳过资源下载，只测量界面部分。
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT, 'src', 'buggcraft')
+sys.path.insert(0, SRC_DIR)
+
+from utils.startup_bench import BENCH_ENV, BENCH_MARKER  # noqa: E402
+
+ENTRIES = {
+    'full': os.path.join(SRC_DIR, 'main.py'),
+    'mini': os.path.join(SRC_DIR, 'mini.py'),
+}
+TIMEOUT = 120
+
+
+def run_once(script):
+    """启动一次入口脚本，返回 {'startup_s', 'rss'}，失败时返回 None"""
+    env = os.environ.copy()
+    env[BENCH_ENV] = repr(time.time())
+    try:
+        # 资源目录按当前目录解析，与正常启动一样在项目根目录运行
+        completed = subprocess.run([sys.executable, script], cwd=ROOT, env=env,
+                                   capture_output=True, text=True, encoding='utf-8',
+                                   errors='replace', timeout=TIMEOUT)
+    except subprocess.TimeoutExpired:
+        print(f"  超时（{TIMEOUT}s）: {script}")
+        return None
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(BENCH_MARKER):
+            return json.loads(line[len(BENCH_MARKER):])
+    print(f"  未得到结果（退出代码 {completed.returncode}）: {completed.stderr.strip()[-500:]}")
+    return None
+
+
+def bench(name, runs):
+    results = []
+    for index in range(runs):
+        result = run_once(ENTRIES[name])
+        if result:
+            results.append(result)
+            print(f"  {name} #{index + 1}: {result['startup_s'] * 1000:.0f}ms, "
+                  f"{result['rss'] / 1024 / 1024:.1f}MB")
+    return results
+
+
+def summarize(results):
+    times = [result['startup_s'] for result in results]
+    rss = [result['rss'] for result in results]
+    return {
+        'runs': len(results),
+        'startup_median_ms': statistics.median(times) * 1000,
+        'startup_min_ms': min(times) * 1000,
+        'rss_median_mb': statistics.median(rss) / 1024 / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比完整版与 Mini 版启动器的启动耗时与内存")
+    parser.add_argument('-n', '--runs', type=int, default=5, help="每个入口启动的次数")
+    parser.add_argument('--only', choices=sorted(ENTRIES), help="只测量其中一个入口")
+    parser.add_argument('--json', help="将汇总结果写入该文件")
+    args = parser.parse_args()
+
+    names = [args.only] if args.only else ['full', 'mini']
+    summary = {}
+    for name in names:
+        print(f"测量 {name}（{args.runs} 次）...")
+        results = bench(name, args.runs)
+        if results:
+            summary[name] = summarize(results)
+
+    print()
+    print(f"{'入口':<6}{'次数':>6}{'启动中位数':>12}{'启动最快':>10}{'内存中位数':>12}")
+    for name, info in summary.items():
+        print(f"{name:<6}{info['runs']:>6}{info['startup_median_ms']:>10.0f}ms{info['startup_min_ms']:>8.0f}ms"
+              f"{info['rss_median_mb']:>10.1f}MB")
+    if 'full' in summary and 'mini' in summary:
+        full, mini = summary['full'], summary['mini']
+        print(f"\nMini 版启动耗时为完整版的 {mini['startup_median_ms'] / full['startup_median_ms']:.0%}，"
+              f"内存为 {mini['rss_median_mb'] / full['rss_median_mb']:.0%}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    return 0 if summary else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,299 @@
+# 命令行启动入口：不创建任何界面，按设置安装并启动游戏，适合脚本与无界面的测试机
+#
+# 用法：
+#     python cli.py                                   # 使用设置中启用的版本与已保存的账户
+#     python cli.py --version 1.20.1 --offline Steve
+#     python cli.py --offline Bot --instances 3       # 同时启动 3 个实例（用户名 Bot1、Bot2、Bot3）
+#     python cli.py --batch instances.json            # 按文件中的列表同时启动多个实例
+#
+# 标准输出每行一个 JSON 事件：{"event": ..., "time": ..., "instance": 序号, ...}，日志输出到标准错误。
+# 退出代码为游戏的退出代码；批量启动时为第一个非零的退出代码。
+
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from config.constants import CACHE_DIR, CONFIG_DIR
+from config.settings import get_settings_manager
+from core.auth.credentials import read_credentials, credentials_expired, credentials_login_type
+from core.game import GameSession, LANGUAGES
+
+logger = logging.getLogger(__name__)
+
+# 启动失败（未登录、未找到 Java、安装出错等）时的退出代码
+EXIT_LAUNCH_FAILED = 1
+EXIT_USAGE = 2
+
+# --batch 文件中每个实例可以覆盖的选项
+INSTANCE_KEYS = ('version', 'directory', 'username', 'server', 'memory', 'java',
+                 'width', 'height', 'fullscreen', 'language', 'timeout')
+
+
+class EventPrinter:
+    """以 JSON 行输出事件（多个实例的线程共用）"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def emit(self, event, instance=None, **data):
+        record = {'event': event, 'time': round(time.time(), 3)}
+        if instance is not None:
+            record['instance'] = instance
+        record.update(data)
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + '\n')
+            self.stream.flush()
+
+
+def load_account(settings_manager, cache_path):
+    """
+    读取已保存的账户：正版凭据优先，其次为离线登录状态
+
+    :return: {'username', 'uuid', 'token', 'type'}，没有可用账户时返回 None
+    """
+    try:
+        credentials = read_credentials(cache_path)
+    except Exception as e:
+        logger.warning(f"加载凭据失败: {e}")
+        credentials = None
+    if credentials and not credentials_expired(credentials):
+        login_type = credentials_login_type(credentials)
+        if login_type:
+            return {
+                'username': credentials.get('minecraft_username'),
+                'uuid': credentials.get('minecraft_uuid'),
+                'token': credentials.get('minecraft_token'),
+                'type': login_type,
+            }
+    elif credentials:
+        logger.warning("Token 已过期，请在启动器中重新登录")
+
+    if settings_manager.get_setting("offline_login.is_logged_in", False):
+        username = settings_manager.get_setting("offline_login.username", "")
+        if username:
+            return {'username': username, 'uuid': None, 'token': None, 'type': 'offline'}
+    return None
+
+
+def build_targets(args):
+    """根据命令行参数生成每个实例的选项"""
+    base = {
+        'version': args.version,
+        'directory': args.directory,
+        'username': args.offline,
+        'server': args.server,
+        'memory': args.memory,
+        'java': args.java,
+        'width': args.width,
+        'height': args.height,
+        'fullscreen': args.fullscreen,
+        'language': args.language,
+        'timeout': args.timeout,
+    }
+    if args.batch:
+        with open(args.batch, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        if not isinstance(entries, list):
+            raise ValueError("批量启动文件应为 JSON 数组")
+        targets = []
+        for entry in entries:
+            if not isinstance(entry, dict):
+                raise ValueError("批量启动文件中的每一项应为 JSON 对象")
+            unknown = set(entry) - set(INSTANCE_KEYS)
+            if unknown:
+                raise ValueError(f"未知的实例选项: {', '.join(sorted(unknown))}")
+            targets.append({**base, **entry})
+        return targets
+
+    targets = [dict(base) for _ in range(args.instances)]
+    # 同一离线用户名的多个实例无法同时进入同一服务器，按序号区分
+    if args.instances > 1 and args.offline:
+        for index, target in enumerate(targets, 1):
+            target['username'] = f"{args.offline}{index}"
+    return targets
+
+
+class InstanceRunner:
+    """在工作线程中启动一个实例并等待其退出"""
+
+    def __init__(self, index, target, account, settings_manager, printer, game_log=False):
+        self.index = index
+        self.target = target
+        self.account = account
+        self.printer = printer
+        self.game_log = game_log
+        self.cancelled = threading.Event()
+        self._last_progress = None
+        self.session = GameSession(
+            settings_manager,
+            output=lambda message: self.report('output', message=message),
+            progress=self._on_progress,
+            error=lambda message: self.report('error', message=message),
+            stop_progress=lambda state, remaining: self.report('stop', state=state, remaining=remaining)
+        )
+
+    def report(self, event, **data):
+        self.printer.emit(event, self.index, **data)
+
+    def _on_progress(self, value):
+        # 安装时同一进度会被重复报告，只输出变化
+        if value != self._last_progress:
+            self._last_progress = value
+            self.report('progress', value=value)
+
+    def run(self) -> int:
+        if self.cancelled.is_set():
+            return EXIT_LAUNCH_FAILED
+        target = self.target
+        if target['username']:
+            account = {'username': target['username'], 'uuid': None, 'token': None, 'type': 'offline'}
+        else:
+            account = self.account
+        self.report('account', username=account['username'], type=account['type'])
+
+        self.session.set_language(target['language'])
+        self.session.set_options(
+            minecraft_directory=target['directory'],
+            version=target['version'],
+            uuid=account['uuid'],
+            username=account['username'],
+            token=account['token'],
+            server=target['server'],
+            memory=target['memory'],
+            java_path=target['java'],
+            width=target['width'],
+            height=target['height'],
+            fullscreen=target['fullscreen']
+        )
+
+        started = time.time()
+        try:
+            process = self.session.launch()
+        except Exception as e:
+            logger.exception("启动游戏失败")
+            self.report('error', message=f"启动错误: {str(e)}")
+            return EXIT_LAUNCH_FAILED
+        if process is None:
+            return EXIT_LAUNCH_FAILED
+        self.report('started', pid=process.pid, version=self.session.version,
+                    directory=self.session.minecraft_directory)
+
+        reader = threading.Thread(target=self._read_output, name=f'GameOutput-{self.index}', daemon=True)
+        reader.start()
+        timer = None
+        if target['timeout']:
+            timer = threading.Timer(target['timeout'], self._on_timeout)
+            timer.daemon = True
+            timer.start()
+        if self.cancelled.is_set():
+            self.session.stop()
+
+        exit_code = self.session.wait()
+        if timer is not None:
+            timer.cancel()
+        reader.join(timeout=1)
+        self.report('exited', exit_code=exit_code, elapsed_s=round(time.time() - started, 1))
+        return exit_code
+
+    def _read_output(self):
+        for line in self.session.iter_output():
+            if self.game_log and line:
+                self.report('log', line=line)
+
+    def _on_timeout(self):
+        self.report('output', message=f"已运行 {self.target['timeout']} 秒，停止游戏")
+        self.session.stop()
+
+    def cancel(self):
+        """停止实例（未启动完成时在启动后立即停止）"""
+        self.cancelled.set()
+        if self.session.process is not None:
+            self.session.stop()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="BuggCraft 命令行启动器：不创建界面，按设置安装并启动游戏")
+    parser.add_argument('--version', help="游戏版本（默认为设置中启用的版本）")
+    parser.add_argument('--directory', help="游戏目录（默认为设置中启用的游戏目录）")
+    parser.add_argument('--offline', metavar='USERNAME', help="使用离线账户（默认为已保存的账户）")
+    parser.add_argument('--server', help="启动后连接的服务器 host[:port]")
+    parser.add_argument('--memory', type=int, help="分配的内存（MB，默认为设置中的内存分配）")
+    parser.add_argument('--java', help="Java 路径（默认为设置中的 Java）")
+    parser.add_argument('--width', type=int, default=854, help="窗口宽度")
+    parser.add_argument('--height', type=int, default=480, help="窗口高度")
+    parser.add_argument('--fullscreen', action='store_true', help="全屏启动")
+    parser.add_argument('--language', choices=sorted(LANGUAGES), default='简体中文', help="游戏语言")
+    parser.add_argument('--instances', type=int, default=1, help="同时启动的实例数")
+    parser.add_argument('--batch', metavar='FILE', help="批量启动：JSON 数组，每项为一个实例的选项（覆盖命令行参数）")
+    parser.add_argument('--timeout', type=float, help="运行指定秒数后停止游戏")
+    parser.add_argument('--game-log', action='store_true', help="输出游戏日志（log 事件）")
+    parser.add_argument('--config', default=CONFIG_DIR, help="配置目录")
+    parser.add_argument('--cache', default=CACHE_DIR, help="缓存目录（读取 auth_credentials.json）")
+    parser.add_argument('-v', '--verbose', action='store_true', help="在标准错误输出详细日志")
+    args = parser.parse_args(argv)
+    if args.instances < 1:
+        parser.error("--instances 至少为 1")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stderr
+    )
+    if hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(encoding='utf-8')
+
+    printer = EventPrinter()
+    settings_manager = get_settings_manager(args.config)
+    try:
+        targets = build_targets(args)
+    except (OSError, ValueError) as e:
+        printer.emit('error', message=f"读取批量启动文件失败: {e}")
+        return EXIT_USAGE
+
+    account = None
+    if not all(target['username'] for target in targets):
+        account = load_account(settings_manager, args.cache)
+        if account is None:
+            printer.emit('error', message="未登录：请先在启动器中登录，或使用 --offline 指定离线用户名")
+            return EXIT_USAGE
+
+    runners = [InstanceRunner(index, target, account, settings_manager, printer, args.game_log)
+               for index, target in enumerate(targets, 1)]
+    exit_codes = [EXIT_LAUNCH_FAILED] * len(runners)
+    with ThreadPoolExecutor(max_workers=len(runners), thread_name_prefix='Instance') as executor:
+        futures = {executor.submit(runner.run): runner for runner in runners}
+        try:
+            pending = set(futures)
+            while pending:
+                # 带超时等待，使 Ctrl+C 能及时生效
+                done, pending = wait(pending, timeout=0.5)
+        except KeyboardInterrupt:
+            printer.emit('output', message="收到中断，正在停止所有实例...")
+            for runner in runners:
+                threading.Thread(target=runner.cancel, daemon=True).start()
+            wait(futures)
+
+        for future, runner in futures.items():
+            try:
+                exit_codes[runner.index - 1] = future.result()
+            except Exception as e:
+                logger.exception(f"实例 {runner.index} 异常退出")
+                printer.emit('error', runner.index, message=str(e))
+
+    exit_code = next((code for code in exit_codes if code), 0)
+    printer.emit('summary', exit_codes=exit_codes, exit_code=exit_code)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1 +1,22 @@
-# 常量定义
\ No newline at end of file
+# 常量定义
+
+import os
+
+# 启动器数据目录
+LAUNCHER_HOME = os.path.join(os.path.expanduser('~'), '.buggcraft')
+
+# 配置与缓存目录（与 main.py 中的 CONFIG_DIR、CACHE_DIR 相同）
+CONFIG_DIR = os.path.join(LAUNCHER_HOME, 'etc')
+CACHE_DIR = os.path.join(LAUNCHER_HOME, 'cache')
+
+# 多个游戏目录共享的资源对象库（布局与 .minecraft/assets 相同）
+SHARED_ASSETS_DIR = os.path.join(LAUNCHER_HOME, 'shared', 'assets')
+
+# 资源对象校验的摘要缓存
+ASSET_HASH_CACHE = os.path.join(LAUNCHER_HOME, 'cache', 'asset_hashes.json')
+
+# 多人游戏服务器状态缓存（favicon 保存在同目录的 favicons 下）
+SERVER_STATUS_CACHE = os.path.join(LAUNCHER_HOME, 'cache', 'servers', 'status.json')
+
+# 界面性能跟踪文件（Chrome trace 格式）的导出目录
+TRACE_DIR = os.path.join(LAUNCHER_HOME, 'traces')
@@ -75,6 +75,13 @@ class SettingsManager:
             'version': {
                 "enable": None,
                 "installed": []
+            },
+            # 共享资源对象库：多个游戏目录共用一份 assets/objects
+            'assets': {
+                "shared": True,
+                "link_mode": "auto",  # auto / hardlink / reflink / copy
+                "verify": True,  # 启动前校验资源对象并修复损坏的文件
+                "gc": True  # 启动前清理不再被任何游戏目录引用的对象
             }
         }
 
@@ -120,6 +127,12 @@ class SettingsManager:
                 "launch_args": "",
                 "launch_pre_command": ""
             },
+            "multiplayer": {
+                "tunnel": {
+                    "relay": "",   # 中继服务器 host[:port]，多个时以逗号分隔，自动选择线路最好的一个
+                    "token": ""
+                }
+            },
             "gpu_enable": False,
             "debug_endble": False
         }
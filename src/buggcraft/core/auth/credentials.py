@@ -0,0 +1,160 @@
+# 登录凭据：读取 auth_credentials.json 与解析 Token 过期时间（不依赖 Qt，界面与命令行共用）
+
+import os
+import json
+import base64
+from datetime import datetime
+from typing import Optional
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# 凭据文件名，保存在缓存目录下
+CREDENTIALS_FILE = "auth_credentials.json"
+
+
+class JWTDecoder:
+    """JWT Token 解码器类"""
+    
+    def __init__(self, token=None):
+        self.token = token
+        self.header = None
+        self.payload = None
+        self.signature = None
+        self.decoded = False
+        
+    def decode(self):
+        """解码 JWT Token"""
+        try:
+            # 分割 token 的三个部分
+            parts = self.token.split('.')
+            if len(parts) != 3:
+                raise ValueError("无效的 JWT Token: 必须包含三个部分")
+            
+            # 解码头部
+            header_encoded = parts[0]
+            self.header = self._decode_part(header_encoded)
+            
+            # 解码载荷
+            payload_encoded = parts[1]
+            self.payload = self._decode_part(payload_encoded)
+            
+            # 签名部分
+            self.signature = parts[2]
+            
+            self.decoded = True
+            return True
+            
+        except Exception as e:
+            return False
+    
+    def _decode_part(self, part):
+        """解码单个 JWT 部分"""
+        # 添加必要的填充
+        padding = len(part) % 4
+        if padding:
+            part += '=' * (4 - padding)
+        
+        # 解码
+        decoded_bytes = base64.urlsafe_b64decode(part)
+        return json.loads(decoded_bytes)
+    
+    def get_expiration(self):
+        """获取过期时间"""
+        if not self.decoded:
+            if not self.decode():
+                return None
+        
+        if 'exp' in self.payload:
+            exp_timestamp = self.payload['exp']
+            exp_datetime = datetime.fromtimestamp(exp_timestamp)
+            exp_formatted = exp_datetime.strftime('%Y-%m-%d %H:%M:%S')
+            
+            return {
+                'timestamp': exp_timestamp,
+                'formatted': exp_formatted
+            }
+        return None
+    
+    def get_issued_at(self):
+        """获取签发时间"""
+        if not self.decoded:
+            if not self.decode():
+                return None
+        
+        if 'iat' in self.payload:
+            iat_timestamp = self.payload['iat']
+            iat_datetime = datetime.fromtimestamp(iat_timestamp)
+            iat_formatted = iat_datetime.strftime('%Y-%m-%d %H:%M:%S')
+            
+            return {
+                'timestamp': iat_timestamp,
+                'formatted': iat_formatted
+            }
+        return None
+    
+    def is_expired(self):
+        """检查 Token 是否已过期"""
+        expiration = self.get_expiration()
+        if not expiration:
+            return None
+        
+        current_time = datetime.now().timestamp()
+        return expiration['timestamp'] < current_time
+    
+    def get_all_claims(self):
+        """获取所有声明（claims）"""
+        if not self.decoded:
+            if not self.decode():
+                return None
+        return self.payload
+    
+    def get_header(self):
+        """获取头部信息"""
+        if not self.decoded:
+            if not self.decode():
+                return None
+        return self.header
+
+
+def credentials_path(cache_path) -> str:
+    """凭据文件路径"""
+    return os.path.join(cache_path, CREDENTIALS_FILE)
+
+
+def read_credentials(cache_path) -> Optional[dict]:
+    """
+    读取保存的登录凭据
+
+    :param cache_path: 缓存目录
+    :return: 文件中的凭据（minecraft_username、minecraft_uuid、minecraft_token、minecraft_skin、refresh_token），
+             没有保存凭据时返回 None；文件无法读取时抛出异常
+    """
+    filepath = credentials_path(cache_path)
+    if not os.path.isfile(filepath):
+        return None
+    with open(filepath, 'r') as f:
+        return json.load(f)
+
+
+def credentials_expired(credentials: dict) -> bool:
+    """凭据中的 Token 是否已过期（离线账户或无法解析过期时间时视为未过期）"""
+    decoder = JWTDecoder(credentials.get('minecraft_token'))
+    expiration = decoder.get_expiration() if decoder.token else None
+    if expiration is None:
+        return False
+    logger.info(f"Token 过期时间戳: {expiration['timestamp']}")
+    logger.info(f"Token 过期时间: {expiration['formatted']}")
+    return bool(decoder.is_expired())
+
+
+def credentials_login_type(credentials: dict) -> Optional[str]:
+    """登录方式：正版 "online"、离线 "offline"，凭据不完整时返回 None"""
+    username = credentials.get('minecraft_username')
+    token = credentials.get('minecraft_token')
+    if username and credentials.get('minecraft_uuid') and token:
+        return "online"
+    if username and not token:
+        return "offline"
+    return None
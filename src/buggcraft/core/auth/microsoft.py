@@ -32,111 +32,7 @@ class MinecraftSignals(QObject):
     progress = Signal(int)  # 进度百分比
 
 
-import base64
-from datetime import datetime
-
-class JWTDecoder:
-    """JWT Token 解码器类"""
-    
-    def __init__(self, token=None):
-        self.token = token
-        self.header = None
-        self.payload = None
-        self.signature = None
-        self.decoded = False
-        
-    def decode(self):
-        """解码 JWT Token"""
-        try:
-            # 分割 token 的三个部分
-            parts = self.token.split('.')
-            if len(parts) != 3:
-                raise ValueError("无效的 JWT Token: 必须包含三个部分")
-            
-            # 解码头部
-            header_encoded = parts[0]
-            self.header = self._decode_part(header_encoded)
-            
-            # 解码载荷
-            payload_encoded = parts[1]
-            self.payload = self._decode_part(payload_encoded)
-            
-            # 签名部分
-            self.signature = parts[2]
-            
-            self.decoded = True
-            return True
-            
-        except Exception as e:
-            return False
-    
-    def _decode_part(self, part):
-        """解码单个 JWT 部分"""
-        # 添加必要的填充
-        padding = len(part) % 4
-        if padding:
-            part += '=' * (4 - padding)
-        
-        # 解码
-        decoded_bytes = base64.urlsafe_b64decode(part)
-        return json.loads(decoded_bytes)
-    
-    def get_expiration(self):
-        """获取过期时间"""
-        if not self.decoded:
-            if not self.decode():
-                return None
-        
-        if 'exp' in self.payload:
-            exp_timestamp = self.payload['exp']
-            exp_datetime = datetime.fromtimestamp(exp_timestamp)
-            exp_formatted = exp_datetime.strftime('%Y-%m-%d %H:%M:%S')
-            
-            return {
-                'timestamp': exp_timestamp,
-                'formatted': exp_formatted
-            }
-        return None
-    
-    def get_issued_at(self):
-        """获取签发时间"""
-        if not self.decoded:
-            if not self.decode():
-                return None
-        
-        if 'iat' in self.payload:
-            iat_timestamp = self.payload['iat']
-            iat_datetime = datetime.fromtimestamp(iat_timestamp)
-            iat_formatted = iat_datetime.strftime('%Y-%m-%d %H:%M:%S')
-            
-            return {
-                'timestamp': iat_timestamp,
-                'formatted': iat_formatted
-            }
-        return None
-    
-    def is_expired(self):
-        """检查 Token 是否已过期"""
-        expiration = self.get_expiration()
-        if not expiration:
-            return None
-        
-        current_time = datetime.now().timestamp()
-        return expiration['timestamp'] < current_time
-    
-    def get_all_claims(self):
-        """获取所有声明（claims）"""
-        if not self.decoded:
-            if not self.decode():
-                return None
-        return self.payload
-    
-    def get_header(self):
-        """获取头部信息"""
-        if not self.decoded:
-            if not self.decode():
-                return None
-        return self.header
+from core.auth.credentials import JWTDecoder, credentials_path, read_credentials, credentials_expired, credentials_login_type
 
 
 import threading
@@ -916,32 +812,20 @@ class MicrosoftAuthenticator(QObject):
     
     def load_credentials(self, filepath):
         """从文件加载认证信息"""
-        import os, shutil
+        if not os.path.exists(filepath):
+            os.makedirs(filepath)
 
-        filepath = os.path.join(filepath, "auth_credentials.json")
-        if not os.path.exists(os.path.dirname(filepath)):
-            os.makedirs(os.path.dirname(filepath))
-
-        if not os.path.isfile(filepath):
+        if not os.path.isfile(credentials_path(filepath)):
             return False
         
         self.signals.progress.emit("自动登录...")
         try:
-            with open(filepath, 'r') as f:
-                credentials = json.load(f)
-            
-            self.decoder.token = credentials.get('minecraft_token')
-            expiration = self.decoder.get_expiration()
-            if expiration:
-                logger.info(f"Token 过期时间戳: {expiration['timestamp']}")
-                logger.info(f"Token 过期时间: {expiration['formatted']}")
+            credentials = read_credentials(filepath)
             
             # 检查是否已过期
-            if self.decoder.is_expired() and expiration is not None:
+            if credentials_expired(credentials):
                 logger.info("⚠️  Token 已过期")
-                if os.path.isfile(filepath):
-                    os.remove(filepath)
-                
+                os.remove(credentials_path(filepath))
                 self.signals.failure.emit(f"Token 已过期")
                 return False
 
@@ -950,24 +834,16 @@ class MicrosoftAuthenticator(QObject):
             self.minecraft_uuid = credentials.get('minecraft_uuid')
             self.minecraft_skin = credentials.get('minecraft_skin')
             self.minecraft_token = credentials.get('minecraft_token')
-            if self.minecraft_username and self.minecraft_uuid and self.minecraft_token:
-                # 正版登录
-                self.minecraft_login_type = "online"
+            login_type = credentials_login_type(credentials)
+            if login_type:
+                # 正版登录 / 离线登录
+                self.minecraft_login_type = login_type
                 self.signals.success.emit(self.minecraft_username, {
                     'uuid': self.minecraft_uuid,
                     'skin': self.minecraft_skin,
                     'token': self.minecraft_token,
                     'type': self.minecraft_login_type
                 })
-            elif self.minecraft_username and not self.minecraft_token:
-                # 离线登录
-                self.minecraft_login_type = "offline"
-                self.signals.success.emit(self.minecraft_username, {
-                    'uuid': self.minecraft_uuid,
-                    'skin': self.minecraft_skin,
-                    'token': None,
-                    'type': self.minecraft_login_type
-                })
 
             return True
         except Exception as e:
@@ -0,0 +1,102 @@
+# 低占用模式：游戏运行期间释放启动器的界面资源，游戏退出后按需恢复
+
+import ctypes
+import gc
+import linecache
+import re
+import sys
+
+import psutil
+from PySide6.QtCore import QTimer
+from PySide6.QtGui import QPixmapCache
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# 进入低占用模式后等待多久（毫秒）再整理内存：deleteLater 的控件要到下一轮事件循环才真正释放
+TRIM_DELAY_MS = 500
+
+_MB = 1024 * 1024
+
+
+def process_memory() -> int:
+    """当前进程的常驻内存（字节）"""
+    try:
+        return psutil.Process().memory_info().rss
+    except psutil.Error:
+        return 0
+
+
+def trim_memory():
+    """回收 Python 对象与 Qt 缓存，并把空闲的堆内存归还给系统"""
+    gc.collect()
+    QPixmapCache.clear()
+    linecache.clearcache()
+    re.purge()
+    try:
+        if sys.platform == 'win32':
+            # 将工作集中的页面交还系统，之后用到时再按需调入
+            kernel32 = ctypes.windll.kernel32
+            ctypes.windll.psapi.EmptyWorkingSet(kernel32.GetCurrentProcess())
+        elif sys.platform.startswith('linux'):
+            ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError) as e:
+        logger.debug(f"归还堆内存失败: {e}")
+
+
+class DormantModeManager:
+    """
+    低占用模式管理器
+
+    各组件通过 register() 登记进入与退出时的操作（释放缓存、停止定时器等），
+    游戏启动时 enter() 依次执行并整理内存，游戏退出时 exit() 按相反顺序恢复。
+    被释放的页面与图片不必在 exit() 中全部重建，可以在下次用到时再创建。
+    """
+
+    def __init__(self, main_window):
+        self.main_window = main_window
+        self.active = False
+        self._hooks = []  # (名称, 进入时调用, 退出时调用)
+        self._memory_before = 0
+        self.saved = 0  # 最近一次进入低占用模式释放的内存（字节）
+
+    def register(self, name, enter, exit=None):
+        """登记进入/退出低占用模式时执行的操作"""
+        self._hooks.append((name, enter, exit))
+
+    def enter(self):
+        """进入低占用模式（游戏启动后调用）"""
+        if self.active:
+            return
+        self.active = True
+        self._memory_before = process_memory()
+        for name, enter, _ in self._hooks:
+            try:
+                enter()
+            except Exception as e:
+                logger.warning(f"[低占用] 释放 {name} 失败: {e}")
+        QTimer.singleShot(TRIM_DELAY_MS, self._trim)
+
+    def _trim(self):
+        if not self.active:
+            return
+        trim_memory()
+        after = process_memory()
+        self.saved = max(0, self._memory_before - after)
+        logger.info(f"[低占用] 已进入低占用模式，释放内存 {self.saved / _MB:.1f}MB "
+                    f"({self._memory_before / _MB:.1f}MB -> {after / _MB:.1f}MB)")
+
+    def exit(self):
+        """退出低占用模式（游戏退出后调用）"""
+        if not self.active:
+            return
+        self.active = False
+        for name, _, exit in reversed(self._hooks):
+            if exit is None:
+                continue
+            try:
+                exit()
+            except Exception as e:
+                logger.warning(f"[低占用] 恢复 {name} 失败: {e}")
+        logger.info(f"[低占用] 已退出低占用模式，当前内存 {process_memory() / _MB:.1f}MB")
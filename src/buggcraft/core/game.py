@@ -0,0 +1,538 @@
+# 游戏启动核心：安装游戏、生成启动命令、启动与停止游戏进程，不依赖 Qt，界面启动器与命令行共用
+
+import os
+import platform
+import subprocess
+import time
+import threading
+from typing import Iterator, List, Optional
+
+import psutil
+import minecraft_launcher_lib
+
+from config.constants import SHARED_ASSETS_DIR, ASSET_HASH_CACHE
+from core.minecraft.assets import AssetStore, AssetVerifier, installed_asset_indexes
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+LANGUAGES = {
+    "English": "en_us",
+    "简体中文": "zh_cn",
+    "繁體中文": "zh_tw",
+    "Français": "fr_fr",
+    "Deutsch": "de_de",
+    "Español": "es_es",
+    "日本語": "ja_jp",
+    "한국어": "ko_kr",
+    "Русский": "ru_ru"
+}
+
+# 停止游戏的各个阶段
+STOP_GRACEFUL = 'graceful'    # 向游戏发送 stop 命令
+STOP_TERMINATE = 'terminate'  # 向进程树发送终止信号
+STOP_KILL = 'kill'            # 强制结束进程树
+STOP_DONE = 'done'
+STOP_STATE_TEXT = {
+    STOP_GRACEFUL: '正在关闭游戏',
+    STOP_TERMINATE: '正在终止游戏进程',
+    STOP_KILL: '正在强制结束游戏进程',
+    STOP_DONE: '停止完成',
+}
+# 各阶段等待进程退出的时间（秒）
+STOP_GRACEFUL_TIMEOUT = 2
+STOP_TERMINATE_TIMEOUT = 5
+STOP_KILL_TIMEOUT = 5
+
+# 同一游戏目录的安装与校验同时只进行一个（批量启动的多个实例可能共用游戏目录）
+_directory_locks = {}
+_directory_locks_guard = threading.Lock()
+
+_asset_stores = {}
+
+
+def _directory_lock(path) -> threading.Lock:
+    key = os.path.normcase(os.path.abspath(path))
+    with _directory_locks_guard:
+        return _directory_locks.setdefault(key, threading.Lock())
+
+
+def get_asset_store(settings_manager) -> Optional[AssetStore]:
+    """获取共享资源库，未启用时返回 None"""
+    if not settings_manager.get_setting('minecraft.assets.shared', True):
+        return None
+    link_mode = settings_manager.get_setting('minecraft.assets.link_mode', 'auto')
+    with _directory_locks_guard:
+        if link_mode not in _asset_stores:
+            _asset_stores[link_mode] = AssetStore(SHARED_ASSETS_DIR, link_mode)
+        return _asset_stores[link_mode]
+
+
+def _ignore(*args):
+    pass
+
+
+class GameSession:
+    """
+    一次游戏启动
+
+    launch() 准备游戏目录、安装版本并启动游戏进程，stop() 停止进程树。
+    过程通过构造时传入的回调报告（在调用线程中执行）：
+    output(str) 启动器消息，progress(int) 安装/校验进度百分比，error(str) 错误消息，
+    stop_progress(str, int) 停止阶段（STOP_*）与剩余进程数。
+    """
+
+    def __init__(self, settings_manager, output=None, progress=None, error=None, stop_progress=None):
+        self.settings_manager = settings_manager
+        self.output = output or _ignore
+        self.progress = progress or _ignore
+        self.error = error or _ignore
+        self.stop_progress = stop_progress or _ignore
+
+        self.process = None
+        self.exit_code = None
+        self.language = "zh_cn"
+        self.set_options()
+
+    def set_options(self,
+        minecraft_directory=None,
+        version=None,
+        uuid=None,
+        username="Player",
+        token=None,
+        server=None,
+        memory=None,
+        java_path=None,
+        width=854,
+        height=480,
+        fullscreen=False
+    ):
+        """设置启动选项
+        Args:
+            minecraft_directory (str | None, optional): 游戏目录。默认为 None，使用设置中启用的游戏目录。
+            version (str | None, optional): 游戏版本。默认为 None，使用设置中启用的版本。
+            uuid (str | None, optional): 玩家的 UUID。默认为 None。
+            username (str, optional): 游戏用户名。默认为 "Player"。
+            token (str | None, optional): 认证令牌。默认为 None。
+            server (str | None, optional): 要连接的服务器地址（host[:port]，未指定端口时按 SRV 记录解析）。默认为 None。
+            memory (int | None, optional): 为游戏分配的内存大小（单位：MB）。默认为 None，使用设置中的内存分配。
+            java_path (str | None, optional): Java 路径。默认为 None，使用设置中的 Java。
+            width (int, optional): 游戏窗口的宽度。默认为 854。
+            height (int, optional): 游戏窗口的高度。默认为 480。
+            fullscreen (bool, optional): 是否以全屏模式启动游戏。默认为 False。
+        """
+        self.minecraft_directory = minecraft_directory
+        self.version = version
+        self.uuid = uuid
+        self.username = username
+        self.token = token
+        self.server = server
+        self.memory = memory
+        self.java_path = java_path
+        self.width = width
+        self.height = height
+        self.fullscreen = fullscreen
+
+    def set_language(self, language='简体中文'):
+        """设置游戏语言"""
+        self.language = LANGUAGES[language]
+
+    # ---------- 启动 ----------
+
+    def launch(self) -> Optional[subprocess.Popen]:
+        """安装并启动游戏，返回游戏进程；未配置 Java 时返回 None"""
+        if not self.minecraft_directory:
+            minecraft_selets = self.settings_manager.get_setting('minecraft.directory.enable')
+            self.minecraft_directory = minecraft_selets.get('path')
+        if not self.version:
+            self.version = self.settings_manager.get_setting('minecraft.version.enable')
+
+        # 准备启动环境
+        if not os.path.exists(self.minecraft_directory):
+            os.makedirs(self.minecraft_directory, exist_ok=True)
+
+        java_path = self.java_path or self.settings_manager.get_setting("java.path", None)
+        logger.info(f'[JavaRunTime] -> {java_path}')
+        if not java_path:
+            logger.info('请安装Java环境')
+            self.error("未找到 Java，请先在设置中选择 Java")
+            return None
+
+        with _directory_lock(self.minecraft_directory):
+            # 确保游戏语言设置文件正确配置
+            self._ensure_language_setting()
+            command = self._prepare_command(java_path)
+        return self._spawn(command)
+
+    def _prepare_command(self, java_path) -> List[str]:
+        """安装游戏版本并生成启动命令"""
+        memory = self.memory or self.settings_manager.get_setting("memory.allocation", "自动选择合适的Java")
+        launch_jvm_args: str = self.settings_manager.get_setting('game.launch_jvm_args', "").split()
+        launch_args: str = self.settings_manager.get_setting('game.launch_args', "").split()
+
+        jvmArguments = [
+            f"-Xmx{memory}M",
+            f"-Xms{memory}M",
+            f"-Dfile.encoding=UTF-8",
+            "-XX:+UseG1GC",
+            "-XX:-UseAdaptiveSizePolicy",
+            "-XX:-OmitStackTraceInFastThrow",
+            "-Djdk.lang.Process.allowAmbiguousCommands=true",
+            "-Dfml.ignoreInvalidMinecraftCertificates=True",
+            "-Dfml.ignorePatchDiscrepancies=True",
+            "-Dlog4j2.formatMsgNoLookups=true",
+            "-Dsun.java2d.dpiaware=true",
+            *launch_jvm_args
+        ]
+
+        # 准备启动选项
+        options = {
+            "executablePath": java_path,
+            "username": self.username,
+            "gameDirectory": self.minecraft_directory,
+            "version": self.version,
+            "jvmArguments": list(set(jvmArguments)),
+            "launcherName": "BuggCraft Launcher",
+            "launcherVersion": "1.0",
+        }
+
+        if self.uuid: options['uuid'] = self.uuid
+
+        if self.token:
+            options['token'] = self.token
+            self.output(f"使用离线账户: {self.username}")
+
+        if self.server:
+            host, port = self._resolve_server(self.server)
+            options['server'] = host
+            options['port'] = str(port)
+            self.output(f"连接服务器: {self.server} ({host}:{port})")
+
+        # 从共享资源库链接已有的资源对象，避免重复下载
+        asset_store = get_asset_store(self.settings_manager)
+        if asset_store:
+            try:
+                asset_store.prepare(self.minecraft_directory, self.version)
+            except Exception as e:
+                logger.warning(f"链接共享资源失败: {e}")
+
+        # 安装游戏库文件
+        self.output("正在安装游戏库文件...")
+        minecraft_launcher_lib.install.install_minecraft_version(
+            self.version,
+            self.minecraft_directory,
+            callback={
+                "setStatus": lambda msg: self.output(f"[安装] {msg}"),
+                "setProgress": lambda progress: self.progress(progress),
+                "setMax": lambda max_value: self.output(f"[最大] {max_value}")
+            }
+        )
+
+        # 校验资源对象（大小优先，摘要按缓存增量计算），修复后再收录进共享资源库
+        if self.settings_manager.get_setting('minecraft.assets.verify', True):
+            self._verify_assets()
+
+        # 将新下载的资源对象收录进共享资源库，并清理不再被引用的对象
+        if asset_store:
+            try:
+                before = asset_store.directories()
+                asset_store.sync(self.minecraft_directory)
+                if self.settings_manager.get_setting('minecraft.assets.gc', True):
+                    self._collect_assets(asset_store, before)
+            except Exception as e:
+                logger.warning(f"同步共享资源失败: {e}")
+
+        # 获取启动命令
+        command: list[str] = minecraft_launcher_lib.command.get_minecraft_command(
+            self.version,
+            self.minecraft_directory,
+            options
+        )
+
+        # 设置窗口大小
+        if not self.fullscreen:
+            size = ['--width', str(self.width), '--height', str(self.height)]
+            if self.width is not None and self.height is not None:
+                for i in size:
+                    command.append(i)
+        else:
+            # TODO: 当前最大化 是先开起小窗口，加载完成后最大化进入游戏菜单页面
+            command.append('--fullscreen')
+
+        for arg in launch_args:
+            command.append(arg)
+
+        # 清理命令参数
+        command = [arg for arg in command if arg != "None" and arg is not None]
+
+        # 打印命令用于调试
+        self.output(f"启动命令: {' '.join(command)}")
+        return command
+
+    def _spawn(self, command) -> subprocess.Popen:
+        """执行启动前指令并启动游戏进程"""
+        launch_pre_command: str = self.settings_manager.get_setting('game.launch_pre_command', "").split()
+
+        startup_flags = 0
+        if platform.system() == "Windows":
+            startup_flags = subprocess.CREATE_NEW_PROCESS_GROUP
+
+        # 创建环境变量副本
+        env = os.environ.copy()
+        # 设置环境变量确保使用UTF-8
+        env['LANG'] = self.language + '.UTF-8'
+        env['LC_ALL'] = self.language + '.UTF-8'
+        env['JAVA_OPTS'] = '-Dfile.encoding=UTF-8'
+
+        try:
+            for com in launch_pre_command:
+                subprocess.Popen(
+                    com,
+                    cwd=self.minecraft_directory,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    stdin=subprocess.PIPE,
+                    creationflags=startup_flags,
+                    env=env
+                )
+        except Exception as e:
+            logger.info('[启动前指令]', e.args)
+
+        self.process = subprocess.Popen(
+            command,
+            cwd=self.minecraft_directory,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            stdin=subprocess.PIPE,
+            creationflags=startup_flags,
+            env=env
+        )
+        # 记录进程ID
+        self.output(f"游戏进程PID: {self.process.pid}")
+        self._apply_priority()
+        return self.process
+
+    def _apply_priority(self):
+        """按设置调整游戏进程的优先级"""
+        priority_setting = self.settings_manager.get_setting("launcher.process_priority") or ""  # 例如返回 "高 (优先保证游戏运行，但可能造成其他程序卡顿)"
+
+        # 根据用户选择映射到系统的优先级值
+        # 注意：psutil 的优先级常量在不同系统上可能不同，以下是一个通用映射尝试
+        if "高" in priority_setting:
+            target_priority = psutil.HIGH_PRIORITY_CLASS if os.name == 'nt' else -10 # Windows HIGH_PRIORITY_CLASS, Unix nice -10
+        elif "低" in priority_setting:
+            target_priority = psutil.BELOW_NORMAL_PRIORITY_CLASS if os.name == 'nt' else 10 # Windows BELOW_NORMAL, Unix nice 10
+        else: # 默认或"中"
+            target_priority = psutil.NORMAL_PRIORITY_CLASS if os.name == 'nt' else 0 # Windows NORMAL, Unix nice 0
+
+        try:
+            p = psutil.Process(self.process.pid)
+            p.nice(target_priority)
+            logger.info(f"成功将 Minecraft 进程 (PID: {self.process.pid}) 优先级设置为: {priority_setting}")
+        except Exception as e:
+            logger.info(f"设置进程优先级时出错: {e}. 进程可能已退出，或无足够权限。")
+        # 注意：在某些系统上，设置高优先级可能需要提升的权限（如管理员/root）
+
+    def _resolve_server(self, address):
+        """解析服务器地址（含 SRV 记录），失败时退回地址本身与默认端口"""
+        try:
+            from core.multiplayer.dns import resolve_server_sync
+            resolved = resolve_server_sync(address)
+            return resolved.host, resolved.port
+        except Exception as e:
+            logger.warning(f"解析服务器地址失败: {e}")
+            from core.multiplayer.ping import parse_address
+            return parse_address(address)
+
+    def _collect_assets(self, asset_store, before):
+        """移除已删除的游戏目录的引用，引用有变化时清理共享资源库中不再被引用的对象"""
+        installed = [path for path in self.settings_manager.get_setting('minecraft.directory.installed', []) or []
+                     if isinstance(path, str)]
+        # 游戏目录列表为空时（如只通过命令行指定目录）只移除已被删除的目录
+        asset_store.retain(installed + [self.minecraft_directory] if installed else None)
+        if asset_store.directories() != before:
+            removed, freed = asset_store.collect_garbage()
+            if removed:
+                self.output(f"[资源] 已清理 {removed} 个不再使用的资源对象，释放 {freed / 1024 / 1024:.1f}MB")
+
+    def _verify_assets(self):
+        """校验当前游戏目录的资源对象并修复损坏的文件"""
+        try:
+            verifier = AssetVerifier(ASSET_HASH_CACHE)
+            report = verifier.verify(
+                os.path.join(self.minecraft_directory, 'assets'),
+                installed_asset_indexes(self.minecraft_directory),
+                repair=True,
+                progress=lambda done, total: self.progress(int(done * 100 / total))
+            )
+            self.output(f"[校验] {report.summary()}")
+        except Exception as e:
+            logger.warning(f"校验资源对象失败: {e}")
+
+    def _ensure_language_setting(self):
+        """确保游戏语言设置文件正确配置"""
+        options_file = os.path.join(self.minecraft_directory, "options.txt")
+
+        try:
+            # 读取现有选项
+            options = {}
+            if os.path.exists(options_file):
+                with open(options_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if ':' in line:
+                            key, value = line.split(':', 1)
+                            options[key.strip()] = value.strip()
+
+            # 强制设置语言选项
+            options['lang'] = self.language
+
+            # 写入新选项
+            with open(options_file, 'w', encoding='utf-8') as f:
+                for key, value in options.items():
+                    f.write(f"{key}:{value}\n")
+
+            self.output(f"已设置游戏语言: {self.language}")
+        except Exception as e:
+            self.error(f"设置游戏语言时出错: {str(e)}")
+
+    # ---------- 运行 ----------
+
+    def iter_output(self) -> Iterator[str]:
+        """逐行读取游戏输出，直到进程关闭输出流（游戏的输出必须被读取，否则管道写满后游戏会阻塞）"""
+        stdout = self.process.stdout if self.process else None
+        if stdout is None:
+            return
+        try:
+            for raw_line in iter(stdout.readline, b''):
+                yield raw_line.decode('utf-8', errors='replace').rstrip()
+        except (OSError, ValueError):
+            return  # 输出流已被关闭
+
+    def wait(self) -> Optional[int]:
+        """等待游戏退出，返回退出代码"""
+        if self.process is None:
+            return self.exit_code
+        self.exit_code = self.process.wait()
+        return self.exit_code
+
+    # ---------- 停止 ----------
+
+    def stop(self, force: bool = False) -> bool:
+        """停止游戏进程及其所有子进程（阻塞直到结束），返回进程树是否已全部退出
+
+        按阶段推进：发送 stop 命令 -> 同时向进程树中所有进程发送终止信号 -> 强制结束，
+        每个阶段用 psutil.wait_procs 等待（进程退出即返回，不轮询），仍有进程存活时进入下一阶段。
+        """
+        try:
+            state = STOP_KILL if force else STOP_GRACEFUL
+            alive = self._process_tree()
+            while alive and state != STOP_DONE:
+                if state == STOP_GRACEFUL:
+                    self._report_stop(state, alive)
+                    if self._send_stop_command():
+                        alive = self._wait_processes(alive, STOP_GRACEFUL_TIMEOUT, until_root_exits=True)
+                    state = STOP_TERMINATE
+
+                elif state == STOP_TERMINATE:
+                    # 主进程退出后仍可能留下子进程，重新获取一次进程树
+                    alive = self._refresh_tree(alive)
+                    self._report_stop(state, alive)
+                    for proc in alive:
+                        self._signal_process(proc, proc.terminate)
+                    alive = self._wait_processes(alive, STOP_TERMINATE_TIMEOUT)
+                    state = STOP_KILL
+
+                elif state == STOP_KILL:
+                    alive = self._refresh_tree(alive)
+                    self._report_stop(state, alive)
+                    for proc in alive:
+                        self._signal_process(proc, proc.kill)
+                    alive = self._wait_processes(alive, STOP_KILL_TIMEOUT)
+                    state = STOP_DONE
+
+            if alive:
+                pids = ', '.join(str(proc.pid) for proc in alive)
+                logger.info(f'[Stop] 以下进程未能终止: {pids}')
+                self.error(f"停止游戏失败，以下进程仍在运行: {pids}")
+            self._report_stop(STOP_DONE, alive)
+            return not alive
+        except Exception as e:
+            error_msg = f"停止进程时发生错误: {str(e)}"
+            logger.info(f'[Stop] {error_msg}')
+            self.error(error_msg)
+            return False
+
+    def _report_stop(self, state: str, alive: List[psutil.Process]) -> None:
+        logger.info(f'[Stop] {STOP_STATE_TEXT[state]}，剩余进程: {[proc.pid for proc in alive]}')
+        self.stop_progress(state, len(alive))
+        self.output(f"[停止] {STOP_STATE_TEXT[state]}")
+
+    def _process_tree(self) -> List[psutil.Process]:
+        """游戏主进程及其所有子进程"""
+        process = self.process
+        if process is None or process.poll() is not None:
+            return []
+        try:
+            root = psutil.Process(process.pid)
+            return [root] + root.children(recursive=True)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            logger.info('[Stop] 无法获取进程信息，可能进程已退出')
+            return []
+
+    def _refresh_tree(self, alive: List[psutil.Process]) -> List[psutil.Process]:
+        """合并仍存活的进程与当前进程树（期间新启动的子进程也一并结束）"""
+        procs = {proc.pid: proc for proc in alive}
+        for proc in self._process_tree():
+            procs.setdefault(proc.pid, proc)
+        return [proc for proc in procs.values() if proc.is_running()]
+
+    def _wait_processes(self, procs: List[psutil.Process], timeout: float,
+                        until_root_exits: bool = False) -> List[psutil.Process]:
+        """
+        等待进程退出，返回超时后仍存活的进程
+
+        主进程只用 Popen.wait 等待，由 Popen 回收并保留真实的退出代码；psutil 只等待其余子进程
+        （psutil 先回收了主进程时，另一个线程中阻塞的 Popen.wait 会因 ECHILD 得到退出代码 0）。
+        """
+        def on_exit(proc):
+            logger.info(f'[Stop] 进程 {proc.pid} 已退出，代码: {proc.returncode}')
+
+        root_pid = self.process.pid if self.process is not None else None
+        root = [proc for proc in procs if proc.pid == root_pid]
+        children = [proc for proc in procs if proc.pid != root_pid]
+        deadline = time.monotonic() + timeout
+        still_alive = []
+        if root:
+            try:
+                exit_code = self.process.wait(timeout)
+                logger.info(f'[Stop] 进程 {root_pid} 已退出，代码: {exit_code}')
+            except subprocess.TimeoutExpired:
+                still_alive = root
+        if until_root_exits:
+            return still_alive + [proc for proc in children if proc.is_running()]
+        gone, alive = psutil.wait_procs(children, timeout=max(0.0, deadline - time.monotonic()), callback=on_exit)
+        return still_alive + alive
+
+    @staticmethod
+    def _signal_process(proc: psutil.Process, action) -> None:
+        """向进程发送终止/强制结束信号（psutil 在 Windows 上使用 TerminateProcess）"""
+        try:
+            action()
+        except psutil.NoSuchProcess:
+            pass
+        except psutil.AccessDenied:
+            logger.info(f'[Stop] 无权限终止进程 {proc.pid}')
+
+    def _send_stop_command(self) -> bool:
+        """向游戏标准输入发送 stop 命令，返回是否发送成功"""
+        process = self.process
+        if process is None or process.stdin is None:
+            return False
+        try:
+            process.stdin.write(b'stop\n')
+            process.stdin.flush()
+            logger.info('[Stop] 已发送停止命令')
+            return True
+        except (IOError, OSError, ValueError):
+            return False  # stdin可能已关闭
@@ -1 +1,599 @@
-# 资源管理
\ No newline at end of file
+# 资源对象：多个游戏目录共用的对象库，以及资源索引校验
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set
+
+from utils.file_utils import atomic_write_bytes
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# 链接方式
+LINK_AUTO = 'auto'          # 依次尝试硬链接、写时复制、复制
+LINK_HARDLINK = 'hardlink'
+LINK_REFLINK = 'reflink'
+LINK_COPY = 'copy'
+
+# Linux FICLONE ioctl
+_FICLONE = 0x40049409
+
+
+def object_relpath(file_hash):
+    """资源对象相对 assets 目录的路径: objects/ab/abcdef..."""
+    return os.path.join('objects', file_hash[:2], file_hash)
+
+
+def read_index_hashes(index_path) -> Dict[str, int]:
+    """读取资源索引文件，返回 {hash: size}"""
+    with open(index_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return {obj['hash']: obj.get('size', -1) for obj in data.get('objects', {}).values()}
+
+
+def version_asset_index(game_dir, version) -> Optional[str]:
+    """读取游戏目录中某个版本使用的资源索引 ID，版本未安装时返回 None"""
+    version_file = os.path.join(game_dir, 'versions', version, f'{version}.json')
+    try:
+        with open(version_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # 带 inheritsFrom 的版本（如 Forge/Fabric）使用父版本的索引，父版本本身也会被扫描到
+    return data.get('assetIndex', {}).get('id') or data.get('assets')
+
+
+def installed_asset_indexes(game_dir) -> Set[str]:
+    """扫描游戏目录下已安装版本所使用的资源索引 ID"""
+    try:
+        names = os.listdir(os.path.join(game_dir, 'versions'))
+    except OSError:
+        return set()
+    return {index_id for index_id in (version_asset_index(game_dir, name) for name in names) if index_id}
+
+
+def _reflink(src, dst):
+    """写时复制（Linux btrfs/xfs 的 FICLONE，macOS APFS 的 clonefile），不支持时抛出 OSError"""
+    if sys.platform.startswith('linux'):
+        import fcntl
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            except OSError:
+                fdst.close()
+                os.remove(dst)
+                raise
+        return
+    if sys.platform == 'darwin':
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        return
+    raise OSError("当前系统不支持写时复制")
+
+
+class AssetStore:
+    """
+    内容寻址的共享资源对象库
+
+    对象库的目录布局与 .minecraft/assets 一致（objects/ab/<sha1>、indexes/<id>.json），
+    每个对象只保存一份。游戏目录中的 assets/objects 通过硬链接、写时复制或复制指向对象库，
+    minecraft_launcher_lib 安装时发现对象已存在且校验一致便不会重复下载；
+    安装后新下载的对象再被收录进对象库并替换为链接。
+
+    引用关系记录在 refs.json 中：{游戏目录: [资源索引 ID, ...]}，
+    对象的引用计数为引用它的 (游戏目录, 资源索引) 的数量，
+    不再被任何已安装版本的索引引用的对象由 collect_garbage 清理。
+    """
+
+    def __init__(self, root, link_mode=LINK_AUTO):
+        """
+        :param root: 对象库根目录
+        :param link_mode: 链接方式（auto / hardlink / reflink / copy）
+        """
+        self.root = str(root)
+        self.link_mode = link_mode
+        self.refs_file = os.path.join(self.root, 'refs.json')
+        self._lock = threading.RLock()
+        # 各游戏目录实际可用的链接方式（跨磁盘时硬链接不可用）
+        self._resolved_modes: Dict[str, str] = {}
+
+    # ---------- 对象 ----------
+
+    def object_path(self, file_hash):
+        return os.path.join(self.root, object_relpath(file_hash))
+
+    def index_path(self, index_id):
+        return os.path.join(self.root, 'indexes', f'{index_id}.json')
+
+    def has(self, file_hash, size=-1):
+        try:
+            st = os.stat(self.object_path(file_hash))
+        except OSError:
+            return False
+        return size < 0 or st.st_size == size
+
+    # ---------- 链接 ----------
+
+    def _link(self, src, dst, game_dir):
+        """按链接方式将 src 放到 dst（dst 不存在），返回实际使用的方式"""
+        modes = [self._resolved_modes.get(game_dir) or self.link_mode]
+        if modes[0] == LINK_AUTO:
+            modes = [LINK_HARDLINK, LINK_REFLINK, LINK_COPY]
+
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        last_error = None
+        for mode in modes:
+            try:
+                if mode == LINK_HARDLINK:
+                    os.link(src, dst)
+                elif mode == LINK_REFLINK:
+                    _reflink(src, dst)
+                else:
+                    shutil.copyfile(src, dst)
+            except OSError as e:
+                last_error = e
+                continue
+            if self.link_mode == LINK_AUTO and game_dir not in self._resolved_modes:
+                self._resolved_modes[game_dir] = mode
+                logger.info(f"资源对象链接方式: {game_dir} -> {mode}")
+            return mode
+        raise last_error
+
+    def _replace_with_link(self, src, dst, game_dir):
+        """用指向 src 的链接原子地替换已存在的 dst"""
+        temp = f'{dst}.link-tmp'
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+        self._link(src, temp, game_dir)
+        os.replace(temp, dst)
+
+    @staticmethod
+    def _same_file(a, b):
+        try:
+            return os.path.samefile(a, b)
+        except OSError:
+            return False
+
+    # ---------- 游戏目录 ----------
+
+    def materialize(self, game_dir, index_ids: Iterable[str]) -> int:
+        """
+        在游戏目录中为资源索引引用的、对象库中已有的对象建立链接（安装前调用）
+
+        :return: 新建立的链接数
+        """
+        game_assets = os.path.join(game_dir, 'assets')
+        linked = 0
+        with self._lock:
+            for index_id in index_ids:
+                index_path = self.index_path(index_id)
+                if not os.path.exists(index_path):
+                    continue
+
+                game_index = os.path.join(game_assets, 'indexes', f'{index_id}.json')
+                if not os.path.exists(game_index):
+                    self._link(index_path, game_index, game_dir)
+
+                for file_hash, size in read_index_hashes(index_path).items():
+                    dst = os.path.join(game_assets, object_relpath(file_hash))
+                    if os.path.exists(dst) or not self.has(file_hash, size):
+                        continue
+                    self._link(self.object_path(file_hash), dst, game_dir)
+                    linked += 1
+        if linked:
+            logger.info(f"从共享资源库链接了 {linked} 个对象到 {game_dir}")
+        return linked
+
+    def adopt(self, game_dir, index_ids: Iterable[str]) -> int:
+        """
+        将游戏目录中已下载的对象收录进对象库，并把游戏目录中的副本替换为链接（安装后调用）
+
+        对象文件名即 SHA-1，安装流程已校验过，这里只比较索引中记录的大小。
+
+        :return: 新收录或去重的对象数
+        """
+        game_assets = os.path.join(game_dir, 'assets')
+        adopted = 0
+        with self._lock:
+            for index_id in index_ids:
+                game_index = os.path.join(game_assets, 'indexes', f'{index_id}.json')
+                if not os.path.exists(game_index):
+                    continue
+
+                store_index = self.index_path(index_id)
+                if not os.path.exists(store_index):
+                    os.makedirs(os.path.dirname(store_index), exist_ok=True)
+                    shutil.copyfile(game_index, store_index)
+
+                for file_hash, size in read_index_hashes(game_index).items():
+                    src = os.path.join(game_assets, object_relpath(file_hash))
+                    try:
+                        if size >= 0 and os.path.getsize(src) != size:
+                            continue
+                    except OSError:
+                        continue
+
+                    store_path = self.object_path(file_hash)
+                    if not self.has(file_hash, size):
+                        # 对象库中还没有：硬链接或复制一份进来
+                        os.makedirs(os.path.dirname(store_path), exist_ok=True)
+                        try:
+                            os.link(src, store_path)
+                        except OSError:
+                            temp = f'{store_path}.tmp'
+                            shutil.copyfile(src, temp)
+                            os.replace(temp, store_path)
+                        adopted += 1
+                    elif self._resolved_modes.get(game_dir, self.link_mode) in (LINK_AUTO, LINK_HARDLINK) \
+                            and not self._same_file(src, store_path):
+                        # 游戏目录中的独立副本：替换为链接以释放空间
+                        # （写时复制与复制无法通过 samefile 识别，只在可以硬链接时去重）
+                        self._replace_with_link(store_path, src, game_dir)
+                        adopted += 1
+
+        if adopted:
+            logger.info(f"共享资源库收录/去重了 {adopted} 个对象: {game_dir}")
+        return adopted
+
+    def prepare(self, game_dir, version=None):
+        """
+        安装前：链接游戏目录已知的所有资源索引
+
+        :param version: 即将安装的版本；该版本尚未安装在此目录时，从其他已登记目录中查找它的资源索引
+        """
+        refs = self._references()
+        indexes = installed_asset_indexes(game_dir) | set(refs.get(self._key(game_dir), []))
+        if version and version_asset_index(game_dir, version) is None:
+            for other_dir in refs:
+                index_id = version_asset_index(other_dir, version)
+                if index_id:
+                    indexes.add(index_id)
+                    break
+        return self.materialize(game_dir, indexes)
+
+    def sync(self, game_dir):
+        """安装后：收录新对象并刷新该游戏目录的引用"""
+        indexes = installed_asset_indexes(game_dir)
+        adopted = self.adopt(game_dir, indexes)
+        self.register(game_dir, indexes)
+        return adopted
+
+    # ---------- 引用计数 ----------
+
+    @staticmethod
+    def _key(game_dir):
+        return os.path.normcase(os.path.abspath(game_dir))
+
+    def _references(self) -> Dict[str, List[str]]:
+        try:
+            with open(self.refs_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('directories', {})
+        except (OSError, ValueError):
+            return {}
+
+    def _save_references(self, refs):
+        data = json.dumps({'directories': refs}, ensure_ascii=False, indent=2).encode('utf-8')
+        atomic_write_bytes(self.refs_file, data)
+
+    def register(self, game_dir, index_ids: Iterable[str]):
+        """记录游戏目录当前引用的资源索引（覆盖旧记录）"""
+        with self._lock:
+            refs = self._references()
+            refs[self._key(game_dir)] = sorted(set(index_ids))
+            self._save_references(refs)
+
+    def unregister(self, game_dir):
+        """移除游戏目录的引用记录"""
+        with self._lock:
+            refs = self._references()
+            if refs.pop(self._key(game_dir), None) is not None:
+                self._save_references(refs)
+
+    def directories(self) -> Dict[str, List[str]]:
+        """已登记的游戏目录及其引用的资源索引"""
+        return self._references()
+
+    def retain(self, game_dirs: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        移除已删除的游戏目录的引用记录
+
+        :param game_dirs: 仍在使用的游戏目录；指定后不在其中的目录也一并移除
+        :return: 被移除的目录
+        """
+        keep = None if game_dirs is None else {self._key(game_dir) for game_dir in game_dirs}
+        with self._lock:
+            removed = [key for key in self._references()
+                       if not os.path.isdir(key) or (keep is not None and key not in keep)]
+            for key in removed:
+                self.unregister(key)
+        for key in removed:
+            logger.info(f"共享资源库不再引用游戏目录: {key}")
+        return removed
+
+    def refcounts(self, refs: Optional[Dict[str, List[str]]] = None, strict=False) -> Counter:
+        """
+        每个对象被 (游戏目录, 资源索引) 引用的次数
+
+        :param refs: 引用记录，默认为 refs.json 中的记录
+        :param strict: 资源索引无法读取时抛出异常（否则跳过该索引）
+        """
+        counts = Counter()
+        if refs is None:
+            refs = self._references()
+        for index_ids in refs.values():
+            for index_id in index_ids:
+                try:
+                    counts.update(read_index_hashes(self.index_path(index_id)).keys())
+                except (OSError, ValueError):
+                    if strict:
+                        raise
+                    logger.warning(f"无法读取资源索引: {index_id}")
+        return counts
+
+    def collect_garbage(self, dry_run=False):
+        """
+        删除不再被任何已登记游戏目录的资源索引引用的对象
+
+        已不存在的游戏目录会先从引用记录中移除。
+
+        :param dry_run: 只统计不删除
+        :return: (删除的对象数, 释放的字节数)
+        """
+        with self._lock:
+            refs = self._references()
+            alive = {key: value for key, value in refs.items() if os.path.isdir(key)}
+            if alive != refs and not dry_run:
+                self._save_references(alive)
+
+            live_indexes = {index_id for index_ids in alive.values() for index_id in index_ids}
+            try:
+                live_hashes = set(self.refcounts(alive, strict=True))
+            except (OSError, ValueError) as e:
+                # 索引丢失时无法判断哪些对象仍被引用，为安全起见放弃本次回收
+                logger.warning(f"资源索引缺失，跳过垃圾回收: {e}")
+                return 0, 0
+
+            removed = freed = 0
+            objects_dir = os.path.join(self.root, 'objects')
+            for prefix in self._listdir(objects_dir):
+                prefix_dir = os.path.join(objects_dir, prefix)
+                for name in self._listdir(prefix_dir):
+                    if name in live_hashes:
+                        continue
+                    path = os.path.join(prefix_dir, name)
+                    try:
+                        size = os.path.getsize(path)
+                        if not dry_run:
+                            os.remove(path)
+                    except OSError:
+                        continue
+                    removed += 1
+                    freed += size
+                if not dry_run and not self._listdir(prefix_dir):
+                    try:
+                        os.rmdir(prefix_dir)
+                    except OSError:
+                        pass
+
+            if not dry_run:
+                for index_file in self._listdir(os.path.join(self.root, 'indexes')):
+                    if index_file.endswith('.json') and index_file[:-5] not in live_indexes:
+                        try:
+                            os.remove(os.path.join(self.root, 'indexes', index_file))
+                        except OSError:
+                            pass
+
+        logger.info(f"共享资源库垃圾回收: {'可' if dry_run else '已'}删除 {removed} 个对象，{freed} 字节")
+        return removed, freed
+
+    @staticmethod
+    def _listdir(path):
+        try:
+            return os.listdir(path)
+        except OSError:
+            return []
+
+
+# ---------- 校验 ----------
+
+# Mojang 资源对象下载地址
+ASSET_DOWNLOAD_URL = 'https://resources.download.minecraft.net/{prefix}/{hash}'
+
+# 需要计算摘要的文件数达到该值时使用线程池
+HASH_POOL_THRESHOLD = 64
+
+
+def _sha1_file(path):
+    """计算文件 SHA-1，读取失败返回 None（读文件与 hashlib 计算大块数据时都会释放 GIL，可在线程池中并行）"""
+    digest = hashlib.sha1()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+class VerifyReport:
+    """资源校验报告"""
+
+    def __init__(self):
+        self.checked = 0         # 校验的对象数
+        self.cached = 0          # 大小与修改时间未变、直接使用缓存摘要的对象数
+        self.hashed = 0          # 重新计算摘要的对象数
+        self.missing = []        # 缺失的对象
+        self.size_mismatch = []  # 大小不符的对象
+        self.hash_mismatch = []  # 摘要不符的对象
+        self.repaired = []       # 已修复的对象
+        self.failed = []         # 修复失败的对象
+
+    @property
+    def ok(self):
+        broken = len(self.missing) + len(self.size_mismatch) + len(self.hash_mismatch)
+        return broken == len(self.repaired)
+
+    def summary(self):
+        return (
+            f"校验 {self.checked} 个资源对象（缓存命中 {self.cached}，重新计算 {self.hashed}）："
+            f"缺失 {len(self.missing)}，大小不符 {len(self.size_mismatch)}，摘要不符 {len(self.hash_mismatch)}，"
+            f"已修复 {len(self.repaired)}，修复失败 {len(self.failed)}"
+        )
+
+    def __repr__(self):
+        return f"<VerifyReport {self.summary()}>"
+
+
+class AssetVerifier:
+    """
+    资源索引校验器
+
+    1. 先比较大小：缺失或大小不符的对象直接判定为损坏，无需读取内容
+    2. 大小与修改时间都与上次校验记录一致时，使用缓存中的摘要
+    3. 其余对象重新计算 SHA-1；数量较多时分散到线程池中
+       （不使用进程池：Windows 上子进程会重新导入入口模块，重复执行其中的日志配置等初始化）
+    4. 可选地重新下载损坏的对象，并给出分类统计
+
+    摘要缓存以 JSON 保存：{绝对路径: [大小, 修改时间(ns), sha1]}。
+    """
+
+    def __init__(self, cache_file, workers=None, pool_threshold=HASH_POOL_THRESHOLD):
+        """
+        :param cache_file: 摘要缓存文件路径
+        :param workers: 线程池大小，默认为 CPU 核心数
+        :param pool_threshold: 需要计算摘要的文件数达到该值时使用线程池
+        """
+        self.cache_file = str(cache_file)
+        self.workers = workers or os.cpu_count() or 4
+        self.pool_threshold = pool_threshold
+        self._lock = threading.Lock()
+
+    def _load_cache(self) -> Dict[str, list]:
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self, cache):
+        try:
+            atomic_write_bytes(self.cache_file, json.dumps(cache, separators=(',', ':')).encode('utf-8'))
+        except OSError as e:
+            logger.warning(f"保存资源摘要缓存失败: {e}")
+
+    def _hash_files(self, paths, progress=None):
+        """计算一组文件的 SHA-1，返回与 paths 对应的列表"""
+        if len(paths) >= self.pool_threshold and self.workers > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            results = []
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='AssetHash') as pool:
+                for digest in pool.map(_sha1_file, paths):
+                    results.append(digest)
+                    if progress:
+                        progress(len(results), len(paths))
+            return results
+
+        results = []
+        for path in paths:
+            results.append(_sha1_file(path))
+            if progress:
+                progress(len(results), len(paths))
+        return results
+
+    def verify(self, assets_dir, index_ids: Iterable[str], repair=False, progress=None) -> VerifyReport:
+        """
+        校验资源目录中各资源索引引用的对象
+
+        :param assets_dir: 资源目录（游戏目录下的 assets，或共享资源库根目录）
+        :param index_ids: 要校验的资源索引 ID
+        :param repair: 是否重新下载损坏的对象
+        :param progress: 可选的进度回调 progress(已完成数, 总数)，仅在计算摘要阶段调用
+        :return: VerifyReport
+        """
+        report = VerifyReport()
+        objects = {}
+        for index_id in index_ids:
+            try:
+                objects.update(read_index_hashes(os.path.join(assets_dir, 'indexes', f'{index_id}.json')))
+            except (OSError, ValueError):
+                logger.warning(f"无法读取资源索引: {index_id}")
+
+        with self._lock:
+            cache = self._load_cache()
+            to_hash = []  # [(hash, 路径, stat)]
+
+            for file_hash, size in objects.items():
+                report.checked += 1
+                path = os.path.abspath(os.path.join(assets_dir, object_relpath(file_hash)))
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    report.missing.append(file_hash)
+                    cache.pop(path, None)
+                    continue
+
+                if size >= 0 and st.st_size != size:
+                    report.size_mismatch.append(file_hash)
+                    cache.pop(path, None)
+                    continue
+
+                cached = cache.get(path)
+                if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+                    report.cached += 1
+                    if cached[2] != file_hash:
+                        report.hash_mismatch.append(file_hash)
+                    continue
+
+                to_hash.append((file_hash, path, st))
+
+            digests = self._hash_files([path for _, path, _ in to_hash], progress)
+            report.hashed = len(to_hash)
+            for (file_hash, path, st), digest in zip(to_hash, digests):
+                if digest is None:
+                    report.missing.append(file_hash)
+                    cache.pop(path, None)
+                    continue
+                cache[path] = [st.st_size, st.st_mtime_ns, digest]
+                if digest != file_hash:
+                    report.hash_mismatch.append(file_hash)
+
+            if repair:
+                for file_hash in report.missing + report.size_mismatch + report.hash_mismatch:
+                    path = os.path.abspath(os.path.join(assets_dir, object_relpath(file_hash)))
+                    if self._repair(file_hash, path):
+                        report.repaired.append(file_hash)
+                        st = os.stat(path)
+                        cache[path] = [st.st_size, st.st_mtime_ns, file_hash]
+                    else:
+                        report.failed.append(file_hash)
+
+            self._save_cache(cache)
+
+        logger.info(f"[{assets_dir}] {report.summary()}")
+        return report
+
+    @staticmethod
+    def _repair(file_hash, path):
+        """重新下载损坏的对象"""
+        from utils.network import minecraft_httpx
+        data = minecraft_httpx.download(ASSET_DOWNLOAD_URL.format(prefix=file_hash[:2], hash=file_hash))
+        if not data or hashlib.sha1(data).hexdigest() != file_hash:
+            logger.warning(f"修复资源对象失败: {file_hash}")
+            return False
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 原地写入而非替换：对象可能与共享资源库硬链接，原地写入可同时修复对象库中的副本
+        with open(path, 'wb') as f:
+            f.write(data)
+        return True
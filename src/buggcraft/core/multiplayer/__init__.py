@@ -0,0 +1 @@
+# 多人游戏相关
\ No newline at end of file
@@ -0,0 +1,470 @@
+# 服务器地址解析：_minecraft._tcp SRV 记录与 A/AAAA 记录，带 TTL 缓存
+
+import sys
+import time
+import random
+import socket
+import struct
+import asyncio
+import ipaddress
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+from core.multiplayer.ping import split_address, DEFAULT_PORT
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+QTYPE_A = 1
+QTYPE_CNAME = 5
+QTYPE_SOA = 6
+QTYPE_AAAA = 28
+QTYPE_SRV = 33
+
+RCODE_OK = 0
+RCODE_NXDOMAIN = 3
+
+# 单次查询超时（秒）与重试次数
+DEFAULT_TIMEOUT = 2.0
+DEFAULT_RETRIES = 2
+# 否定应答（不存在的记录）的缓存时间（秒）
+NEGATIVE_TTL = 300
+# 缓存时间上下限（秒）
+MIN_TTL = 5
+MAX_TTL = 24 * 3600
+# 找不到系统 DNS 服务器时使用的公共 DNS
+FALLBACK_NAMESERVERS = ['223.5.5.5', '119.29.29.29', '8.8.8.8']
+
+
+class DnsError(Exception):
+    """DNS 查询失败"""
+    pass
+
+
+class SrvRecord:
+    """SRV 记录"""
+
+    def __init__(self, priority, weight, port, target):
+        self.priority = priority
+        self.weight = weight
+        self.port = port
+        self.target = target
+
+    def __repr__(self):
+        return f"<SrvRecord {self.priority} {self.weight} {self.target}:{self.port}>"
+
+
+class ResolvedServer:
+    """解析后的服务器地址"""
+
+    def __init__(self, address, host, port, ips, srv=False):
+        self.address = address  # 用户填写的原始地址
+        self.host = host        # 握手与启动参数中使用的主机名（SRV 目标或原主机名）
+        self.port = port
+        self.ips = ips          # 可连接的 IP 列表（IPv4 在前）
+        self.srv = srv          # 是否来自 SRV 记录
+
+    @property
+    def ip(self):
+        return self.ips[0] if self.ips else self.host
+
+    @property
+    def endpoint(self) -> Tuple[str, int]:
+        """用于建立连接的 (IP, 端口)"""
+        return self.ip, self.port
+
+    def __repr__(self):
+        return f"<ResolvedServer {self.address} -> {self.host}:{self.port} {self.ips}>"
+
+
+# ---------- 系统 DNS 服务器 ----------
+
+def system_nameservers() -> List[str]:
+    """读取系统配置的 DNS 服务器"""
+    servers = []
+    if sys.platform == 'win32':
+        servers = _windows_nameservers()
+    else:
+        try:
+            with open('/etc/resolv.conf', 'r', encoding='utf-8') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) >= 2 and parts[0] == 'nameserver':
+                        servers.append(parts[1].split('%')[0])
+        except OSError:
+            pass
+    return list(dict.fromkeys(servers)) or list(FALLBACK_NAMESERVERS)
+
+
+def _windows_nameservers():
+    import winreg
+    servers = []
+    base = r'SYSTEM\CurrentControlSet\Services\Tcpip\Parameters'
+
+    def read_key(key):
+        for value_name in ('NameServer', 'DhcpNameServer'):
+            try:
+                value, _ = winreg.QueryValueEx(key, value_name)
+            except OSError:
+                continue
+            servers.extend(value.replace(',', ' ').split())
+
+    try:
+        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, base) as key:
+            read_key(key)
+        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, base + r'\Interfaces') as interfaces:
+            for i in range(winreg.QueryInfoKey(interfaces)[0]):
+                with winreg.OpenKey(interfaces, winreg.EnumKey(interfaces, i)) as key:
+                    read_key(key)
+    except OSError:
+        pass
+    return servers
+
+
+# ---------- 报文编解码 ----------
+
+def build_query(query_id, name, qtype) -> bytes:
+    """构造查询报文（递归查询）"""
+    header = struct.pack('>6H', query_id, 0x0100, 1, 0, 0, 0)
+    question = b''
+    for label in name.rstrip('.').split('.'):
+        encoded = label.encode('idna')
+        if not 0 < len(encoded) < 64:
+            raise DnsError(f"无效的域名: {name}")
+        question += bytes([len(encoded)]) + encoded
+    return header + question + b'\x00' + struct.pack('>2H', qtype, 1)
+
+
+def _read_name(data, offset):
+    """读取（可能经过压缩的）域名，返回 (域名, 名称之后的偏移)"""
+    labels = []
+    end = None
+    jumps = 0
+    while True:
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if jumps > 32:
+                raise DnsError("域名压缩指针循环")
+            pointer = struct.unpack_from('>H', data, offset)[0] & 0x3FFF
+            if end is None:
+                end = offset + 2
+            offset = pointer
+            jumps += 1
+            continue
+        offset += 1
+        if length == 0:
+            break
+        labels.append(data[offset:offset + length].decode('ascii', errors='replace'))
+        offset += length
+    return '.'.join(labels).lower(), end if end is not None else offset
+
+
+class DnsResponse:
+    """解析后的应答报文"""
+
+    def __init__(self, query_id, rcode, truncated):
+        self.query_id = query_id
+        self.rcode = rcode
+        self.truncated = truncated
+        self.answers = []    # [(名称, 类型, TTL, 值)]
+        self.authority = []
+
+
+def parse_response(data) -> DnsResponse:
+    """解析应答报文，支持 A、AAAA、CNAME、SRV、SOA"""
+    if len(data) < 12:
+        raise DnsError("应答报文过短")
+    query_id, flags, qdcount, ancount, nscount, _ = struct.unpack_from('>6H', data)
+    response = DnsResponse(query_id, flags & 0x000F, bool(flags & 0x0200))
+
+    offset = 12
+    for _ in range(qdcount):
+        _, offset = _read_name(data, offset)
+        offset += 4
+
+    for section, count in ((response.answers, ancount), (response.authority, nscount)):
+        for _ in range(count):
+            name, offset = _read_name(data, offset)
+            rtype, _, ttl, rdlength = struct.unpack_from('>2HIH', data, offset)
+            offset += 10
+            rdata_offset = offset
+            offset += rdlength
+
+            if rtype == QTYPE_A and rdlength == 4:
+                value = socket.inet_ntop(socket.AF_INET, data[rdata_offset:offset])
+            elif rtype == QTYPE_AAAA and rdlength == 16:
+                value = socket.inet_ntop(socket.AF_INET6, data[rdata_offset:offset])
+            elif rtype == QTYPE_CNAME:
+                value, _ = _read_name(data, rdata_offset)
+            elif rtype == QTYPE_SRV:
+                priority, weight, port = struct.unpack_from('>3H', data, rdata_offset)
+                target, _ = _read_name(data, rdata_offset + 6)
+                value = SrvRecord(priority, weight, port, target)
+            elif rtype == QTYPE_SOA:
+                _, pos = _read_name(data, rdata_offset)
+                _, pos = _read_name(data, pos)
+                value = struct.unpack_from('>5I', data, pos)[4]  # minimum TTL
+            else:
+                continue
+            section.append((name, rtype, ttl, value))
+    return response
+
+
+# ---------- 传输 ----------
+
+class _UdpQuery(asyncio.DatagramProtocol):
+    def __init__(self, query_id, future):
+        self.query_id = query_id
+        self.future = future
+
+    def datagram_received(self, data, addr):
+        if len(data) >= 2 and struct.unpack_from('>H', data)[0] == self.query_id and not self.future.done():
+            self.future.set_result(data)
+
+    def error_received(self, exc):
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+
+async def _query_udp(server, packet, query_id, timeout):
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: _UdpQuery(query_id, future), remote_addr=(server, 53)
+    )
+    try:
+        transport.sendto(packet)
+        return await asyncio.wait_for(future, timeout)
+    finally:
+        transport.close()
+
+
+async def _query_tcp(server, packet, timeout):
+    """应答被截断时改用 TCP 重新查询"""
+    async def run():
+        reader, writer = await asyncio.open_connection(server, 53)
+        try:
+            writer.write(struct.pack('>H', len(packet)) + packet)
+            await writer.drain()
+            length, = struct.unpack('>H', await reader.readexactly(2))
+            return await reader.readexactly(length)
+        finally:
+            writer.close()
+    return await asyncio.wait_for(run(), timeout)
+
+
+# ---------- 缓存 ----------
+
+class DnsCache:
+    """按记录自身 TTL 过期的缓存（线程安全，可被多个事件循环共享）"""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, int], Tuple[float, list]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, qtype):
+        with self._lock:
+            entry = self._entries.get((name, qtype))
+            if entry is None:
+                return None
+            expires_at, values = entry
+            if expires_at <= time.monotonic():
+                del self._entries[(name, qtype)]
+                return None
+            return values
+
+    def put(self, name, qtype, values, ttl):
+        ttl = min(max(ttl, MIN_TTL), MAX_TTL)
+        with self._lock:
+            self._entries[(name, qtype)] = (time.monotonic() + ttl, values)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# ---------- 解析器 ----------
+
+class Resolver:
+    """
+    异步 DNS 解析器
+
+    直接向系统 DNS 服务器发送 UDP 查询（截断时改用 TCP），结果按 TTL 缓存，
+    不存在的记录按 SOA 最小 TTL 做否定缓存。同一事件循环中对同一记录的并发查询会合并为一次。
+    """
+
+    def __init__(self, nameservers=None, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, cache=None):
+        self.nameservers = nameservers or system_nameservers()
+        self.timeout = timeout
+        self.retries = retries
+        self.cache = cache or DnsCache()
+        self._inflight: Dict[Tuple[int, str, int], asyncio.Future] = {}
+
+    async def query(self, name, qtype) -> list:
+        """查询记录，返回值列表（CNAME 已展开）；记录不存在时返回空列表"""
+        name = name.rstrip('.').lower()
+        cached = self.cache.get(name, qtype)
+        if cached is not None:
+            return cached
+
+        key = (id(asyncio.get_running_loop()), name, qtype)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.ensure_future(self._query_uncached(name, qtype))
+        self._inflight[key] = future
+        try:
+            return await future
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _query_uncached(self, name, qtype):
+        last_error = None
+        for attempt in range(self.retries + 1):
+            for server in self.nameservers:
+                query_id = random.getrandbits(16)
+                packet = build_query(query_id, name, qtype)
+                try:
+                    data = await _query_udp(server, packet, query_id, self.timeout)
+                    response = parse_response(data)
+                    if response.truncated:
+                        response = parse_response(await _query_tcp(server, packet, self.timeout))
+                except (OSError, asyncio.TimeoutError, DnsError, struct.error, IndexError) as e:
+                    last_error = e
+                    continue
+
+                if response.rcode not in (RCODE_OK, RCODE_NXDOMAIN):
+                    last_error = DnsError(f"DNS 服务器 {server} 返回错误码 {response.rcode}")
+                    continue
+                return self._store(name, qtype, response)
+        raise DnsError(f"查询 {name} 失败: {last_error}")
+
+    def _store(self, name, qtype, response):
+        """从应答中提取记录（展开 CNAME 链）并写入缓存"""
+        aliases = {name}
+        values, ttls = [], []
+        # CNAME 可能出现在任意位置，多次扫描直到别名集合不再变化
+        changed = True
+        while changed:
+            changed = False
+            for record_name, rtype, ttl, value in response.answers:
+                if rtype == QTYPE_CNAME and record_name in aliases and value not in aliases:
+                    aliases.add(value)
+                    ttls.append(ttl)
+                    changed = True
+        for record_name, rtype, ttl, value in response.answers:
+            if rtype == qtype and record_name in aliases:
+                values.append(value)
+                ttls.append(ttl)
+
+        if values:
+            ttl = min(ttls)
+        else:
+            soa = [value for _, rtype, _, value in response.authority if rtype == QTYPE_SOA]
+            ttl = min(soa[0], NEGATIVE_TTL) if soa else NEGATIVE_TTL
+        self.cache.put(name, qtype, values, ttl)
+        return values
+
+    async def resolve_srv(self, host) -> List[SrvRecord]:
+        """查询 _minecraft._tcp.<host> 的 SRV 记录，按优先级排序"""
+        try:
+            records = await self.query(f'_minecraft._tcp.{host}', QTYPE_SRV)
+        except DnsError as e:
+            logger.debug(f"SRV 查询失败: {e}")
+            return []
+        return sorted(records, key=lambda record: record.priority)
+
+    async def resolve_ips(self, host) -> List[str]:
+        """解析主机名的 IPv4 与 IPv6 地址（IPv4 在前），DNS 查询失败时回退到系统解析"""
+        try:
+            ip = ipaddress.ip_address(host)
+            return [str(ip)]
+        except ValueError:
+            pass
+        if host.lower() == 'localhost':
+            return ['127.0.0.1']
+
+        results = await asyncio.gather(
+            self.query(host, QTYPE_A), self.query(host, QTYPE_AAAA), return_exceptions=True
+        )
+        ips = [ip for result in results if isinstance(result, list) for ip in result]
+        if ips:
+            return ips
+
+        loop = asyncio.get_running_loop()
+        try:
+            infos = await loop.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        except OSError as e:
+            raise DnsError(f"无法解析 {host}: {e}")
+        ips = list(dict.fromkeys(info[4][0] for info in infos))
+        ips.sort(key=lambda ip: ':' in ip)
+        return ips
+
+    @staticmethod
+    def _pick_srv(records: List[SrvRecord]) -> SrvRecord:
+        """在最高优先级的记录中按权重随机选择（RFC 2782）"""
+        best = [record for record in records if record.priority == records[0].priority]
+        total = sum(record.weight for record in best)
+        if total == 0:
+            return best[0]
+        point = random.uniform(0, total)
+        for record in best:
+            point -= record.weight
+            if point <= 0:
+                return record
+        return best[-1]
+
+    async def resolve_server(self, address) -> ResolvedServer:
+        """
+        解析服务器地址
+
+        与游戏客户端一致：地址中未指定端口时才查询 SRV 记录。
+        """
+        host, port = split_address(address)
+        explicit_port = port is not None
+        port = DEFAULT_PORT if port is None else port
+        srv = False
+
+        is_ip = True
+        try:
+            ipaddress.ip_address(host)
+        except ValueError:
+            is_ip = False
+
+        if not explicit_port and not is_ip and host.lower() != 'localhost':
+            records = await self.resolve_srv(host)
+            if records:
+                record = self._pick_srv(records)
+                if record.target and record.target != '.':
+                    host, port, srv = record.target, record.port, True
+
+        ips = await self.resolve_ips(host)
+        return ResolvedServer(address, host, port, ips, srv)
+
+    async def resolve_many(self, addresses: Iterable[str]) -> Dict[str, object]:
+        """并行解析多个地址，返回 {地址: ResolvedServer 或异常}"""
+        addresses = list(dict.fromkeys(addresses))
+        results = await asyncio.gather(*(self.resolve_server(a) for a in addresses), return_exceptions=True)
+        return dict(zip(addresses, results))
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver() -> Resolver:
+    """获取全局解析器（共享缓存）"""
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = Resolver()
+        return _resolver
+
+
+def resolve_server_sync(address, timeout=DEFAULT_TIMEOUT * 3) -> ResolvedServer:
+    """同步接口：在新的事件循环中解析服务器地址"""
+    async def run():
+        return await asyncio.wait_for(get_resolver().resolve_server(address), timeout)
+    return asyncio.run(run())
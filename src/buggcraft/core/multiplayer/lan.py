@@ -0,0 +1,294 @@
+# 局域网游戏发现
+
+import re
+import time
+import socket
+import struct
+import asyncio
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# 原版客户端使用的组播地址与端口
+LAN_GROUP = '224.0.2.60'
+LAN_PORT = 4445
+# 原版服务端约每 1.5 秒广播一次
+ANNOUNCE_INTERVAL = 1.5
+# 超过该时间未再收到广播的世界视为已关闭（秒）
+WORLD_TTL = 6.0
+# 单个广播包的最大长度，超出的包直接丢弃
+MAX_ANNOUNCEMENT = 1024
+
+_MOTD_PATTERN = re.compile(r'\[MOTD\](.*?)\[/MOTD\]', re.S)
+_AD_PATTERN = re.compile(r'\[AD\](.*?)\[/AD\]', re.S)
+
+
+def make_announcement(motd, port) -> bytes:
+    """构造广播内容"""
+    return f'[MOTD]{motd}[/MOTD][AD]{port}[/AD]'.encode('utf-8')
+
+
+def parse_announcement(data) -> Optional[Tuple[str, int]]:
+    """解析广播内容，返回 (motd, port)，格式不正确时返回 None"""
+    if len(data) > MAX_ANNOUNCEMENT:
+        return None
+    text = data.decode('utf-8', errors='replace')
+    ad = _AD_PATTERN.search(text)
+    if not ad:
+        return None
+    port = ad.group(1).strip()
+    if not port.isdigit() or not 0 < int(port) < 65536:
+        return None
+    motd = _MOTD_PATTERN.search(text)
+    return (motd.group(1) if motd else 'missing no'), int(port)
+
+
+class LanWorld:
+    """一个局域网世界"""
+
+    def __init__(self, ip, port, motd, now):
+        self.ip = ip
+        self.port = port
+        self.motd = motd
+        self.first_seen = now
+        self.last_seen = now
+
+    @property
+    def key(self):
+        return self.ip, self.port
+
+    @property
+    def address(self):
+        return f'{self.ip}:{self.port}'
+
+    def to_dict(self):
+        return {'ip': self.ip, 'port': self.port, 'motd': self.motd, 'address': self.address}
+
+    def __repr__(self):
+        return f'<LanWorld {self.address} {self.motd!r}>'
+
+
+class LanWorldTable:
+    """去重并按时间过期的局域网世界表（以 ip:port 为键）"""
+
+    def __init__(self, ttl=WORLD_TTL):
+        self.ttl = ttl
+        self._worlds: Dict[Tuple[str, int], LanWorld] = {}
+
+    def __len__(self):
+        return len(self._worlds)
+
+    def update(self, ip, motd, port, now=None) -> bool:
+        """记录一次广播，新世界或 MOTD 变化时返回 True"""
+        now = time.monotonic() if now is None else now
+        world = self._worlds.get((ip, port))
+        if world is None:
+            self._worlds[(ip, port)] = LanWorld(ip, port, motd, now)
+            return True
+        world.last_seen = now
+        if world.motd != motd:
+            # 替换而不是原地修改，已交给回调的快照保持不变
+            changed = LanWorld(ip, port, motd, world.first_seen)
+            changed.last_seen = now
+            self._worlds[(ip, port)] = changed
+            return True
+        return False
+
+    def expire(self, now=None) -> List[LanWorld]:
+        """移除过期的世界，返回被移除的条目"""
+        now = time.monotonic() if now is None else now
+        expired = [world for world in self._worlds.values() if now - world.last_seen >= self.ttl]
+        for world in expired:
+            del self._worlds[world.key]
+        return expired
+
+    def next_expiry(self) -> Optional[float]:
+        """最早过期的时间（monotonic），表为空时返回 None"""
+        if not self._worlds:
+            return None
+        return min(world.last_seen for world in self._worlds.values()) + self.ttl
+
+    def worlds(self) -> List[LanWorld]:
+        """按发现顺序返回当前的世界"""
+        return sorted(self._worlds.values(), key=lambda world: world.first_seen)
+
+    def clear(self):
+        self._worlds.clear()
+
+
+def make_listen_socket(group=LAN_GROUP, port=LAN_PORT, interface='0.0.0.0'):
+    """创建加入组播组的非阻塞 UDP 套接字"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, 'SO_REUSEPORT'):
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            except OSError:
+                pass
+        # 游戏本身也可能在监听同一端口，地址复用保证两者共存
+        sock.bind(('', port))
+        membership = struct.pack('4s4s', socket.inet_aton(group), socket.inet_aton(interface))
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+        sock.setblocking(False)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+class _DiscoveryProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self, discovery):
+        self.discovery = discovery
+
+    def datagram_received(self, data, addr):
+        self.discovery._on_datagram(data, addr[0])
+
+    def error_received(self, exc):
+        logger.debug(f"局域网发现套接字错误: {exc}")
+
+
+class LanDiscovery:
+    """
+    局域网世界发现服务
+
+    监听组播广播并维护世界表，只在世界出现、消失或 MOTD 变化时回调。
+    空闲时只阻塞在套接字上；仅当表非空时才为最早过期的条目安排一次定时器，不做轮询。
+    """
+
+    def __init__(self, on_change: Callable[[List[LanWorld]], None] = None,
+                 group=LAN_GROUP, port=LAN_PORT, ttl=WORLD_TTL, interface='0.0.0.0'):
+        """
+        :param on_change: 世界表变化时的回调，参数为当前全部世界
+        :param ttl: 世界的过期时间（秒）
+        :param interface: 加入组播组所用的本机接口地址
+        """
+        self.on_change = on_change
+        self.group = group
+        self.port = port
+        self.interface = interface
+        self.table = LanWorldTable(ttl)
+        self._loop = None
+        self._stopped = None
+        self._stop_requested = False
+        self._expiry_handle = None
+
+    def _notify(self):
+        if self.on_change:
+            try:
+                self.on_change(self.table.worlds())
+            except Exception as e:
+                logger.error(f"局域网世界回调出错: {e}")
+
+    def _on_datagram(self, data, ip):
+        parsed = parse_announcement(data)
+        if parsed is None:
+            return
+        motd, port = parsed
+        if self.table.update(ip, motd, port):
+            logger.info(f"发现局域网世界: {ip}:{port} {motd}")
+            self._notify()
+        if self._expiry_handle is None:
+            self._schedule_expiry()
+
+    def _schedule_expiry(self):
+        deadline = self.table.next_expiry()
+        if deadline is None:
+            self._expiry_handle = None
+            return
+        delay = max(0.0, deadline - time.monotonic())
+        self._expiry_handle = self._loop.call_later(delay, self._on_expiry)
+
+    def _on_expiry(self):
+        if self.table.expire():
+            self._notify()
+        self._schedule_expiry()
+
+    async def run(self):
+        """开始监听，直到 stop() 被调用"""
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        if self._stop_requested:
+            return
+        sock = make_listen_socket(self.group, self.port, self.interface)
+        transport, _ = await self._loop.create_datagram_endpoint(
+            lambda: _DiscoveryProtocol(self), sock=sock
+        )
+        logger.info(f"局域网发现已启动: {self.group}:{self.port}")
+        try:
+            await self._stopped.wait()
+        finally:
+            if self._expiry_handle is not None:
+                self._expiry_handle.cancel()
+                self._expiry_handle = None
+            transport.close()
+            self.table.clear()
+
+    def stop(self):
+        """停止监听（需在事件循环线程中调用，或通过 call_soon_threadsafe）"""
+        self._stop_requested = True
+        if self._stopped is not None:
+            self._stopped.set()
+
+
+class LanAnnouncer:
+    """向局域网广播一个世界（与原版“对局域网开放”相同的格式）"""
+
+    def __init__(self, motd, port, group=LAN_GROUP, group_port=LAN_PORT,
+                 interval=ANNOUNCE_INTERVAL, interface=None):
+        self.motd = motd
+        self.port = port
+        self.group = group
+        self.group_port = group_port
+        self.interval = interval
+        self.interface = interface
+        self._stop = threading.Event()
+
+    def _make_socket(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+        if self.interface:
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(self.interface))
+        return sock
+
+    def announce_once(self, sock=None):
+        """发送一次广播"""
+        own = sock is None
+        sock = sock or self._make_socket()
+        try:
+            sock.sendto(make_announcement(self.motd, self.port), (self.group, self.group_port))
+        finally:
+            if own:
+                sock.close()
+
+    def run(self):
+        """按间隔持续广播，直到 stop() 被调用（阻塞，适合放在线程中）"""
+        with self._make_socket() as sock:
+            while not self._stop.is_set():
+                try:
+                    self.announce_once(sock)
+                except OSError as e:
+                    logger.warning(f"局域网广播失败: {e}")
+                self._stop.wait(self.interval)
+
+    def stop(self):
+        self._stop.set()
+
+
+async def scan(duration=3.0, **kwargs) -> List[LanWorld]:
+    """监听一段时间，返回期间发现的世界"""
+    discovery = LanDiscovery(**kwargs)
+    task = asyncio.ensure_future(discovery.run())
+    try:
+        await asyncio.wait_for(asyncio.shield(task), duration)
+    except asyncio.TimeoutError:
+        pass
+    worlds = discovery.table.worlds()
+    discovery.stop()
+    await task
+    return worlds
@@ -0,0 +1,554 @@
+# 联机房间服务：房间创建、密码保护、成员在线状态
+
+import hmac
+import json
+import time
+import base64
+import asyncio
+import hashlib
+import secrets
+import argparse
+import itertools
+from collections import OrderedDict
+from typing import Callable, Dict
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_LOBBY_PORT = 7100
+PROTOCOL_VERSION = 1
+# 客户端心跳间隔与服务端判定离线的超时（秒）
+HEARTBEAT_INTERVAL = 10.0
+SESSION_TIMEOUT = 30.0
+# 单条消息（一行 JSON）的最大长度
+MAX_LINE = 16 * 1024
+# 同一房间的成员变化在该时间内合并为一条通知（秒）
+PRESENCE_COALESCE = 0.05
+# 客户端写缓冲超过该值视为消费过慢，直接断开，避免拖累广播
+MAX_WRITE_BUFFER = 256 * 1024
+# 房间密码的密钥派生参数（在客户端计算，服务端只保存派生结果）
+PBKDF2_ITERATIONS = 200_000
+SALT_SIZE = 16
+# 单页房间列表的最大条数
+MAX_LIST = 200
+
+# 房间入口类型
+ENDPOINT_TUNNEL = 'tunnel'
+ENDPOINT_LAN = 'lan'
+ENDPOINT_DIRECT = 'direct'
+
+
+class LobbyError(Exception):
+    """房间服务返回的错误"""
+
+
+def derive_key(password, salt: bytes) -> bytes:
+    """由房间密码派生密钥（PBKDF2-SHA256）"""
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, PBKDF2_ITERATIONS)
+
+
+def join_proof(key: bytes, nonce: bytes, room_id) -> str:
+    """加入房间的凭证：用派生密钥对本连接的随机数与房间号做 HMAC，密码本身不经过网络"""
+    return hmac.new(key, nonce + room_id.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def _encode(message) -> bytes:
+    return json.dumps(message, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+# ---------- 服务端 ----------
+
+class _Session:
+    __slots__ = ('session_id', 'writer', 'name', 'rooms', 'nonce', 'closed')
+
+    def __init__(self, session_id, writer):
+        self.session_id = session_id
+        self.writer = writer
+        self.name = f'玩家{session_id}'
+        self.rooms = set()
+        self.nonce = secrets.token_bytes(16)
+        self.closed = False
+
+
+class Room:
+    """房间（使用 __slots__，数千个房间的内存开销很小）"""
+    __slots__ = ('room_id', 'name', 'owner', 'salt', 'verifier', 'endpoint', 'max_members',
+                 'members', 'created_at', 'joined', 'left', 'flush_handle')
+
+    def __init__(self, room_id, name, owner, endpoint, max_members, salt=None, verifier=None):
+        self.room_id = room_id
+        self.name = name
+        self.owner = owner
+        self.salt = salt
+        self.verifier = verifier
+        self.endpoint = endpoint
+        self.max_members = max_members
+        self.members: Dict[_Session, str] = {}
+        self.created_at = time.time()
+        # 待广播的成员变化
+        self.joined = []
+        self.left = []
+        self.flush_handle = None
+
+    @property
+    def protected(self):
+        return self.verifier is not None
+
+    def summary(self) -> dict:
+        """公开信息（不含入口地址与密码材料，加密码的房间附带盐）"""
+        info = {
+            'room': self.room_id,
+            'name': self.name,
+            'owner': self.owner.name,
+            'members': len(self.members),
+            'max_members': self.max_members,
+            'protected': self.protected,
+        }
+        if self.protected:
+            info['salt'] = self.salt.hex()
+        return info
+
+
+class LobbyServer:
+    """
+    轻量的房间服务端（每行一条 JSON 消息）
+
+    请求带有 id，响应原样带回；服务端主动推送的事件没有 id。
+    会话按最后活动时间保存在有序字典中，收到消息时移到末尾，清理时只需从头部检查到第一个未超时的会话。
+    成员变化按房间合并后只序列化一次，再写给所有成员；写缓冲积压的慢客户端会被断开。
+    """
+
+    def __init__(self, host='0.0.0.0', port=DEFAULT_LOBBY_PORT, session_timeout=SESSION_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.session_timeout = session_timeout
+        self.rooms: Dict[str, Room] = {}
+        self._sessions: 'OrderedDict[int, _Session]' = OrderedDict()
+        self._last_seen: Dict[int, float] = {}
+        self._ids = itertools.count(1)
+        self._server = None
+        self._sweeper = None
+        self._handlers = {
+            'hello': self._op_hello,
+            'heartbeat': self._op_heartbeat,
+            'create': self._op_create,
+            'info': self._op_info,
+            'join': self._op_join,
+            'leave': self._op_leave,
+            'list': self._op_list,
+            'update': self._op_update,
+            'close': self._op_close,
+        }
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, limit=MAX_LINE)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._sweeper = asyncio.ensure_future(self._sweep_loop())
+        logger.info(f"房间服务已启动: {self.host}:{self.port}")
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+        for session in list(self._sessions.values()):
+            self._drop(session)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    # ---------- 连接 ----------
+
+    async def _handle(self, reader, writer):
+        session = _Session(next(self._ids), writer)
+        self._touch(session)
+        self._send(session, {
+            'op': 'welcome', 'version': PROTOCOL_VERSION, 'nonce': session.nonce.hex(),
+            'heartbeat': min(HEARTBEAT_INTERVAL, self.session_timeout / 3),
+        })
+        try:
+            while not session.closed:
+                line = await reader.readline()
+                if not line or session.closed:
+                    # 会话可能在等待读取期间被断开，缓冲区里剩下的数据不再处理
+                    break
+                self._touch(session)
+                try:
+                    message = json.loads(line)
+                    handler = self._handlers.get(message.get('op'))
+                    if handler is None:
+                        raise LobbyError(f"未知操作: {message.get('op')}")
+                    result = handler(session, message) or {}
+                    response = {'id': message.get('id'), 'ok': True, **result}
+                except LobbyError as e:
+                    response = {'id': message.get('id') if isinstance(message, dict) else None,
+                                'ok': False, 'error': str(e)}
+                except (ValueError, AttributeError, TypeError):
+                    response = {'id': None, 'ok': False, 'error': '消息格式错误'}
+                    message = None
+                self._send(session, response)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            self._drop(session)
+
+    def _touch(self, session):
+        if session.closed:
+            return
+        self._sessions[session.session_id] = session
+        self._sessions.move_to_end(session.session_id)
+        self._last_seen[session.session_id] = time.monotonic()
+
+    def _send(self, session, message):
+        self._write(session, _encode(message))
+
+    def _write(self, session, data: bytes):
+        if session.closed:
+            return
+        transport = session.writer.transport
+        if transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            logger.info(f"会话 {session.session_id} 消费过慢，断开连接")
+            self._drop(session)
+            return
+        session.writer.write(data)
+
+    def _drop(self, session):
+        """断开会话并退出其所在的全部房间"""
+        if session.closed:
+            return
+        session.closed = True
+        self._sessions.pop(session.session_id, None)
+        self._last_seen.pop(session.session_id, None)
+        for room_id in list(session.rooms):
+            room = self.rooms.get(room_id)
+            if room is not None:
+                self._remove_member(room, session)
+        session.writer.close()
+
+    async def _sweep_loop(self):
+        """清理超时未发送心跳的会话"""
+        while True:
+            await asyncio.sleep(self.session_timeout / 3)
+            deadline = time.monotonic() - self.session_timeout
+            while self._sessions:
+                session_id, session = next(iter(self._sessions.items()))
+                if self._last_seen.get(session_id, 0) > deadline:
+                    break
+                # 先无条件移出队首，即使 _drop 因会话已关闭而直接返回也不会在同一条目上空转
+                self._sessions.popitem(last=False)
+                self._last_seen.pop(session_id, None)
+                logger.info(f"会话 {session_id} 心跳超时")
+                self._drop(session)
+
+    # ---------- 房间 ----------
+
+    def _new_room_id(self):
+        while True:
+            room_id = base64.b32encode(secrets.token_bytes(5)).decode('ascii')[:6]
+            if room_id not in self.rooms:
+                return room_id
+
+    def _get_room(self, message) -> Room:
+        room = self.rooms.get(str(message.get('room', '')).upper())
+        if room is None:
+            raise LobbyError('房间不存在')
+        return room
+
+    def _add_member(self, room, session):
+        room.members[session] = session.name
+        session.rooms.add(room.room_id)
+        self._queue_presence(room, joined=session.name)
+
+    def _remove_member(self, room, session):
+        if room.members.pop(session, None) is None:
+            return
+        session.rooms.discard(room.room_id)
+        if session is room.owner:
+            self._close_room(room, '房主已离开')
+        else:
+            self._queue_presence(room, left=session.name)
+
+    def _close_room(self, room, reason):
+        self.rooms.pop(room.room_id, None)
+        if room.flush_handle is not None:
+            room.flush_handle.cancel()
+        data = _encode({'op': 'room_closed', 'room': room.room_id, 'reason': reason})
+        for member in list(room.members):
+            member.rooms.discard(room.room_id)
+            self._write(member, data)
+        room.members.clear()
+
+    def _queue_presence(self, room, joined=None, left=None):
+        """记录成员变化，短时间内的多次变化合并为一条通知"""
+        if joined:
+            room.joined.append(joined)
+        if left:
+            room.left.append(left)
+        if room.flush_handle is None:
+            room.flush_handle = asyncio.get_running_loop().call_later(
+                PRESENCE_COALESCE, self._flush_presence, room
+            )
+
+    def _flush_presence(self, room):
+        room.flush_handle = None
+        if room.room_id not in self.rooms or not (room.joined or room.left):
+            return
+        data = _encode({
+            'op': 'presence', 'room': room.room_id, 'joined': room.joined, 'left': room.left,
+            'members': list(room.members.values()),
+        })
+        room.joined, room.left = [], []
+        # 只序列化一次，写给所有成员
+        for member in list(room.members):
+            self._write(member, data)
+
+    # ---------- 操作 ----------
+
+    def _op_hello(self, session, message):
+        name = str(message.get('name') or '').strip()[:32]
+        if name:
+            session.name = name
+        return {'session': session.session_id, 'name': session.name}
+
+    def _op_heartbeat(self, session, message):
+        return {}
+
+    def _op_create(self, session, message):
+        endpoint = message.get('endpoint') or {}
+        if not isinstance(endpoint, dict) or not endpoint.get('address'):
+            raise LobbyError('缺少房间入口地址')
+        salt = verifier = None
+        if message.get('verifier'):
+            try:
+                salt = bytes.fromhex(message['salt'])
+                verifier = bytes.fromhex(message['verifier'])
+            except (KeyError, TypeError, ValueError):
+                raise LobbyError('密码参数错误')
+        room = Room(
+            self._new_room_id(),
+            str(message.get('name') or f'{session.name} 的房间')[:64],
+            session,
+            {'type': str(endpoint.get('type', ENDPOINT_DIRECT)), 'address': str(endpoint['address'])},
+            max(1, min(int(message.get('max_members') or 8), 100)),
+            salt, verifier,
+        )
+        self.rooms[room.room_id] = room
+        self._add_member(room, session)
+        logger.info(f"创建房间 {room.room_id} ({room.name})")
+        return {'room': room.room_id}
+
+    def _op_info(self, session, message):
+        return self._get_room(message).summary()
+
+    def _op_join(self, session, message):
+        room = self._get_room(message)
+        if session not in room.members:
+            if room.protected:
+                expected = join_proof(room.verifier, session.nonce, room.room_id)
+                if not hmac.compare_digest(str(message.get('proof', '')), expected):
+                    raise LobbyError('房间密码错误')
+            if len(room.members) >= room.max_members:
+                raise LobbyError('房间已满')
+            self._add_member(room, session)
+        return {**room.summary(), 'endpoint': room.endpoint, 'member_names': list(room.members.values())}
+
+    def _op_leave(self, session, message):
+        self._remove_member(self._get_room(message), session)
+        return {}
+
+    def _op_list(self, session, message):
+        offset = max(0, int(message.get('offset') or 0))
+        limit = max(1, min(int(message.get('limit') or 50), MAX_LIST))
+        rooms = itertools.islice(self.rooms.values(), offset, offset + limit)
+        return {'total': len(self.rooms), 'rooms': [room.summary() for room in rooms]}
+
+    def _op_update(self, session, message):
+        room = self._get_room(message)
+        if room.owner is not session:
+            raise LobbyError('只有房主可以修改房间')
+        endpoint = message.get('endpoint')
+        if isinstance(endpoint, dict) and endpoint.get('address'):
+            room.endpoint = {'type': str(endpoint.get('type', ENDPOINT_DIRECT)), 'address': str(endpoint['address'])}
+            data = _encode({'op': 'endpoint', 'room': room.room_id, 'endpoint': room.endpoint})
+            for member in list(room.members):
+                if member is not session:
+                    self._write(member, data)
+        return {}
+
+    def _op_close(self, session, message):
+        room = self._get_room(message)
+        if room.owner is not session:
+            raise LobbyError('只有房主可以关闭房间')
+        session.rooms.discard(room.room_id)
+        self._close_room(room, '房主关闭了房间')
+        return {}
+
+
+# ---------- 客户端 ----------
+
+class JoinResult:
+    """加入房间的结果"""
+
+    def __init__(self, data):
+        self.room_id = data['room']
+        self.name = data.get('name', '')
+        self.endpoint = data.get('endpoint') or {}
+        self.members = data.get('member_names', [])
+
+    @property
+    def server_address(self):
+        """可直接传给 MinecraftLibLauncher.set_options(server=...) 的 host:port"""
+        return self.endpoint.get('address')
+
+    def __repr__(self):
+        return f'<JoinResult {self.room_id} -> {self.endpoint}>'
+
+
+class LobbyClient:
+    """
+    房间服务客户端
+
+    连接后自动发送心跳；服务端推送的事件（presence / room_closed / endpoint）交给 on_event 回调。
+    """
+
+    def __init__(self, host, port=DEFAULT_LOBBY_PORT, name='', on_event: Callable[[dict], None] = None):
+        self.host = host
+        self.port = port
+        self.name = name
+        self.on_event = on_event
+        self.nonce = b''
+        self._reader = None
+        self._writer = None
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._tasks = []
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port, limit=MAX_LINE)
+        welcome = json.loads(await self._reader.readline() or b'{}')
+        if welcome.get('op') != 'welcome' or welcome.get('version') != PROTOCOL_VERSION:
+            self._writer.close()
+            raise LobbyError('房间服务版本不兼容')
+        self.nonce = bytes.fromhex(welcome['nonce'])
+        interval = welcome.get('heartbeat', HEARTBEAT_INTERVAL)
+        self._tasks = [asyncio.ensure_future(self._read_loop()),
+                       asyncio.ensure_future(self._heartbeat_loop(interval))]
+        if self.name:
+            await self.request('hello', name=self.name)
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionResetError('连接已关闭'))
+        self._pending.clear()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _read_loop(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                future = self._pending.pop(message.get('id'), None) if message.get('id') is not None else None
+                if future is not None:
+                    if not future.done():
+                        future.set_result(message)
+                elif 'op' in message and self.on_event:
+                    try:
+                        self.on_event(message)
+                    except Exception as e:
+                        logger.error(f"房间事件回调出错: {e}")
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionResetError('与房间服务的连接已断开'))
+            self._pending.clear()
+
+    async def _heartbeat_loop(self, interval):
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                await self.request('heartbeat')
+        except (ConnectionError, LobbyError):
+            pass
+
+    async def request(self, op, **params) -> dict:
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._writer.write(_encode({'op': op, 'id': request_id, **params}))
+        await self._writer.drain()
+        response = await future
+        if not response.get('ok'):
+            raise LobbyError(response.get('error', '请求失败'))
+        return response
+
+    async def create_room(self, name, endpoint_address, endpoint_type=ENDPOINT_TUNNEL,
+                          password=None, max_members=8) -> str:
+        """创建房间，返回房间号；设置密码时只发送派生后的校验值"""
+        params = {
+            'name': name, 'max_members': max_members,
+            'endpoint': {'type': endpoint_type, 'address': endpoint_address},
+        }
+        if password:
+            salt = secrets.token_bytes(SALT_SIZE)
+            key = await asyncio.get_running_loop().run_in_executor(None, derive_key, password, salt)
+            params.update(salt=salt.hex(), verifier=key.hex())
+        return (await self.request('create', **params))['room']
+
+    async def join_room(self, room_id, password=None) -> JoinResult:
+        room_id = room_id.strip().upper()
+        info = await self.request('info', room=room_id)
+        params = {'room': room_id}
+        if info.get('protected'):
+            if not password:
+                raise LobbyError('该房间需要密码')
+            key = await asyncio.get_running_loop().run_in_executor(
+                None, derive_key, password, bytes.fromhex(info['salt'])
+            )
+            params['proof'] = join_proof(key, self.nonce, room_id)
+        return JoinResult(await self.request('join', **params))
+
+    async def leave_room(self, room_id):
+        await self.request('leave', room=room_id)
+
+    async def list_rooms(self, offset=0, limit=50) -> dict:
+        return await self.request('list', offset=offset, limit=limit)
+
+    async def update_endpoint(self, room_id, endpoint_address, endpoint_type=ENDPOINT_TUNNEL):
+        await self.request('update', room=room_id, endpoint={'type': endpoint_type, 'address': endpoint_address})
+
+
+def main(argv=None):
+    """命令行运行房间服务：python -m core.multiplayer.lobby --port 7100"""
+    parser = argparse.ArgumentParser(description='BuggCraft 房间服务')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=DEFAULT_LOBBY_PORT)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    try:
+        asyncio.run(LobbyServer(args.host, args.port).serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
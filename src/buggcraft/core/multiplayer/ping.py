@@ -0,0 +1,360 @@
+# 服务器列表 Ping（Server List Ping）
+
+import re
+import json
+import time
+import struct
+import asyncio
+from typing import Callable, Iterable, List, Optional, Tuple
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_PORT = 25565
+# 握手中使用的协议号，-1 表示由服务器返回自身版本
+DEFAULT_PROTOCOL = -1
+# 同时打开的套接字上限
+DEFAULT_MAX_SOCKETS = 64
+# 单个服务器的超时（秒，包含连接、握手与 ping）
+DEFAULT_TIMEOUT = 5.0
+# 状态响应的最大长度（含 favicon），防止恶意服务器耗尽内存
+MAX_PACKET_LENGTH = 2 * 1024 * 1024
+
+_FORMATTING_CODES = re.compile('§.')
+
+
+def split_address(address) -> Tuple[str, Optional[int]]:
+    """拆分 host[:port]（支持 [IPv6]:port），未指定端口时端口为 None"""
+    address = address.strip()
+    if address.startswith('['):
+        host, _, rest = address[1:].partition(']')
+        port = rest[1:] if rest.startswith(':') else ''
+    elif address.count(':') == 1:
+        host, port = address.split(':')
+    else:
+        host, port = address, ''
+    return host, int(port) if port.isdigit() else None
+
+
+def parse_address(address, default_port=DEFAULT_PORT) -> Tuple[str, int]:
+    """解析 host[:port]，未指定端口时使用默认端口"""
+    host, port = split_address(address)
+    return host, default_port if port is None else port
+
+
+def strip_formatting(text):
+    """去除 § 格式代码"""
+    return _FORMATTING_CODES.sub('', text or '')
+
+
+def flatten_chat(component):
+    """将聊天组件（字符串或 {'text', 'extra'} 结构）展开为纯文本"""
+    if component is None:
+        return ''
+    if isinstance(component, str):
+        return strip_formatting(component)
+    if isinstance(component, list):
+        return ''.join(flatten_chat(part) for part in component)
+    if isinstance(component, dict):
+        text = flatten_chat(component.get('text', ''))
+        text += flatten_chat(component.get('translate', '')) if not text else ''
+        return text + ''.join(flatten_chat(part) for part in component.get('extra', []))
+    return str(component)
+
+
+class ServerStatus:
+    """单个服务器的状态"""
+
+    def __init__(self, address, host=None, port=None):
+        self.address = address
+        self.host = host
+        self.port = port
+        self.online = False
+        self.latency = None          # 毫秒
+        self.motd = ''
+        self.players_online = 0
+        self.players_max = 0
+        self.version_name = ''
+        self.protocol = None
+        self.favicon = None          # data:image/png;base64,...
+        self.legacy = False          # 是否通过旧版协议获取
+        self.error = None
+        self.timestamp = time.time()
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, data):
+        status = cls(data.get('address'))
+        status.__dict__.update(data)
+        return status
+
+    def __repr__(self):
+        if not self.online:
+            return f"<ServerStatus {self.address} offline: {self.error}>"
+        return (f"<ServerStatus {self.address} {self.players_online}/{self.players_max} "
+                f"{self.latency}ms {self.version_name}>")
+
+
+# ---------- 数据包编码 ----------
+
+def encode_varint(value):
+    value &= 0xFFFFFFFF
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def encode_string(text):
+    data = text.encode('utf-8')
+    return encode_varint(len(data)) + data
+
+
+def make_packet(packet_id, payload=b''):
+    body = encode_varint(packet_id) + payload
+    return encode_varint(len(body)) + body
+
+
+async def read_varint(reader):
+    value = 0
+    for shift in range(0, 35, 7):
+        byte = (await reader.readexactly(1))[0]
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            if value & 0x80000000:
+                value -= 1 << 32
+            return value
+    raise ValueError("VarInt 过长")
+
+
+def decode_varint(data, offset=0):
+    """从字节串中解码 VarInt，返回 (值, 新偏移)"""
+    value = 0
+    for shift in range(0, 35, 7):
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+    raise ValueError("VarInt 过长")
+
+
+async def read_packet(reader):
+    """读取一个数据包，返回 (packet_id, payload)"""
+    length = await read_varint(reader)
+    if length <= 0 or length > MAX_PACKET_LENGTH:
+        raise ValueError(f"无效的数据包长度: {length}")
+    data = await reader.readexactly(length)
+    packet_id, offset = decode_varint(data)
+    return packet_id, data[offset:]
+
+
+# ---------- 协议 ----------
+
+async def _ping_modern(host, port, protocol, status, started, server_host):
+    """1.7+ 协议: 握手 -> 状态请求 -> 状态响应 -> ping/pong"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        # 握手中的主机名用于服务器的虚拟主机路由，应为域名而不是解析后的 IP
+        handshake = (encode_varint(protocol) + encode_string(server_host)
+                     + struct.pack('>H', port) + encode_varint(1))
+        writer.write(make_packet(0x00, handshake) + make_packet(0x00))
+        await writer.drain()
+
+        packet_id, payload = await read_packet(reader)
+        if packet_id != 0x00:
+            raise ValueError(f"意外的数据包: {packet_id}")
+        length, offset = decode_varint(payload)
+        data = json.loads(payload[offset:offset + length].decode('utf-8'))
+
+        status.motd = flatten_chat(data.get('description'))
+        players = data.get('players') or {}
+        status.players_online = players.get('online', 0)
+        status.players_max = players.get('max', 0)
+        version = data.get('version') or {}
+        status.version_name = strip_formatting(version.get('name', ''))
+        status.protocol = version.get('protocol')
+        status.favicon = data.get('favicon')
+
+        token = int(time.time() * 1000) & 0x7FFFFFFFFFFFFFFF
+        sent = time.perf_counter()
+        writer.write(make_packet(0x01, struct.pack('>q', token)))
+        await writer.drain()
+        try:
+            packet_id, payload = await read_packet(reader)
+            status.latency = round((time.perf_counter() - sent) * 1000)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            # 部分服务器在状态响应后直接断开，不回应 ping；此时以状态往返作为延迟
+            status.latency = round((time.perf_counter() - started) * 1000)
+        status.online = True
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+
+
+async def _ping_legacy(host, port, status):
+    """1.4–1.6 旧版协议: 0xFE 0x01 + MC|PingHost，服务器回复 0xFF 踢出包"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        channel = 'MC|PingHost'.encode('utf-16-be')
+        host_data = host.encode('utf-16-be')
+        plugin_data = struct.pack('>BH', 74, len(host)) + host_data + struct.pack('>I', port)
+        packet = (b'\xfe\x01\xfa' + struct.pack('>H', len('MC|PingHost')) + channel
+                  + struct.pack('>H', len(plugin_data)) + plugin_data)
+        sent = time.perf_counter()
+        writer.write(packet)
+        await writer.drain()
+
+        head = await reader.readexactly(3)
+        status.latency = round((time.perf_counter() - sent) * 1000)
+        if head[0] != 0xFF:
+            raise ValueError("无效的旧版响应")
+        length, = struct.unpack('>H', head[1:])
+        text = (await reader.readexactly(length * 2)).decode('utf-16-be')
+
+        if text.startswith('§1\x00'):
+            # 1.4+: §1 \0 协议 \0 版本 \0 MOTD \0 在线 \0 上限
+            _, protocol, version, motd, online, maximum = text.split('\x00')[:6]
+            status.protocol = int(protocol) if protocol.isdigit() else None
+            status.version_name = version
+        else:
+            # Beta 1.8–1.3: MOTD § 在线 § 上限
+            motd, online, maximum = text.rsplit('§', 2)
+        status.motd = strip_formatting(motd)
+        status.players_online = int(online) if online.isdigit() else 0
+        status.players_max = int(maximum) if maximum.isdigit() else 0
+        status.legacy = True
+        status.online = True
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+
+
+async def ping(address, timeout=DEFAULT_TIMEOUT, protocol=DEFAULT_PROTOCOL,
+               endpoint: Optional[Tuple[str, int]] = None, server_host=None) -> ServerStatus:
+    """
+    获取单个服务器的状态（先尝试新版协议，失败后回退到旧版协议）
+
+    :param address: 服务器地址 host[:port]
+    :param timeout: 总超时（秒）
+    :param protocol: 握手使用的协议号
+    :param endpoint: 已解析的连接地址 (IP, port)，为 None 时由 address 解析
+    :param server_host: 握手中发送的主机名（SRV 目标），为 None 时使用 address 中的主机名
+    :return: ServerStatus，不会抛出异常，失败信息记录在 error 中
+    """
+    host, port = endpoint or parse_address(address)
+    server_host = server_host or parse_address(address)[0]
+    status = ServerStatus(address, host, port)
+    started = time.perf_counter()
+
+    try:
+        await asyncio.wait_for(_ping_modern(host, port, protocol, status, started, server_host), timeout)
+    except asyncio.CancelledError:
+        raise
+    except (asyncio.TimeoutError, OSError) as e:
+        if isinstance(e, ConnectionResetError):
+            # 旧版服务器收到新版握手后会直接断开连接
+            await _try_legacy(host, port, status, started + timeout)
+        else:
+            # 超时、连接被拒绝或无法解析：服务器不可达，无需再尝试旧版协议
+            status.error = "连接超时" if isinstance(e, asyncio.TimeoutError) else str(e) or type(e).__name__
+    except Exception:
+        # 连接成功但响应无法解析，可能是旧版服务器
+        await _try_legacy(host, port, status, started + timeout)
+
+    status.timestamp = time.time()
+    return status
+
+
+async def _try_legacy(host, port, status, deadline):
+    remaining = deadline - time.perf_counter()
+    if remaining <= 0:
+        status.error = "超时"
+        return
+    try:
+        await asyncio.wait_for(_ping_legacy(host, port, status), remaining)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        status.error = str(e) or type(e).__name__
+
+
+class ServerPinger:
+    """
+    并发 ping 大量服务器
+
+    所有连接共享一个信号量限制同时打开的套接字数量，每个服务器有独立的超时；
+    结果按完成顺序通过回调逐个返回，而不是等待最慢的服务器。
+    """
+
+    def __init__(self, max_sockets=DEFAULT_MAX_SOCKETS, timeout=DEFAULT_TIMEOUT,
+                 protocol=DEFAULT_PROTOCOL, resolver=None):
+        """
+        :param max_sockets: 同时打开的套接字上限
+        :param timeout: 单个服务器的超时（秒）
+        :param protocol: 握手使用的协议号
+        :param resolver: 可选的异步解析函数 resolver(address)，返回带 endpoint 与 host 属性的对象
+                         （如 dns.Resolver.resolve_server）
+        """
+        self.max_sockets = max_sockets
+        self.timeout = timeout
+        self.protocol = protocol
+        self.resolver = resolver
+        self._semaphore = None
+
+    async def ping_one(self, address) -> ServerStatus:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_sockets)
+        endpoint = server_host = None
+        if self.resolver is not None:
+            try:
+                resolved = await self.resolver(address)
+                endpoint, server_host = resolved.endpoint, resolved.host
+            except Exception as e:
+                status = ServerStatus(address)
+                status.error = f"解析失败: {e}"
+                return status
+        async with self._semaphore:
+            return await ping(address, self.timeout, self.protocol, endpoint, server_host)
+
+    async def ping_many(self, addresses: Iterable[str],
+                        on_result: Optional[Callable[[ServerStatus], None]] = None) -> List[ServerStatus]:
+        """
+        并发 ping 多个服务器
+
+        :param addresses: 服务器地址列表（重复地址只 ping 一次）
+        :param on_result: 每个服务器完成时调用 on_result(status)
+        :return: 全部结果（按完成顺序）
+        """
+        self._semaphore = asyncio.Semaphore(self.max_sockets)
+        tasks = [asyncio.ensure_future(self.ping_one(address)) for address in dict.fromkeys(addresses)]
+        results = []
+        try:
+            for future in asyncio.as_completed(tasks):
+                status = await future
+                results.append(status)
+                if on_result is not None:
+                    on_result(status)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return results
+
+
+def ping_sync(address, timeout=DEFAULT_TIMEOUT) -> ServerStatus:
+    """同步接口：在新的事件循环中 ping 单个服务器"""
+    return asyncio.run(ping(address, timeout))
@@ -0,0 +1,271 @@
+# 线路质量探测：延迟历史、抖动与丢包
+
+import math
+import time
+import asyncio
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional
+
+from core.multiplayer.ping import ping, parse_address
+from core.multiplayer.dns import get_resolver
+from core.multiplayer.tunnel import DEFAULT_RELAY_PORT
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# 每个目标保留的样本数
+HISTORY_SIZE = 120
+# 探测间隔与单次探测的超时（秒）
+PROBE_INTERVAL = 15.0
+PROBE_TIMEOUT = 3.0
+# 同时进行的探测上限
+MAX_CONCURRENT = 16
+# 参与选择线路所需的最少成功样本数
+MIN_SAMPLES = 3
+# 线路评分：中位延迟 + 抖动与尾延迟的加权，丢包按比例加罚（毫秒）
+JITTER_WEIGHT = 2.0
+TAIL_WEIGHT = 0.5
+LOSS_PENALTY = 1000.0
+
+TARGET_SERVER = 'server'
+TARGET_RELAY = 'relay'
+
+_NAN = float('nan')
+
+
+class LatencyRing:
+    """
+    固定长度的延迟环形数组（毫秒）
+
+    丢失的样本记为 NaN，占用与成功样本相同的位置，从而可以同时统计丢包率。
+    """
+    __slots__ = ('_values', '_next', '_count')
+
+    def __init__(self, size=HISTORY_SIZE):
+        self._values = array('d', [_NAN]) * size
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def size(self):
+        return len(self._values)
+
+    def add(self, value: Optional[float]):
+        """记录一个样本，None 表示丢失"""
+        self._values[self._next] = _NAN if value is None else float(value)
+        self._next = (self._next + 1) % len(self._values)
+        self._count = min(self._count + 1, len(self._values))
+
+    def values(self) -> List[Optional[float]]:
+        """按时间顺序返回全部样本（丢失为 None）"""
+        if self._count < len(self._values):
+            raw = self._values[:self._count]
+        else:
+            raw = self._values[self._next:] + self._values[:self._next]
+        return [None if math.isnan(value) else value for value in raw]
+
+    def samples(self) -> List[float]:
+        """成功的样本（按时间顺序）"""
+        return [value for value in self.values() if value is not None]
+
+    @property
+    def last(self) -> Optional[float]:
+        if not self._count:
+            return None
+        value = self._values[self._next - 1]
+        return None if math.isnan(value) else value
+
+    def loss(self) -> float:
+        """丢包率（0~1）"""
+        if not self._count:
+            return 0.0
+        return 1.0 - len(self.samples()) / self._count
+
+    @staticmethod
+    def percentile(ordered: List[float], p) -> Optional[float]:
+        """已排序数据的百分位数（线性插值）"""
+        if not ordered:
+            return None
+        position = (len(ordered) - 1) * p / 100
+        low = int(position)
+        high = min(low + 1, len(ordered) - 1)
+        return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+    @staticmethod
+    def jitter(samples: List[float]) -> Optional[float]:
+        """相邻成功样本之差的平均绝对值"""
+        if len(samples) < 2:
+            return None
+        return sum(abs(b - a) for a, b in zip(samples, samples[1:])) / (len(samples) - 1)
+
+    def summary(self) -> dict:
+        """统计摘要（附带时间顺序的历史，供绘制迷你折线图）"""
+        history = self.values()
+        samples = [value for value in history if value is not None]
+        ordered = sorted(samples)
+        return {
+            'count': self._count,
+            'samples': len(samples),
+            'loss': 1.0 - len(samples) / self._count if self._count else 0.0,
+            'last': self.last,
+            'min': ordered[0] if ordered else None,
+            'max': ordered[-1] if ordered else None,
+            'p50': self.percentile(ordered, 50),
+            'p90': self.percentile(ordered, 90),
+            'p99': self.percentile(ordered, 99),
+            'jitter': self.jitter(samples),
+            'history': history,
+        }
+
+
+def route_score(summary) -> Optional[float]:
+    """线路评分（越低越好），样本不足时返回 None"""
+    if not summary or summary.get('samples', 0) < MIN_SAMPLES or summary.get('p50') is None:
+        return None
+    return (summary['p50']
+            + JITTER_WEIGHT * (summary.get('jitter') or 0.0)
+            + TAIL_WEIGHT * ((summary.get('p90') or summary['p50']) - summary['p50'])
+            + LOSS_PENALTY * summary.get('loss', 0.0))
+
+
+def best_route(summaries: Dict[str, dict]) -> Optional[str]:
+    """从 地址 -> 摘要 中选出评分最低的地址，都没有足够样本时返回 None"""
+    scored = [(score, address) for address, score in
+              ((address, route_score(summary)) for address, summary in summaries.items())
+              if score is not None]
+    return min(scored)[1] if scored else None
+
+
+async def tcp_connect_time(host, port, timeout=PROBE_TIMEOUT) -> Optional[float]:
+    """TCP 建立连接所用的时间（毫秒），失败时返回 None"""
+    started = time.perf_counter()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except asyncio.CancelledError:
+        raise
+    except (OSError, asyncio.TimeoutError):
+        return None
+    elapsed = (time.perf_counter() - started) * 1000
+    writer.close()
+    return elapsed
+
+
+class ProbeTarget:
+    """一个探测目标：TCP 连接时间与（服务器的）SLP 往返时间各一个环形数组"""
+    __slots__ = ('address', 'kind', 'connect', 'latency')
+
+    def __init__(self, address, kind, size=HISTORY_SIZE):
+        self.address = address
+        self.kind = kind
+        self.connect = LatencyRing(size)
+        self.latency = LatencyRing(size) if kind == TARGET_SERVER else self.connect
+
+    def summary(self) -> dict:
+        """以 SLP 往返（中继为连接时间）为主的摘要，另附连接时间的摘要"""
+        summary = self.latency.summary()
+        summary.update(address=self.address, kind=self.kind)
+        if self.latency is not self.connect:
+            connect = self.connect.summary()
+            connect.pop('history')
+            summary['connect'] = connect
+        return summary
+
+
+class RouteProber:
+    """
+    定期探测收藏的服务器与中继
+
+    服务器同时采样 TCP 连接时间与 SLP ping 往返，中继只采样 TCP 连接时间；
+    每个目标的样本写入固定长度的环形数组，每轮探测后通过 on_sample 回调给出统计摘要。
+    """
+
+    def __init__(self, on_sample: Callable[[str, dict], None] = None, interval=PROBE_INTERVAL,
+                 timeout=PROBE_TIMEOUT, size=HISTORY_SIZE, max_concurrent=MAX_CONCURRENT):
+        self.on_sample = on_sample
+        self.interval = interval
+        self.timeout = timeout
+        self.size = size
+        self.max_concurrent = max_concurrent
+        self.targets: Dict[str, ProbeTarget] = {}
+        self._stopped = None
+        self._stop_requested = False
+        self._wakeup = None
+
+    def set_targets(self, servers: Iterable[str] = (), relays: Iterable[str] = ()):
+        """更新探测目标，保留仍在列表中的目标的历史"""
+        wanted = {address: TARGET_SERVER for address in servers}
+        wanted.update((address, TARGET_RELAY) for address in relays)
+        targets = {}
+        for address, kind in wanted.items():
+            target = self.targets.get(address)
+            targets[address] = target if target is not None and target.kind == kind \
+                else ProbeTarget(address, kind, self.size)
+        self.targets = targets
+        if self._wakeup is not None:
+            # 新目标不必等到下一轮
+            self._wakeup.set()
+
+    def summaries(self, kind=None) -> Dict[str, dict]:
+        return {address: target.summary() for address, target in self.targets.items()
+                if kind is None or target.kind == kind}
+
+    def best_relay(self) -> Optional[str]:
+        return best_route(self.summaries(TARGET_RELAY))
+
+    async def _probe_server(self, target):
+        try:
+            resolved = await get_resolver().resolve_server(target.address)
+            host, port = resolved.endpoint
+        except Exception:
+            target.connect.add(None)
+            target.latency.add(None)
+            return
+        target.connect.add(await tcp_connect_time(host, port, self.timeout))
+        status = await ping(target.address, self.timeout, endpoint=(host, port), server_host=resolved.host)
+        target.latency.add(status.latency if status.online else None)
+
+    async def _probe_relay(self, target):
+        host, port = parse_address(target.address, DEFAULT_RELAY_PORT)
+        target.connect.add(await tcp_connect_time(host, port, self.timeout))
+
+    async def probe_once(self):
+        """对全部目标探测一次"""
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        async def probe(target):
+            async with semaphore:
+                if target.kind == TARGET_SERVER:
+                    await self._probe_server(target)
+                else:
+                    await self._probe_relay(target)
+            if self.on_sample and self.targets.get(target.address) is target:
+                try:
+                    self.on_sample(target.address, target.summary())
+                except Exception as e:
+                    logger.error(f"探测结果回调出错: {e}")
+
+        await asyncio.gather(*(probe(target) for target in list(self.targets.values())))
+
+    async def run(self):
+        """按间隔持续探测，直到 stop() 被调用"""
+        self._stopped = asyncio.Event()
+        self._wakeup = asyncio.Event()
+        while not self._stop_requested:
+            self._wakeup.clear()
+            await self.probe_once()
+            sleep = asyncio.ensure_future(asyncio.wait_for(self._wakeup.wait(), self.interval))
+            stopped = asyncio.ensure_future(self._stopped.wait())
+            await asyncio.wait([sleep, stopped], return_when=asyncio.FIRST_COMPLETED)
+            for task in (sleep, stopped):
+                task.cancel()
+            await asyncio.gather(sleep, stopped, return_exceptions=True)
+
+    def stop(self):
+        """停止探测（需在事件循环线程中调用，或通过 call_soon_threadsafe）"""
+        self._stop_requested = True
+        if self._stopped is not None:
+            self._stopped.set()
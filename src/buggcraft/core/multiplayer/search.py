@@ -0,0 +1,461 @@
+# 服务器搜索索引
+
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Set
+
+from core.multiplayer.ping import strip_formatting
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# 参与索引的字段及其权重（名称最重要，MOTD 与描述最低）
+FIELD_WEIGHTS = {
+    'name': 10.0,
+    'address': 6.0,
+    'tags': 5.0,
+    'motd': 2.0,
+    'description': 2.0,
+}
+# 长文本字段：不参与字段前缀与完整匹配
+LONG_FIELDS = ('motd', 'description')
+# 匹配层级的得分倍数：完全匹配 > 字段前缀 > 词前缀 > 子串
+_EXACT, _VALUE_PREFIX, _WORD_PREFIX, _SUBSTRING = 4.0, 3.0, 2.0, 1.0
+# 子串索引的宽度（短字段 / 长文本字段）：词的每个位置只建立一个键 word[i:i + 宽度]，
+# 不超过宽度的查询词按前缀查找这些键，更长的查询词取 gram 的交集后逐个确认。
+# 短字段与长文本中的 ASCII 词在不同服务器间大量重复，n-gram 建在词表上；
+# 长文本中含非 ASCII 字符的词（如中文）几乎各不相同，n-gram 直接指向文档
+GRAM_WIDTH = 3
+LONG_GRAM_WIDTH = 2
+# 模糊匹配时，查询词的 bigram 至少有该比例出现在同一字段中
+FUZZY_THRESHOLD = 0.6
+# 参与模糊匹配的字段（长文本字段几乎总能凑齐 bigram，只会带来噪声）
+FUZZY_FIELDS = ('name', 'address', 'tags')
+
+_SPLIT = re.compile(r'[\s\-_.:/,|]+')
+
+
+def normalize(text) -> str:
+    """规范化：去除格式代码、全角转半角、转小写"""
+    return unicodedata.normalize('NFKC', strip_formatting(str(text or ''))).lower().strip()
+
+
+def tokenize(text) -> List[str]:
+    return [token for token in _SPLIT.split(normalize(text)) if token]
+
+
+def grams(text, size) -> Set[str]:
+    """文本的 n-gram 集合（长度不足时为文本本身）"""
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+@lru_cache(maxsize=65536)
+def _token_grams(token, width) -> frozenset:
+    """词在每个位置开始、至多 width 个字符的片段（词的任何不超过 width 的子串都是其中某个片段的前缀）"""
+    return frozenset(token[i:i + width] for i in range(len(token)))
+
+
+def _prefix_only(term) -> bool:
+    """单个字母几乎出现在所有条目中，只按短字段的前缀匹配"""
+    return len(term) == 1 and term.isascii()
+
+
+class _Document:
+    __slots__ = ('doc_id', 'fields', 'heads', 'words', 'grams')
+
+    def __init__(self, doc_id, fields):
+        self.doc_id = doc_id
+        self.fields = fields
+        # 短字段开头的词（字段以查询词开头，当且仅当开头的词以查询词开头）、每个字段中不重复的词，
+        # 以及长文本字段中含非 ASCII 字符的词的 n-gram
+        self.heads = {}
+        self.words = {}
+        self.grams = {}
+        for name, value in fields.items():
+            words = {token for token in _SPLIT.split(value) if token}
+            self.words[name] = words
+            if name in LONG_FIELDS:
+                self.grams[name] = set().union(*(_token_grams(word, LONG_GRAM_WIDTH)
+                                                 for word in words if not word.isascii()))
+            else:
+                head = _SPLIT.split(value, 1)[0]
+                self.heads[name] = (head,) if head else ()
+
+
+def _between(keys, prefix):
+    """有序列表中以 prefix 开头的部分"""
+    return keys[bisect_left(keys, prefix):bisect_left(keys, prefix + '\U0010ffff')]
+
+
+class _Postings:
+    """
+    一个字段的倒排表：键到文档 ID 集合
+
+    另外维护键的有序列表以便按前缀查找；width 不为 0 时，为词表中的词建立 n-gram 到词的索引，用于子串匹配
+    （ascii_only 时只为纯 ASCII 的词建立）。有序列表在 prepare() 中一次排好，之后随增删插入或移除。
+    """
+    __slots__ = ('table', 'width', 'ascii_only', 'grams', '_sorted', '_sorted_grams')
+
+    def __init__(self, width=0, ascii_only=False):
+        self.table: Dict[str, Set[object]] = {}
+        self.width = width
+        self.ascii_only = ascii_only
+        self.grams: Dict[str, Set[str]] = {}
+        self._sorted = None
+        self._sorted_grams = None
+
+    def _key_grams(self, key):
+        if not self.width or (self.ascii_only and not key.isascii()):
+            return ()
+        return _token_grams(key, self.width)
+
+    def add(self, keys, doc_id):
+        table = self.table
+        for key in keys:
+            ids = table.get(key)
+            if ids is None:
+                table[key] = {doc_id}
+                if self._sorted is not None:
+                    insort(self._sorted, key)
+                for gram in self._key_grams(key):
+                    words = self.grams.get(gram)
+                    if words is None:
+                        self.grams[gram] = {key}
+                        if self._sorted_grams is not None:
+                            insort(self._sorted_grams, gram)
+                    else:
+                        words.add(key)
+            else:
+                ids.add(doc_id)
+
+    def discard(self, keys, doc_id):
+        table = self.table
+        for key in keys:
+            ids = table.get(key)
+            if ids is not None:
+                ids.discard(doc_id)
+                if not ids:
+                    del table[key]
+                    if self._sorted is not None:
+                        del self._sorted[bisect_left(self._sorted, key)]
+                    for gram in self._key_grams(key):
+                        words = self.grams[gram]
+                        words.discard(key)
+                        if not words:
+                            del self.grams[gram]
+                            if self._sorted_grams is not None:
+                                del self._sorted_grams[bisect_left(self._sorted_grams, gram)]
+
+    def clear(self):
+        """清空（有序列表在 prepare() 之前不再维护，批量加入时不必逐个插入）"""
+        self.table.clear()
+        self.grams.clear()
+        self._sorted = None
+        self._sorted_grams = None
+
+    def prepare(self):
+        """排好键与 n-gram 的有序列表"""
+        if self._sorted is None:
+            self._sorted = sorted(self.table)
+        if self._sorted_grams is None:
+            self._sorted_grams = sorted(self.grams)
+
+    def _union(self, keys, within) -> Set[object]:
+        result = set().union(*map(self.table.__getitem__, keys))
+        return result & within if within is not None else result
+
+    def get(self, key, within=None) -> Set[object]:
+        ids = self.table.get(key, set())
+        return ids & within if within is not None else ids
+
+    def prefix(self, prefix, within=None) -> Set[object]:
+        """以 prefix 开头的所有键的文档"""
+        if self._sorted is None:
+            self.prepare()
+        return self._union(_between(self._sorted, prefix), within)
+
+    def containing(self, term, within=None) -> Set[object]:
+        """包含 term 的所有键的文档"""
+        if len(term) <= self.width:
+            if self._sorted_grams is None:
+                self.prepare()
+            keys = set().union(*map(self.grams.__getitem__, _between(self._sorted_grams, term)))
+        else:
+            keys = None
+            for gram in sorted(grams(term, self.width), key=lambda g: len(self.grams.get(g, ()))):
+                words = self.grams.get(gram)
+                if not words:
+                    return set()
+                keys = words & keys if keys is not None else words
+            # gram 全部命中只是必要条件，还需确认确实是子串
+            keys = [key for key in keys if term in key]
+        return self._union(keys, within)
+
+
+class ServerSearchIndex:
+    """
+    服务器的内存搜索索引
+
+    对名称、地址、标签、MOTD 与描述分别建立词的倒排表，短字段另外记录开头的词。
+    词前缀与字段前缀在有序的词表中二分查找，不为每个前缀单独建立键；
+    短字段的子串匹配在词表的 n-gram 索引中找出包含查询词的词，键的数量只与不同词的数量有关；
+    长文本字段中纯 ASCII 的词同样在词表上建立 n-gram，含非 ASCII 字符的词（如中文）的 n-gram 直接指向文档。
+    每个查询词的各匹配层级（完全匹配 > 字段前缀 > 词前缀 > 子串，再乘以字段权重）都只是集合运算，
+    没有子串匹配时退回模糊匹配；结果按分数、在线人数与加入顺序排序。
+    增删改只更新对应文档的倒排项；连续输入时，新查询若是上一次查询的延伸，只在上次的结果中查找。
+    索引可以在工作线程中建立（build()，词表在其中排好序），再交给 GUI 线程使用。
+    """
+
+    def __init__(self, key=id):
+        """
+        :param key: 从条目得到文档 ID 的函数，默认使用对象标识（同一个服务器字典就是同一个文档）
+        """
+        self.key = key
+        self._docs: Dict[object, _Document] = {}
+        self._items: Dict[object, dict] = {}
+        self._players: Dict[object, int] = {}
+        self._order: Dict[object, int] = {}
+        self._heads = {field: _Postings() for field in FIELD_WEIGHTS if field not in LONG_FIELDS}
+        self._words = {field: _Postings(GRAM_WIDTH, ascii_only=field in LONG_FIELDS) for field in FIELD_WEIGHTS}
+        self._grams = {field: _Postings() for field in LONG_FIELDS}
+        self._sequence = 0
+        self._version = 0
+        self._last = None  # (版本, 查询词, 结果 ID 集合)
+        self._ranking = None  # 按在线人数、加入顺序排列的全部文档 ID（人数或条目变化时重新计算）
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, item):
+        return self.key(item) in self._docs
+
+    @staticmethod
+    def _fields(server) -> Dict[str, str]:
+        tags = server.get('tags') or []
+        if isinstance(tags, str):
+            tags = [tags]
+        return {
+            'name': normalize(server.get('name')),
+            'address': normalize(server.get('address')),
+            'tags': ' '.join(normalize(tag) for tag in tags),
+            'motd': normalize(server.get('motd')),
+            'description': normalize(server.get('description')),
+        }
+
+    # ---------- 增量维护 ----------
+
+    def add(self, server):
+        """加入或更新一个服务器（可搜索的字段未变化时只更新排序用的人数）"""
+        doc_id = self.key(server)
+        self._items[doc_id] = server
+        players = server.get('players') or 0
+        if self._players.get(doc_id) != players:
+            self._players[doc_id] = players
+            self._ranking = None
+        fields = self._fields(server)
+        old = self._docs.get(doc_id)
+        if old is not None:
+            if old.fields == fields:
+                return
+            self._unindex(old)
+        else:
+            self._order[doc_id] = self._sequence
+            self._sequence += 1
+            self._ranking = None
+
+        doc = _Document(doc_id, fields)
+        self._docs[doc_id] = doc
+        for field, heads in self._heads.items():
+            heads.add(doc.heads[field], doc_id)
+        for field in fields:
+            self._words[field].add(doc.words[field], doc_id)
+        for field, postings in self._grams.items():
+            postings.add(doc.grams[field], doc_id)
+        self._version += 1
+
+    update = add
+
+    def remove(self, server):
+        doc_id = self.key(server)
+        doc = self._docs.pop(doc_id, None)
+        if doc is not None:
+            self._unindex(doc)
+            for table in (self._items, self._players, self._order):
+                table.pop(doc_id, None)
+            self._ranking = None
+            self._version += 1
+
+    def _unindex(self, doc):
+        doc_id = doc.doc_id
+        for field, heads in self._heads.items():
+            heads.discard(doc.heads[field], doc_id)
+        for field in doc.fields:
+            self._words[field].discard(doc.words[field], doc_id)
+        for field, postings in self._grams.items():
+            postings.discard(doc.grams[field], doc_id)
+
+    def rebuild(self, servers: Iterable[dict]):
+        """用新的列表重建索引"""
+        for table in (self._docs, self._items, self._players, self._order):
+            table.clear()
+        for postings in (*self._heads.values(), *self._words.values(), *self._grams.values()):
+            postings.clear()
+        self._sequence = 0
+        self._ranking = None
+        for server in servers:
+            self.add(server)
+        # 在建立索引的线程中排好词表与默认排名，GUI 线程上的第一次查询不必再排序
+        for postings in (*self._heads.values(), *self._words.values(), *self._grams.values()):
+            postings.prepare()
+        self._default_ranking()
+        self._version += 1
+
+    @classmethod
+    def build(cls, servers: Iterable[dict], key=id) -> 'ServerSearchIndex':
+        """建立新的索引（可在工作线程中调用，建好后再交给 GUI 线程）"""
+        index = cls(key)
+        index.rebuild(servers)
+        return index
+
+    def items(self) -> List[dict]:
+        """按加入顺序返回全部条目"""
+        return list(map(self._items.__getitem__, sorted(self._order, key=self._order.__getitem__)))
+
+    # ---------- 查询 ----------
+
+    def _long_substring(self, field, term, within) -> Set[object]:
+        """长文本字段中包含查询词的文档"""
+        # 纯 ASCII 的词在词表的 n-gram 索引中查找；非 ASCII 的查询词不可能出现在其中
+        result = self._words[field].containing(term, within) if term.isascii() else set()
+        postings = self._grams[field]
+        if len(term) <= LONG_GRAM_WIDTH:
+            return result | postings.prefix(term, within)
+        table = postings.table
+        candidates = within
+        for gram in sorted(grams(term, LONG_GRAM_WIDTH), key=lambda g: len(table.get(g, ()))):
+            ids = table.get(gram)
+            if not ids:
+                return result
+            candidates = ids & candidates if candidates is not None else set(ids)
+            if not candidates:
+                return result
+        # gram 全部命中只是必要条件，还需确认确实是子串
+        docs = self._docs
+        return result | {doc_id for doc_id in candidates - result if term in docs[doc_id].fields[field]}
+
+    def _term_scores(self, term, within) -> Dict[object, float]:
+        """单个查询词在各文档中的得分（取各字段、各层级中的最高分）"""
+        layers = []
+        docs = self._docs
+        prefix_only = _prefix_only(term)
+        for field, weight in FIELD_WEIGHTS.items():
+            if prefix_only and field in LONG_FIELDS:
+                # 长文本中几乎总有以某个字母开头的词，单个字母只匹配短字段
+                continue
+            words = self._words[field]
+            if not prefix_only:
+                substring = (self._long_substring(field, term, within) if field in LONG_FIELDS
+                             else words.containing(term, within))
+                layers.append((_SUBSTRING * weight, substring))
+            layers.append((_WORD_PREFIX * weight, words.prefix(term, within)))
+            heads = self._heads.get(field)
+            if heads is not None:
+                layers.append((_VALUE_PREFIX * weight, heads.prefix(term, within)))
+                layers.append((_EXACT * weight, {doc_id for doc_id in heads.get(term, within)
+                                                 if docs[doc_id].fields[field] == term}))
+
+        # 由高到低依次写入，每个文档只记录第一次（即最高）的得分
+        scores: Dict[object, float] = {}
+        for score, ids in sorted(layers, key=lambda layer: layer[0], reverse=True):
+            if ids:
+                new = ids.difference(scores) if scores else ids
+                scores.update(dict.fromkeys(new, score))
+        return scores
+
+    def _fuzzy_scores(self, term) -> Dict[object, float]:
+        """某个字段与查询词共享足够多 bigram 的文档（容忍拼写错误），分数按重合比例打折"""
+        if len(term) < 3:
+            return {}
+        term_grams = grams(term, 2)
+        need = len(term_grams) * FUZZY_THRESHOLD
+        scores: Dict[object, float] = {}
+        for field in FUZZY_FIELDS:
+            words = self._words[field]
+            counts = Counter()
+            for gram in term_grams:
+                counts.update(words.containing(gram))
+            weight = _SUBSTRING * FIELD_WEIGHTS[field] / len(term_grams)
+            for doc_id, count in counts.items():
+                if count >= need and count * weight > scores.get(doc_id, 0):
+                    scores[doc_id] = count * weight
+        return scores
+
+    def search(self, query, limit=None) -> List[dict]:
+        """
+        搜索并按相关度排序
+
+        :param query: 查询文本，多个词之间为“与”关系；为空时按加入顺序返回全部条目
+        :param limit: 最多返回的条数
+        """
+        terms = tokenize(query)
+        if not terms:
+            items = self.items()
+            return items[:limit] if limit else items
+
+        # 新查询是上一次查询的延伸时（继续输入），结果只可能是上次结果的子集。
+        # 只按前缀匹配的单个字母例外：延伸后按子串匹配，可能匹配上次没有包含的条目
+        within = None
+        if self._last is not None:
+            version, last_terms, last_ids = self._last
+            if (version == self._version and len(last_terms) <= len(terms)
+                    and all(terms[i].startswith(t) and (terms[i] == t or not _prefix_only(t))
+                            if i == len(last_terms) - 1 else terms[i] == t
+                            for i, t in enumerate(last_terms))):
+                within = last_ids
+
+        scores: Dict[object, float] = {}
+        exact = True
+        for position, term in enumerate(terms):
+            # 之后的查询词只需在已匹配前面各词的条目中查找
+            term_scores = self._term_scores(term, within if position == 0 else set(scores))
+            if not term_scores:
+                exact = False
+                term_scores = self._fuzzy_scores(term)
+            if position == 0:
+                scores = term_scores
+            else:
+                scores = {doc_id: scores[doc_id] + score
+                          for doc_id, score in term_scores.items() if doc_id in scores}
+            if not scores:
+                break
+
+        self._last = (self._version, terms, set(scores)) if exact else None
+
+        ranked = self._rank(scores)
+        if limit:
+            ranked = ranked[:limit]
+        return list(map(self._items.__getitem__, ranked))
+
+    def _rank(self, scores: Dict[object, float]) -> List[object]:
+        """按分数、在线人数、加入顺序排序"""
+        if len(scores) * 8 < len(self._docs):
+            # 结果较少时直接排序
+            order, players = self._order, self._players
+            return sorted(scores, key=lambda doc_id: (-scores[doc_id], -players[doc_id], order[doc_id]))
+        # 结果较多时从预先按人数与加入顺序排好的全部文档中筛选，再按分数稳定排序
+        ranked = [doc_id for doc_id in self._default_ranking() if doc_id in scores]
+        ranked.sort(key=scores.__getitem__, reverse=True)
+        return ranked
+
+    def _default_ranking(self) -> List[object]:
+        """按在线人数、加入顺序排列的全部文档 ID"""
+        if self._ranking is None:
+            order, players = self._order, self._players
+            self._ranking = sorted(self._docs, key=lambda doc_id: (-players[doc_id], order[doc_id]))
+        return self._ranking
@@ -0,0 +1,195 @@
+# 服务器状态缓存
+
+import os
+import json
+import time
+import base64
+import random
+import hashlib
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from core.multiplayer.ping import ServerStatus, parse_address
+from utils.file_utils import atomic_write_bytes
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# 在线服务器的缓存有效期（秒）
+DEFAULT_TTL = 120
+# 离线服务器的缓存有效期（秒），较短以便尽快发现恢复
+DEFAULT_OFFLINE_TTL = 30
+# 有效期的随机抖动比例，避免大量条目同时过期、同时刷新
+DEFAULT_JITTER = 0.2
+# 保留的延迟历史条数
+LATENCY_HISTORY = 20
+# 超过该时间未更新的条目在加载时丢弃（秒）
+MAX_AGE = 7 * 24 * 3600
+
+_FAVICON_PREFIX = 'data:image/png;base64,'
+
+
+def cache_key(address):
+    """缓存键：规范化后的 host:port，同一服务器的不同写法共用一个条目"""
+    host, port = parse_address(address)
+    return f"{host.lower().rstrip('.')}:{port}"
+
+
+class ServerStatusCache:
+    """
+    服务器状态缓存
+
+    每个条目保存 MOTD、玩家数、版本、favicon 摘要与延迟历史，以及下一次刷新的时间。
+    favicon 按摘要单独保存为 PNG 文件，多个条目可共享同一图标。
+    缓存以 JSON 持久化，启动后页面可以直接用缓存绘制，再在后台刷新过期条目。
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL, offline_ttl=DEFAULT_OFFLINE_TTL, jitter=DEFAULT_JITTER):
+        """
+        :param path: 缓存文件路径
+        :param ttl: 在线服务器的有效期（秒）
+        :param offline_ttl: 离线服务器的有效期（秒）
+        :param jitter: 有效期的随机抖动比例
+        """
+        self.path = str(path)
+        self.favicon_dir = os.path.join(os.path.dirname(self.path), 'favicons')
+        self.ttl = ttl
+        self.offline_ttl = offline_ttl
+        self.jitter = jitter
+        self._entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.load()
+
+    # ---------- 持久化 ----------
+
+    def load(self):
+        """从磁盘加载缓存，丢弃过旧的条目"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+
+        now = time.time()
+        with self._lock:
+            self._entries = {
+                key: entry for key, entry in entries.items()
+                if isinstance(entry, dict) and now - entry.get('updated_at', 0) < MAX_AGE
+            }
+            self._dirty = False
+
+    def save(self):
+        """有改动时原子地写回磁盘"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps(self._entries, ensure_ascii=False).encode('utf-8')
+            self._dirty = False
+        try:
+            atomic_write_bytes(self.path, data)
+        except OSError as e:
+            logger.warning(f"保存服务器状态缓存失败: {e}")
+
+    # ---------- 查询 ----------
+
+    def get(self, address) -> Optional[dict]:
+        """获取条目（可能已过期），不存在时返回 None"""
+        with self._lock:
+            entry = self._entries.get(cache_key(address))
+            return dict(entry) if entry else None
+
+    def is_fresh(self, address, now=None) -> bool:
+        with self._lock:
+            entry = self._entries.get(cache_key(address))
+        return bool(entry) and entry.get('expires_at', 0) > (now or time.time())
+
+    def stale(self, addresses: Iterable[str]) -> List[str]:
+        """返回缺失或已过期的地址（同一服务器只返回一次）"""
+        now = time.time()
+        result, seen = [], set()
+        for address in addresses:
+            key = cache_key(address)
+            if key in seen:
+                continue
+            seen.add(key)
+            if not self.is_fresh(address, now):
+                result.append(address)
+        return result
+
+    def next_expiry(self, addresses: Iterable[str]) -> Optional[float]:
+        """这些地址中最早过期的时间戳"""
+        with self._lock:
+            times = [self._entries[key].get('expires_at', 0)
+                     for key in map(cache_key, addresses) if key in self._entries]
+        return min(times) if times else None
+
+    def favicon_path(self, favicon_hash):
+        return os.path.join(self.favicon_dir, f'{favicon_hash}.png')
+
+    @staticmethod
+    def average_latency(entry) -> Optional[int]:
+        history = [value for value in entry.get('latency_history', []) if value is not None]
+        return round(sum(history) / len(history)) if history else None
+
+    # ---------- 更新 ----------
+
+    def _expiry(self, online):
+        ttl = self.ttl if online else self.offline_ttl
+        return time.time() + ttl * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _store_favicon(self, favicon):
+        """保存 favicon，返回其摘要"""
+        if not favicon or not favicon.startswith(_FAVICON_PREFIX):
+            return None
+        try:
+            data = base64.b64decode(favicon[len(_FAVICON_PREFIX):])
+        except ValueError:
+            return None
+        favicon_hash = hashlib.sha1(data).hexdigest()
+        path = self.favicon_path(favicon_hash)
+        if not os.path.exists(path):
+            try:
+                atomic_write_bytes(path, data)
+            except OSError as e:
+                logger.warning(f"保存服务器图标失败: {e}")
+                return None
+        return favicon_hash
+
+    def update(self, status: ServerStatus) -> dict:
+        """写入一次 ping 结果，返回更新后的条目"""
+        key = cache_key(status.address)
+        favicon_hash = self._store_favicon(status.favicon) if status.online else None
+
+        with self._lock:
+            entry = self._entries.get(key) or {'latency_history': []}
+            history = (entry.get('latency_history', []) + [status.latency if status.online else None])[-LATENCY_HISTORY:]
+            if status.online:
+                entry.update({
+                    'motd': status.motd,
+                    'players_online': status.players_online,
+                    'players_max': status.players_max,
+                    'version_name': status.version_name,
+                    'protocol': status.protocol,
+                    'favicon_hash': favicon_hash or entry.get('favicon_hash'),
+                })
+            entry.update({
+                'online': status.online,
+                'latency': status.latency if status.online else None,
+                'latency_history': history,
+                'error': status.error,
+                'updated_at': time.time(),
+                'expires_at': self._expiry(status.online),
+            })
+            self._entries[key] = entry
+            self._dirty = True
+            return dict(entry)
+
+    def invalidate(self, address=None):
+        """使条目（或全部条目）立即过期"""
+        with self._lock:
+            keys = [cache_key(address)] if address else list(self._entries)
+            for key in keys:
+                if key in self._entries:
+                    self._entries[key]['expires_at'] = 0
@@ -0,0 +1,553 @@
+# 内网穿透：通过中继服务器把本地的局域网世界开放给好友
+
+import os
+import hmac
+import json
+import time
+import socket
+import struct
+import asyncio
+import argparse
+from collections import deque
+from typing import Callable, Dict, Optional
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_RELAY_PORT = 7000
+# 协议版本，握手时不一致则拒绝
+PROTOCOL_VERSION = 1
+
+# 帧类型
+FRAME_HELLO = 1     # 客户端 -> 中继：JSON {version, token, name}
+FRAME_READY = 2     # 中继 -> 客户端：JSON {public_port}
+FRAME_OPEN = 3      # 中继 -> 客户端：有玩家连接，新建流
+FRAME_DATA = 4
+FRAME_CLOSE = 5     # 流的一个方向结束
+FRAME_WINDOW = 6    # 发送窗口额度（4 字节无符号整数）
+FRAME_PING = 7      # 8 字节时间戳，对端原样以 PONG 返回
+FRAME_PONG = 8
+FRAME_ERROR = 9     # JSON {message}
+
+# 帧头：类型(1) 流 ID(4) 负载长度(4)
+HEADER = struct.Struct('>BII')
+# 单个 DATA 帧的最大负载
+MAX_FRAME = 64 * 1024
+# 每个流的初始发送窗口：对端未确认的数据超过该值时暂停读取本地连接
+INITIAL_WINDOW = 256 * 1024
+# 控制帧负载上限
+MAX_CONTROL = 64 * 1024
+# 心跳间隔（秒），同时用于测量往返延迟
+PING_INTERVAL = 5.0
+# 吞吐量统计的时间窗口（秒）
+RATE_WINDOW = 5.0
+
+
+class TunnelError(Exception):
+    """隧道握手或协议错误"""
+
+
+# ---------- 统计 ----------
+
+class _Rate:
+    """滑动窗口内的字节速率"""
+
+    def __init__(self, window=RATE_WINDOW):
+        self.window = window
+        self._samples = deque()
+        self._sum = 0
+
+    def add(self, size, now=None):
+        now = time.monotonic() if now is None else now
+        self._samples.append((now, size))
+        self._sum += size
+        self._trim(now)
+
+    def _trim(self, now):
+        while self._samples and now - self._samples[0][0] > self.window:
+            self._sum -= self._samples.popleft()[1]
+
+    def rate(self, now=None) -> float:
+        now = time.monotonic() if now is None else now
+        self._trim(now)
+        return self._sum / self.window
+
+
+class StreamMetrics:
+    """单个连接（流）的统计"""
+
+    def __init__(self, stream_id, peer=None):
+        self.stream_id = stream_id
+        self.peer = peer
+        self.opened_at = time.time()
+        self.bytes_in = 0    # 从对端收到、写入本地连接的字节
+        self.bytes_out = 0   # 从本地连接读取、发往对端的字节
+        self.stalls = 0      # 因发送窗口耗尽而暂停的次数
+        self._rate_in = _Rate()
+        self._rate_out = _Rate()
+
+    def received(self, size):
+        self.bytes_in += size
+        self._rate_in.add(size)
+
+    def sent(self, size):
+        self.bytes_out += size
+        self._rate_out.add(size)
+
+    def snapshot(self) -> dict:
+        return {
+            'stream_id': self.stream_id,
+            'peer': self.peer,
+            'duration': time.time() - self.opened_at,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'rate_in': self._rate_in.rate(),
+            'rate_out': self._rate_out.rate(),
+            'stalls': self.stalls,
+        }
+
+
+# ---------- 多路复用 ----------
+
+class _Stream:
+    """复用连接上的一个流，对应一条本地 TCP 连接"""
+
+    def __init__(self, stream_id, sock=None, peer=None):
+        self.stream_id = stream_id
+        self.sock = sock
+        self.send_window = INITIAL_WINDOW
+        self.window_open = asyncio.Event()
+        self.window_open.set()
+        # 对端发来的数据，发送方遵守窗口，因此队列中的数据不超过 INITIAL_WINDOW
+        self.inbound = asyncio.Queue()
+        self.unacked = 0
+        self.local_eof = False
+        self.remote_eof = False
+        self.metrics = StreamMetrics(stream_id, peer)
+        self.tasks = []
+
+
+class Multiplexer:
+    """
+    在一条 TCP 连接上承载多个双向流
+
+    每个流都有基于额度的发送窗口（类似 HTTP/2）：对端把数据写入本地连接后才归还额度，
+    某个慢连接只会让自己的流暂停，不会阻塞其他流；整条连接的拥塞则通过 drain() 反压到所有读取方。
+    本地连接使用非阻塞套接字与 loop.sock_recv_into / loop.sock_sendall，读缓冲区按流复用。
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                 on_open: Callable = None, on_control: Callable = None):
+        """
+        :param on_open: 收到 OPEN 帧时的回调 (stream_id)，可以是协程函数
+        :param on_control: 收到其他控制帧时的回调 (frame_type, payload)
+        """
+        self.reader = reader
+        self.writer = writer
+        self.on_open = on_open
+        self.on_control = on_control
+        self.streams: Dict[int, _Stream] = {}
+        self.rtt = None  # 毫秒，指数平滑
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self._closed = False
+        self._tasks = set()
+
+    # ---------- 发送 ----------
+
+    async def send_frame(self, frame_type, stream_id=0, payload=b''):
+        if self._closed:
+            raise ConnectionResetError('隧道连接已关闭')
+        # 帧头与负载一次写入，负载以 memoryview 传入，避免拼接复制
+        self.writer.writelines((HEADER.pack(frame_type, stream_id, len(payload)), payload))
+        self.bytes_sent += HEADER.size + len(payload)
+        await self.writer.drain()
+
+    async def send_json(self, frame_type, data):
+        await self.send_frame(frame_type, 0, json.dumps(data).encode('utf-8'))
+
+    # ---------- 接收 ----------
+
+    async def read_frame(self):
+        header = await self.reader.readexactly(HEADER.size)
+        frame_type, stream_id, length = HEADER.unpack(header)
+        if length > max(MAX_FRAME, MAX_CONTROL):
+            raise TunnelError(f'帧过大: {length}')
+        payload = await self.reader.readexactly(length) if length else b''
+        self.bytes_received += HEADER.size + length
+        return frame_type, stream_id, payload
+
+    async def run(self):
+        """读取并分发帧，直到连接关闭"""
+        ping_task = self._spawn(self._ping_loop())
+        try:
+            while True:
+                frame_type, stream_id, payload = await self.read_frame()
+                if frame_type == FRAME_DATA:
+                    stream = self.streams.get(stream_id)
+                    if stream is not None:
+                        stream.inbound.put_nowait(payload)
+                elif frame_type == FRAME_WINDOW:
+                    stream = self.streams.get(stream_id)
+                    if stream is not None and len(payload) == 4:
+                        stream.send_window += struct.unpack('>I', payload)[0]
+                        stream.window_open.set()
+                elif frame_type == FRAME_CLOSE:
+                    stream = self.streams.get(stream_id)
+                    if stream is not None:
+                        stream.inbound.put_nowait(None)
+                elif frame_type == FRAME_OPEN:
+                    if self.on_open and stream_id not in self.streams:
+                        # 先登记流，本地连接建立之前到达的数据在队列中等待
+                        self.streams[stream_id] = _Stream(stream_id)
+                        self._spawn(self._call(self.on_open, stream_id))
+                elif frame_type == FRAME_PING:
+                    self._spawn(self.send_frame(FRAME_PONG, stream_id, payload))
+                elif frame_type == FRAME_PONG and len(payload) == 8:
+                    rtt = (time.monotonic_ns() - struct.unpack('>Q', payload)[0]) / 1e6
+                    self.rtt = rtt if self.rtt is None else self.rtt * 0.8 + rtt * 0.2
+                elif self.on_control:
+                    await self._call(self.on_control, frame_type, payload)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            ping_task.cancel()
+            self.close()
+
+    async def _ping_loop(self):
+        try:
+            while True:
+                await self.send_frame(FRAME_PING, 0, struct.pack('>Q', time.monotonic_ns()))
+                await asyncio.sleep(PING_INTERVAL)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+    @staticmethod
+    async def _call(callback, *args):
+        try:
+            result = callback(*args)
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            logger.error(f"隧道回调出错: {e}")
+
+    def _spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    # ---------- 流 ----------
+
+    def attach(self, stream_id, sock, peer=None) -> _Stream:
+        """把一条本地连接绑定到流上（流已登记时沿用）并开始双向转发"""
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        stream = self.streams.get(stream_id)
+        if stream is None:
+            stream = self.streams[stream_id] = _Stream(stream_id)
+        stream.sock = sock
+        stream.metrics.peer = peer
+        stream.tasks = [self._spawn(self._pump_out(stream)), self._spawn(self._pump_in(stream))]
+        return stream
+
+    async def reject(self, stream_id):
+        """无法建立本地连接时关闭流"""
+        self.streams.pop(stream_id, None)
+        await self.send_frame(FRAME_CLOSE, stream_id)
+
+    async def _pump_out(self, stream: _Stream):
+        """本地连接 -> 对端"""
+        loop = asyncio.get_running_loop()
+        buffer = bytearray(MAX_FRAME)
+        view = memoryview(buffer)
+        try:
+            while True:
+                if stream.send_window <= 0:
+                    stream.metrics.stalls += 1
+                    stream.window_open.clear()
+                    await stream.window_open.wait()
+                    continue
+                size = await loop.sock_recv_into(stream.sock, view[:min(stream.send_window, MAX_FRAME)])
+                if not size:
+                    break
+                stream.send_window -= size
+                # 传输层写不完的部分会自行复制，之后即可复用缓冲区
+                await self.send_frame(FRAME_DATA, stream.stream_id, view[:size])
+                stream.metrics.sent(size)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            stream.local_eof = True
+            if not self._closed:
+                try:
+                    await self.send_frame(FRAME_CLOSE, stream.stream_id)
+                except ConnectionError:
+                    pass
+            self._maybe_finish(stream)
+
+    async def _pump_in(self, stream: _Stream):
+        """对端 -> 本地连接"""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                payload = await stream.inbound.get()
+                if payload is None:
+                    break
+                await loop.sock_sendall(stream.sock, payload)
+                stream.metrics.received(len(payload))
+                # 写入本地后才归还额度，本地连接慢时对端会自然停下
+                stream.unacked += len(payload)
+                if stream.unacked >= INITIAL_WINDOW // 2:
+                    await self.send_frame(FRAME_WINDOW, stream.stream_id, struct.pack('>I', stream.unacked))
+                    stream.unacked = 0
+            try:
+                stream.sock.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+        except (ConnectionError, OSError):
+            # 本地连接已断开，停止读取
+            stream.tasks[0].cancel()
+        finally:
+            stream.remote_eof = True
+            self._maybe_finish(stream)
+
+    def _maybe_finish(self, stream: _Stream):
+        if stream.local_eof and stream.remote_eof and self.streams.get(stream.stream_id) is stream:
+            del self.streams[stream.stream_id]
+            stream.sock.close()
+
+    def close(self):
+        """关闭连接与全部流"""
+        if self._closed:
+            return
+        self._closed = True
+        loop = asyncio.get_event_loop()
+        for stream in list(self.streams.values()):
+            for task in stream.tasks:
+                task.cancel()
+            if stream.sock is not None:
+                # 等取消的读写先从事件循环中注销，再关闭套接字
+                loop.call_soon(stream.sock.close)
+        self.streams.clear()
+        for task in list(self._tasks):
+            task.cancel()
+        self.writer.close()
+
+    def metrics(self) -> dict:
+        return {
+            'rtt': self.rtt,
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'streams': [stream.metrics.snapshot() for stream in self.streams.values()],
+        }
+
+
+# ---------- 客户端 ----------
+
+class TunnelClient:
+    """
+    隧道客户端：连接中继，中继上每来一个玩家就连接一次本地世界端口
+
+    public_address 在握手成功后可用，把它发给好友即可加入。
+    """
+
+    def __init__(self, relay_host, relay_port=DEFAULT_RELAY_PORT, local_port=25565,
+                 local_host='127.0.0.1', token='', name='', on_ready: Callable = None):
+        self.relay_host = relay_host
+        self.relay_port = relay_port
+        self.local_host = local_host
+        self.local_port = local_port
+        self.token = token
+        self.name = name
+        self.on_ready = on_ready
+        self.public_address = None
+        self.mux: Optional[Multiplexer] = None
+        self._stopped = False
+
+    async def run(self):
+        """连接中继并转发，直到连接断开或 stop() 被调用"""
+        if self._stopped:
+            return
+        reader, writer = await asyncio.open_connection(self.relay_host, self.relay_port)
+        writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.mux = Multiplexer(reader, writer, on_open=self._on_open)
+        try:
+            await self.mux.send_json(FRAME_HELLO, {
+                'version': PROTOCOL_VERSION, 'token': self.token, 'name': self.name,
+            })
+            frame_type, _, payload = await self.mux.read_frame()
+            if frame_type == FRAME_ERROR:
+                raise TunnelError(json.loads(payload).get('message', '中继拒绝连接'))
+            if frame_type != FRAME_READY:
+                raise TunnelError(f'意外的握手响应: {frame_type}')
+            ready = json.loads(payload)
+            self.public_address = f"{ready.get('public_host') or self.relay_host}:{ready['public_port']}"
+            logger.info(f"隧道已建立: {self.public_address} -> {self.local_host}:{self.local_port}")
+            if self.on_ready:
+                self.on_ready(self.public_address)
+            if not self._stopped:
+                await self.mux.run()
+        finally:
+            self.mux.close()
+
+    async def _on_open(self, stream_id):
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        try:
+            await loop.sock_connect(sock, (self.local_host, self.local_port))
+        except OSError as e:
+            logger.warning(f"连接本地世界失败: {e}")
+            sock.close()
+            await self.mux.reject(stream_id)
+            return
+        self.mux.attach(stream_id, sock)
+
+    def stop(self):
+        """断开隧道（需在事件循环线程中调用）"""
+        self._stopped = True
+        if self.mux is not None:
+            self.mux.close()
+
+    def metrics(self) -> dict:
+        data = self.mux.metrics() if self.mux else {'rtt': None, 'bytes_sent': 0, 'bytes_received': 0, 'streams': []}
+        data['public_address'] = self.public_address
+        return data
+
+
+# ---------- 中继 ----------
+
+class _Tunnel:
+    """中继上的一条隧道：一个客户端连接加一个公开端口"""
+
+    def __init__(self, mux, name):
+        self.mux = mux
+        self.name = name
+        self.listener = None
+        self.accept_task = None
+        self.next_stream = 1
+
+    def close(self):
+        self.mux.close()
+        if self.accept_task is not None:
+            self.accept_task.cancel()
+        if self.listener is not None:
+            self.listener.close()
+
+
+class RelayServer:
+    """
+    参考中继服务器
+
+    客户端通过控制端口连接并握手后，中继为其打开一个公开端口；
+    玩家连接公开端口时，中继分配流 ID、发送 OPEN 并开始转发。
+    """
+
+    def __init__(self, host='0.0.0.0', port=DEFAULT_RELAY_PORT, public_host=None, token=''):
+        """
+        :param public_host: 告知客户端的公开地址，默认使用客户端连接时的地址
+        :param token: 非空时客户端必须提供相同的令牌
+        """
+        self.host = host
+        self.port = port
+        self.public_host = public_host
+        self.token = token
+        self.tunnels = []
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"中继已启动: {self.host}:{self.port}")
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        for tunnel in list(self.tunnels):
+            tunnel.close()
+        # 让各客户端的处理协程完成清理
+        await asyncio.sleep(0)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle_client(self, reader, writer):
+        mux = Multiplexer(reader, writer)
+        tunnel = None
+        try:
+            frame_type, _, payload = await asyncio.wait_for(mux.read_frame(), 10)
+            hello = json.loads(payload) if frame_type == FRAME_HELLO else {}
+            if hello.get('version') != PROTOCOL_VERSION:
+                await mux.send_json(FRAME_ERROR, {'message': '协议版本不兼容'})
+                return
+            if self.token and not hmac.compare_digest(str(hello.get('token', '')), self.token):
+                await mux.send_json(FRAME_ERROR, {'message': '令牌错误'})
+                return
+
+            tunnel = _Tunnel(mux, hello.get('name', ''))
+            tunnel.listener = self._listen()
+            tunnel.accept_task = asyncio.ensure_future(self._accept_players(tunnel))
+            public_port = tunnel.listener.getsockname()[1]
+            public_host = self.public_host or writer.get_extra_info('sockname')[0]
+            self.tunnels.append(tunnel)
+            await mux.send_json(FRAME_READY, {'public_port': public_port, 'public_host': public_host})
+            logger.info(f"隧道 {tunnel.name!r} 已开放端口 {public_port}")
+            await mux.run()
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError, TunnelError) as e:
+            logger.info(f"隧道客户端断开: {e}")
+        finally:
+            if tunnel is not None:
+                if tunnel in self.tunnels:
+                    self.tunnels.remove(tunnel)
+                tunnel.close()
+            mux.close()
+
+    def _listen(self):
+        """为隧道打开一个公开端口（由系统分配）"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, 0))
+        sock.listen(64)
+        sock.setblocking(False)
+        return sock
+
+    async def _accept_players(self, tunnel):
+        """接受玩家连接，每个连接对应一个新流"""
+        loop = asyncio.get_running_loop()
+        while True:
+            sock, peer = await loop.sock_accept(tunnel.listener)
+            stream_id = tunnel.next_stream
+            tunnel.next_stream += 1
+            try:
+                # 先绑定再发送 OPEN：OPEN 写出后客户端的数据随时可能到达
+                tunnel.mux.attach(stream_id, sock, peer=f'{peer[0]}:{peer[1]}')
+                await tunnel.mux.send_frame(FRAME_OPEN, stream_id)
+            except ConnectionError:
+                sock.close()
+                return
+
+
+def main(argv=None):
+    """命令行运行参考中继：python -m core.multiplayer.tunnel --port 7000"""
+    parser = argparse.ArgumentParser(description='BuggCraft 内网穿透中继')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=DEFAULT_RELAY_PORT)
+    parser.add_argument('--public-host', default=None)
+    parser.add_argument('--token', default=os.environ.get('BUGGCRAFT_RELAY_TOKEN', ''))
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    relay = RelayServer(args.host, args.port, args.public_host, args.token)
+    try:
+        asyncio.run(relay.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+# 多人游戏后台线程
+
+import asyncio
+import contextlib
+
+from PySide6.QtCore import QThread, Signal
+
+from core.multiplayer.ping import ServerPinger, DEFAULT_MAX_SOCKETS, DEFAULT_TIMEOUT
+from core.multiplayer.dns import get_resolver
+from core.multiplayer.lan import LanDiscovery
+from core.multiplayer.tunnel import TunnelClient
+from core.multiplayer.probe import RouteProber
+from core.multiplayer.search import ServerSearchIndex
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class ServerPingThread(QThread):
+    """在独立的事件循环中并发 ping 服务器，每得到一个结果就发出一次信号"""
+    status_ready = Signal(object)  # ServerStatus
+
+    def __init__(self, addresses, max_sockets=DEFAULT_MAX_SOCKETS, timeout=DEFAULT_TIMEOUT, parent=None):
+        super().__init__(parent)
+        self.addresses = list(addresses)
+        # 先并行解析 SRV 与 A/AAAA 记录（结果在全局解析器中按 TTL 缓存），再连接解析后的地址
+        self.pinger = ServerPinger(max_sockets, timeout, resolver=get_resolver().resolve_server)
+        self._loop = None
+        self._task = None
+
+    def run(self):
+        """线程主函数"""
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._task = self._loop.create_task(
+                self.pinger.ping_many(self.addresses, self.status_ready.emit)
+            )
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"服务器 Ping 出错: {e}")
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    def stop(self):
+        """取消尚未完成的 ping"""
+        loop, task = self._loop, self._task
+        if loop is not None and task is not None:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                # 事件循环已关闭，说明已经全部完成
+                pass
+
+
+class LanDiscoveryThread(QThread):
+    """在独立的事件循环中监听局域网世界广播，世界表变化时发出信号"""
+    worlds_changed = Signal(list)  # List[LanWorld]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.discovery = LanDiscovery(self.worlds_changed.emit)
+        self._loop = None
+
+    def run(self):
+        """线程主函数"""
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self.discovery.run())
+        except OSError as e:
+            logger.warning(f"无法启动局域网发现: {e}")
+        except Exception as e:
+            logger.error(f"局域网发现出错: {e}")
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    def stop(self):
+        """停止监听"""
+        loop = self._loop
+        if loop is None:
+            # 事件循环尚未创建，run() 启动后会立即返回
+            self.discovery.stop()
+            return
+        try:
+            loop.call_soon_threadsafe(self.discovery.stop)
+        except RuntimeError:
+            pass
+
+
+class TunnelThread(QThread):
+    """在独立的事件循环中运行内网穿透客户端，并定期发出连接统计"""
+    ready = Signal(str)            # 公开地址
+    metrics_updated = Signal(dict)
+    error = Signal(str)
+
+    # 统计的发送间隔（秒）
+    METRICS_INTERVAL = 1.0
+
+    def __init__(self, relay_host, relay_port, local_port, token='', name='', parent=None):
+        super().__init__(parent)
+        self.client = TunnelClient(relay_host, relay_port, local_port, token=token, name=name,
+                                   on_ready=self.ready.emit)
+        self._loop = None
+
+    async def _report_metrics(self):
+        while True:
+            await asyncio.sleep(self.METRICS_INTERVAL)
+            self.metrics_updated.emit(self.client.metrics())
+
+    async def _main(self):
+        reporter = asyncio.ensure_future(self._report_metrics())
+        try:
+            await self.client.run()
+        finally:
+            reporter.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await reporter
+
+    def run(self):
+        """线程主函数"""
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._main())
+        except Exception as e:
+            logger.error(f"内网穿透出错: {e}")
+            self.error.emit(str(e))
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    def stop(self):
+        """断开隧道"""
+        loop = self._loop
+        if loop is None:
+            self.client.stop()
+            return
+        try:
+            loop.call_soon_threadsafe(self.client.stop)
+        except RuntimeError:
+            pass
+
+
+class RouteProbeThread(QThread):
+    """在独立的事件循环中定期探测收藏的服务器与中继，每个目标探测完成后发出统计摘要"""
+    sample_ready = Signal(str, dict)  # 地址, 摘要
+
+    def __init__(self, servers=(), relays=(), parent=None):
+        super().__init__(parent)
+        self.prober = RouteProber(self.sample_ready.emit)
+        self.prober.set_targets(servers, relays)
+        self._loop = None
+
+    def set_targets(self, servers=(), relays=()):
+        """更新探测目标（可在任意线程调用）"""
+        servers, relays = list(servers), list(relays)
+        loop = self._loop
+        if loop is None:
+            self.prober.set_targets(servers, relays)
+            return
+        try:
+            loop.call_soon_threadsafe(self.prober.set_targets, servers, relays)
+        except RuntimeError:
+            pass
+
+    def run(self):
+        """线程主函数"""
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self.prober.run())
+        except Exception as e:
+            logger.error(f"线路探测出错: {e}")
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    def stop(self):
+        """停止探测"""
+        loop = self._loop
+        if loop is None:
+            self.prober.stop()
+            return
+        try:
+            loop.call_soon_threadsafe(self.prober.stop)
+        except RuntimeError:
+            pass
+
+
+class SearchIndexThread(QThread):
+    """在后台建立服务器搜索索引，建好后把新索引交给 GUI 线程"""
+    index_ready = Signal(object, int)  # ServerSearchIndex, 代数
+
+    def __init__(self, servers, generation=0, parent=None):
+        super().__init__(parent)
+        self.servers = list(servers)
+        self.generation = generation
+
+    def run(self):
+        """线程主函数"""
+        try:
+            index = ServerSearchIndex.build(self.servers)
+        except Exception as e:
+            logger.error(f"建立搜索索引出错: {e}")
+            return
+        self.index_ready.emit(index, self.generation)
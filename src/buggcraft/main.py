@@ -35,6 +35,15 @@ DOWNLOAD_URLS = {
     'dependencies': 'https://pan.erguanmingmin.com/file/10007988/dependencies.zip'
 }
 
+# 资源清单：记录每个文件的大小与摘要，用于增量更新
+MANIFEST_URLS = {
+    'resources': "https://pan.erguanmingmin.com/file/10007988/resources.manifest.json",
+    'dependencies': 'https://pan.erguanmingmin.com/file/10007988/dependencies.manifest.json'
+}
+
+# 同时下载的资源包数量上限
+MAX_PARALLEL_DOWNLOADS = 3
+
 NOTIFICATION_MESSAGES = {
     'resources': '下载字体等资源...',
     'dependencies': '下载运行时库...',
@@ -50,46 +59,29 @@ RESOURCE_DIR = Path.cwd() / 'resources'
 #         logger.info(f"初始化目录: {directory}")
 
 
-def download_and_extract(url, download_dir, extract_dir):
+def download_and_extract(url, extract_dir, progress=None, sha256=None):
     """
-    下载并解压资源
+    下载并解压资源（边下载边解压，不保存中间压缩包）
     :param url: 下载URL
-    :param download_dir: 下载目录
     :param extract_dir: 解压目录
+    :param progress: 可选的下载进度（utils.progress.TaskProgress）
+    :param sha256: 可选的压缩包摘要，用于校验
     :return: 成功返回True，否则False
     """
-    import zipfile
-    from utils.network import minecraft_httpx, urlparse
-    os.makedirs(download_dir, exist_ok=True)
+    from utils.network import minecraft_httpx
+    from utils.zipstream import StreamingZipExtractor
     os.makedirs(extract_dir, exist_ok=True)
 
-    try:
-        logger.info(f"开始下载: {url}")
-        data = minecraft_httpx.download(url)
-        if not data:
-            logger.error("下载失败，无数据返回")
-            return False
-
-        # 保存ZIP文件
-        zip_name = Path(urlparse(url).path).name or "resources.zip"
-        zip_path = os.path.join(download_dir, zip_name)
-        with open(zip_path, 'wb') as f:
-            f.write(data)
-        logger.info(f"文件保存至: {zip_path}")
-
-        # 解压
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(extract_dir)
-        logger.info(f"解压到: {extract_dir}")
-
-        # 清理：删除下载的ZIP文件
-        os.remove(zip_path)
-        return True
-
-    except Exception as e:
-        logger.exception(f"下载或解压过程中出错: {e}")
+    logger.info(f"开始下载: {url}")
+    extractor = StreamingZipExtractor(extract_dir, expected_sha256=sha256)
+    result = minecraft_httpx.download_stream(url, extractor.extract, progress=progress)
+    if not result:
+        logger.error(f"下载或解压失败: {url}")
         return False
 
+    logger.info(f"解压到: {extract_dir}（写入 {len(result.written)} 个文件，跳过 {len(result.skipped)} 个已一致的文件）")
+    return True
+
 
 def setup_qt_environment():
     """设置Qt运行环境"""
@@ -173,23 +165,72 @@ def send_notification(title, message, icon_path=None):
         logger.error(f"发送通知失败: {e}")
 
 
-def download_resources():
-    """下载并解压所有必要资源"""
-    download_dir = os.path.join(CACHE_DIR, 'downloads')
-    
-    for name, url in DOWNLOAD_URLS.items():
-        
+def provision_resource(provisioner, name, url, reporter):
+    """
+    下载并安装单个资源包（在线程池中执行）
+    :return: (是否成功, 是否实际下载了内容)
+    """
+    progress = reporter.task(name)
+    manifest = provisioner.fetch_manifest(MANIFEST_URLS[name])
+
+    if manifest is None:
         if os.path.exists(os.path.join(HOME_DIR, name)):
-            logger.info(f"校验资源: {os.path.join(HOME_DIR, name)}")
-            continue
+            logger.info(f"资源清单不可用，跳过校验: {os.path.join(HOME_DIR, name)}")
+            return True, False
 
-        extract_dir = os.path.join(HOME_DIR)
         send_notification("资源下载", NOTIFICATION_MESSAGES.get(name, "下载资源"))
-        if not download_and_extract(url, download_dir, extract_dir):
-            send_notification("下载失败", f"{name}资源下载失败")
-            return False
-    
-    send_notification("下载完成", f"仅在第一次启动下载，现在，您可以玩了~")
+        return download_and_extract(url, HOME_DIR, progress), True
+
+    changed, removed = provisioner.plan(manifest)
+    if not changed and not removed:
+        logger.info(f"校验资源: {name} {manifest.version} 已是最新")
+        return True, False
+
+    send_notification("资源下载", NOTIFICATION_MESSAGES.get(name, "下载资源"))
+    return provisioner.provision(manifest, changed, removed, progress), True
+
+
+def download_resources():
+    """下载并解压所有必要资源
+
+    优先按资源清单增量更新：只下载缺失或发生变化的文件；
+    清单不可用时（如离线）回退为按目录是否存在判断的整包下载。
+    各资源包在线程池中并行处理，一个包解压安装的同时其他包继续下载，
+    进度按所有包的总字节数汇总并输出剩余时间。
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from utils.provision import ResourceProvisioner
+    from utils.progress import ProgressReporter
+
+    provisioner = ResourceProvisioner(HOME_DIR, CACHE_DIR / 'manifests')
+    reporter = ProgressReporter("资源下载")
+    downloaded = False
+    failed = []
+
+    workers = max(1, min(MAX_PARALLEL_DOWNLOADS, len(DOWNLOAD_URLS)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='download') as executor:
+        futures = {
+            executor.submit(provision_resource, provisioner, name, url, reporter): name
+            for name, url in DOWNLOAD_URLS.items()
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                ok, changed = future.result()
+            except Exception as e:
+                logger.exception(f"{name} 资源处理出错: {e}")
+                ok, changed = False, False
+            if not ok:
+                failed.append(name)
+                send_notification("下载失败", f"{name}资源下载失败")
+            downloaded = downloaded or changed
+
+    if failed:
+        return False
+
+    if downloaded:
+        reporter.finish()
+        send_notification("下载完成", f"仅在第一次启动下载，现在，您可以玩了~")
     return True
 
 
@@ -203,6 +244,7 @@ def initialize_application():
     
     from PySide6.QtWidgets import QApplication
     from windows.main_window import MinecraftLauncher
+    from utils.startup_bench import report_when_shown
 
     # 创建Qt应用
     app = QApplication(sys.argv)
@@ -212,6 +254,9 @@ def initialize_application():
     
     # 设置应用样式
     app.setStyle('Fusion')
+    # 应用级样式表只解析一次，控件状态通过动态属性切换
+    from ui.styles.themes import apply_theme
+    apply_theme(app)
     
     # 创建并显示主窗口
     launcher = MinecraftLauncher(
@@ -220,6 +265,7 @@ def initialize_application():
         resource_path=RESOURCE_DIR
     )
     launcher.show()
+    report_when_shown(app)
     
     # 运行应用
     return app.exec()
@@ -227,11 +273,13 @@ def initialize_application():
 
 def main():
     """应用程序主入口"""
+    from utils.startup_bench import benchmarking
+
     # 初始化目录结构
     # setup_directories()
     
-    # 下载必要资源
-    if not download_resources():
+    # 下载必要资源（启动测量时跳过，只测量界面启动）
+    if not benchmarking() and not download_resources():
         logger.error("资源下载失败，无法继续")
         return 1
     
@@ -0,0 +1,35 @@
+# Mini 版启动器入口：只有账户、版本与启动，不下载界面资源、不加载设置页面与背景图片
+
+import sys
+
+from main import logger, CACHE_DIR, CONFIG_DIR, setup_qt_environment, send_notification
+
+
+def initialize_application():
+    """初始化并运行 Mini 版启动器"""
+    if not setup_qt_environment():
+        logger.error("Qt环境设置失败，无法启动应用（请先运行一次完整版启动器下载运行时库）")
+        send_notification("启动失败", "Qt环境设置失败")
+        return 1
+
+    from PySide6.QtWidgets import QApplication
+    from windows.mini_window import MiniLauncher
+    from utils.startup_bench import report_when_shown
+
+    app = QApplication(sys.argv)
+    app.setStyle('Fusion')
+
+    launcher = MiniLauncher(cache_path=CACHE_DIR, config_path=CONFIG_DIR)
+    launcher.show()
+    report_when_shown(app)
+
+    return app.exec()
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(initialize_application())
+    except Exception as e:
+        logger.exception("程序异常退出")
+        send_notification("程序错误", f"发生未处理的异常: {str(e)}")
+        sys.exit(1)
@@ -0,0 +1 @@
+# 图像与绘制缓存
\ No newline at end of file
@@ -0,0 +1,171 @@
+# 服务器图标缓存
+
+import os
+from collections import OrderedDict
+from typing import Optional
+
+from PySide6.QtCore import Qt, QObject, QRunnable, QThreadPool, Signal
+from PySide6.QtGui import QImage, QPixmap
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# 解码后的图像与缩放后的 pixmap 共用的内存上限（字节）
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+
+def image_bytes(image) -> int:
+    """QImage / QPixmap 占用的内存（字节）"""
+    return image.width() * image.height() * max(image.depth(), 8) // 8
+
+
+class _DecodeSignals(QObject):
+    decoded = Signal(str, QImage)
+    failed = Signal(str)
+
+
+class _DecodeTask(QRunnable):
+    """在线程池中把 PNG 解码为 QImage（QImage 可以在非 GUI 线程中使用，QPixmap 不可以）"""
+
+    def __init__(self, favicon_hash, path, data, signals):
+        super().__init__()
+        self.favicon_hash = favicon_hash
+        self.path = path
+        self.data = data
+        self.signals = signals
+
+    def run(self):
+        image = QImage()
+        if self.data is not None:
+            image.loadFromData(self.data, 'PNG')
+        elif os.path.exists(self.path):
+            image.load(self.path, 'PNG')
+        if image.isNull():
+            self.signals.failed.emit(self.favicon_hash)
+        else:
+            # 预先转换为绘制最快的格式，之后在 GUI 线程中转 pixmap 无需再转换
+            self.signals.decoded.emit(self.favicon_hash, image.convertToFormat(QImage.Format_ARGB32_Premultiplied))
+
+
+class FaviconCache(QObject):
+    """
+    按内容摘要缓存的服务器图标
+
+    两级缓存：磁盘上的 PNG（由 ServerStatusCache 按摘要保存）与内存中的 LRU。
+    内存 LRU 同时保存解码后的 QImage 与按 (摘要, 尺寸, 设备像素比) 缩放好的 QPixmap，按字节数淘汰。
+    未命中时在线程池中解码，完成后发出 favicon_ready，由视图重绘对应的行；
+    摘要不变的服务器再次刷新时直接命中缓存的 pixmap，不再解码或缩放。
+    """
+    favicon_ready = Signal(str)  # 摘要
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, parent=None):
+        """
+        :param directory: 保存 PNG 的目录（文件名为 摘要.png）
+        :param max_bytes: 内存缓存的上限（字节）
+        """
+        super().__init__(parent)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # ('image', 摘要) / ('pixmap', 摘要, 尺寸, dpr) -> (对象, 字节数)
+        self._bytes = 0
+        self._pending = set()
+        self._failed = set()
+        self.hits = 0
+        self.misses = 0
+        self._signals = _DecodeSignals()
+        self._signals.decoded.connect(self._on_decoded)
+        self._signals.failed.connect(self._on_failed)
+        self._pool = QThreadPool.globalInstance()
+
+    @property
+    def memory_usage(self) -> int:
+        return self._bytes
+
+    def path(self, favicon_hash):
+        return os.path.join(self.directory, f'{favicon_hash}.png')
+
+    # ---------- LRU ----------
+
+    def _get(self, key):
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        self._entries.move_to_end(key)
+        return item[0]
+
+    def _put(self, key, value, size):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        self._entries[key] = (value, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+
+    # ---------- 查询 ----------
+
+    def pixmap(self, favicon_hash, size, dpr=1.0) -> Optional[QPixmap]:
+        """
+        取得缩放到 size（逻辑像素）的图标
+
+        :return: 已缓存或可由已解码图像立即生成时返回 QPixmap，否则开始后台解码并返回 None
+        """
+        if not favicon_hash or favicon_hash in self._failed:
+            return None
+        key = ('pixmap', favicon_hash, size, dpr)
+        pixmap = self._get(key)
+        if pixmap is not None:
+            self.hits += 1
+            return pixmap
+
+        self.misses += 1
+        image = self._get(('image', favicon_hash))
+        if image is None:
+            self.request(favicon_hash)
+            return None
+        physical = max(1, round(size * dpr))
+        # 原版图标为 64x64 像素画，缩小时平滑，放大时保持像素边缘
+        mode = Qt.SmoothTransformation if physical < image.width() else Qt.FastTransformation
+        pixmap = QPixmap.fromImage(image.scaled(physical, physical, Qt.KeepAspectRatio, mode))
+        pixmap.setDevicePixelRatio(dpr)
+        self._put(key, pixmap, image_bytes(pixmap))
+        return pixmap
+
+    def request(self, favicon_hash, data: bytes = None):
+        """开始后台解码（已在解码或已缓存时忽略）"""
+        if (not favicon_hash or favicon_hash in self._pending or favicon_hash in self._failed
+                or ('image', favicon_hash) in self._entries):
+            return
+        self._pending.add(favicon_hash)
+        self._pool.start(_DecodeTask(favicon_hash, self.path(favicon_hash), data, self._signals))
+
+    def _on_decoded(self, favicon_hash, image):
+        self._pending.discard(favicon_hash)
+        self._put(('image', favicon_hash), image, image_bytes(image))
+        self.favicon_ready.emit(favicon_hash)
+
+    def _on_failed(self, favicon_hash):
+        self._pending.discard(favicon_hash)
+        self._failed.add(favicon_hash)
+        logger.debug(f"服务器图标解码失败: {favicon_hash}")
+
+    def invalidate(self, favicon_hash=None):
+        """移除某个图标（或全部图标）的内存缓存"""
+        for key in [key for key in self._entries if favicon_hash is None or key[1] == favicon_hash]:
+            self._bytes -= self._entries.pop(key)[1]
+        if favicon_hash is None:
+            self._failed.clear()
+        else:
+            self._failed.discard(favicon_hash)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
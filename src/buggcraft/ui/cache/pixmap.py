@@ -0,0 +1,199 @@
+# 缩放结果缓存：自绘控件共享的 pixmap 渲染缓存
+
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict
+
+from PySide6.QtCore import Qt, QRect, QRectF, QSize
+from PySide6.QtGui import QPixmap
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# 缓存的缩放结果占用的内存上限（字节）
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# 输出统计日志的间隔（秒）
+STATS_INTERVAL = 60.0
+
+
+def pixmap_bytes(pixmap) -> int:
+    return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+
+class PixmapRenderCache:
+    """
+    缩放后的 pixmap 缓存
+
+    键为 (图像, 目标物理尺寸, 设备像素比, 宽高比模式, 变换方式)。同一控件只保留当前尺寸的结果：
+    控件尺寸变化时旧结果立即失效，其余情况下重绘都直接命中缓存，不再做平滑缩放。
+    另外统计命中率与各类控件的绘制耗时，定期写入日志。
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # 键 -> pixmap
+        self._bytes = 0
+        self._owners = {}  # 控件标识 -> 当前使用的键
+        self.hits = 0
+        self.misses = 0
+        self.scale_time = 0.0
+        self._paints: Dict[str, list] = {}  # 名称 -> [次数, 总耗时, 最大耗时]
+        self._last_report = time.monotonic()
+
+    @property
+    def memory_usage(self) -> int:
+        return self._bytes
+
+    def _remove(self, key):
+        pixmap = self._entries.pop(key, None)
+        if pixmap is not None:
+            self._bytes -= pixmap_bytes(pixmap)
+
+    def _release(self, owner, key):
+        """控件改用新键时释放旧结果（没有其他控件在使用时）"""
+        old = self._owners.get(owner)
+        self._owners[owner] = key
+        if old is not None and old != key and old not in self._owners.values():
+            self._remove(old)
+
+    def scaled(self, source: QPixmap, size: QSize, dpr=1.0, aspect_mode=Qt.KeepAspectRatio,
+               transform=Qt.SmoothTransformation, owner=None) -> QPixmap:
+        """
+        取得缩放到 size（逻辑像素）的 pixmap，结果的设备像素比为 dpr
+
+        :param owner: 使用结果的控件，尺寸变化后该控件之前的结果会被释放
+        """
+        width, height = max(1, round(size.width() * dpr)), max(1, round(size.height() * dpr))
+        key = (source.cacheKey(), width, height, dpr, int(aspect_mode), int(transform))
+        if owner is not None:
+            owner_id = id(owner)
+            if owner_id not in self._owners:
+                # 首次使用时登记销毁回调（只捕获标识，不持有控件），控件销毁后标识可能被复用
+                destroyed = getattr(owner, 'destroyed', None)
+                if destroyed is not None:
+                    destroyed.connect(lambda *_, owner_id=owner_id: self._forget(owner_id))
+            self._release(owner_id, key)
+
+        pixmap = self._entries.get(key)
+        if pixmap is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return pixmap
+
+        self.misses += 1
+        started = time.perf_counter()
+        if aspect_mode != Qt.IgnoreAspectRatio:
+            target = source.size().scaled(width, height, aspect_mode)
+        else:
+            target = QSize(width, height)
+        if target == source.size() and source.devicePixelRatio() == dpr:
+            pixmap = source
+        else:
+            pixmap = source.scaled(width, height, aspect_mode, transform)
+            pixmap.setDevicePixelRatio(dpr)
+        self.scale_time += time.perf_counter() - started
+
+        self._entries[key] = pixmap
+        self._bytes += pixmap_bytes(pixmap)
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            old_key, old = self._entries.popitem(last=False)
+            self._bytes -= pixmap_bytes(old)
+        return pixmap
+
+    def forget(self, owner):
+        """释放控件使用的结果（控件销毁时会自动调用）"""
+        self._forget(id(owner))
+
+    def _forget(self, owner_id):
+        key = self._owners.pop(owner_id, None)
+        if key is not None and key not in self._owners.values():
+            self._remove(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._owners.clear()
+        self._bytes = 0
+
+    # ---------- 统计 ----------
+
+    @contextmanager
+    def paint_timer(self, name):
+        """统计一次绘制的耗时"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            record = self._paints.get(name)
+            if record is None:
+                self._paints[name] = [1, elapsed, elapsed]
+            else:
+                record[0] += 1
+                record[1] += elapsed
+                record[2] = max(record[2], elapsed)
+            if time.monotonic() - self._last_report >= STATS_INTERVAL:
+                self.report()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'scale_ms': self.scale_time * 1000,
+            'paints': {name: {'count': count, 'avg_ms': total / count * 1000, 'max_ms': peak * 1000}
+                       for name, (count, total, peak) in self._paints.items()},
+        }
+
+    def report(self):
+        """将命中率与绘制耗时写入日志，并开始新的统计周期"""
+        stats = self.stats()
+        paints = ', '.join(f"{name} {info['count']}次 平均{info['avg_ms']:.2f}ms 最长{info['max_ms']:.2f}ms"
+                           for name, info in stats['paints'].items())
+        logger.info(f"绘制缓存: 命中率 {stats['hit_rate']:.1%} ({stats['hits']}/{stats['hits'] + stats['misses']})，"
+                    f"缩放耗时 {stats['scale_ms']:.1f}ms，占用 {stats['bytes'] / 1024 / 1024:.1f}MB；{paints}")
+        self.hits = self.misses = 0
+        self.scale_time = 0.0
+        self._paints.clear()
+        self._last_report = time.monotonic()
+
+
+_render_cache = None
+
+
+def get_render_cache() -> PixmapRenderCache:
+    """全局共享的渲染缓存（只在 GUI 线程中使用）"""
+    global _render_cache
+    if _render_cache is None:
+        _render_cache = PixmapRenderCache()
+    return _render_cache
+
+
+def draw_scaled(painter, widget, source: QPixmap, aspect_mode=Qt.KeepAspectRatio, exposed: QRect = None):
+    """
+    将 source 缩放到控件大小后居中绘制
+
+    :param exposed: 需要重绘的区域（paintEvent 的 event.rect()），只绘制这一部分
+    """
+    if source is None or source.isNull():
+        return
+    dpr = widget.devicePixelRatioF()
+    pixmap = get_render_cache().scaled(source, widget.size(), dpr, aspect_mode, owner=widget)
+    width, height = pixmap.width() / dpr, pixmap.height() / dpr
+    target = QRectF((widget.width() - width) / 2, (widget.height() - height) / 2, width, height)
+    if exposed is not None:
+        target = target.intersected(QRectF(exposed))
+        if target.isEmpty():
+            return
+        origin_x = (widget.width() - width) / 2
+        origin_y = (widget.height() - height) / 2
+        # 源区域以物理像素计
+        source_rect = QRectF((target.x() - origin_x) * dpr, (target.y() - origin_y) * dpr,
+                             target.width() * dpr, target.height() * dpr)
+        painter.drawPixmap(target, pixmap, source_rect)
+    else:
+        painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
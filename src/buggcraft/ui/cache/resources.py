@@ -0,0 +1,228 @@
+# 图片资源管理：统一加载、预加载与共享缩放结果
+
+import os
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from PySide6.QtCore import Qt, QObject, QRunnable, QThreadPool, Signal
+from PySide6.QtGui import QImage, QPixmap, QIcon
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# 启动时即会用到的图片（相对于资源目录），在后台线程中预先解码
+STARTUP_IMAGES = (
+    'images/minecraft_bg.png',
+    'images/bar/ic.png',
+    'images/bar/min.png',
+    'images/bar/close.png',
+    'images/user/MINECRAFT.png',
+    'images/user/unlogged_avatar.png',
+    'images/user/offline_login.png',
+    'images/user/login_btn.png',
+    'images/user/legal_login_btn.png',
+    'images/user/external_tab_btn_active.png',
+    'images/user/start_game_btn.png',
+    'images/user/switch-account.png',
+    'images/user/switch.png',
+    'images/user/options.png',
+)
+
+
+def _image_bytes(image) -> int:
+    return image.width() * image.height() * max(image.depth(), 8) // 8
+
+
+def _file_key(path) -> Optional[Tuple[str, int, int]]:
+    """(绝对路径, 修改时间, 大小)，文件不存在时返回 None；文件被替换（如新的皮肤头像）后键随之变化"""
+    path = os.path.abspath(path)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return path, stat.st_mtime_ns, stat.st_size
+
+
+class _PreloadTask(QRunnable):
+
+    def __init__(self, resources, path):
+        super().__init__()
+        self.resources = resources
+        self.path = path
+
+    def run(self):
+        self.resources.image(self.path)
+        self.resources._preload_done()
+
+
+class _PreloadSignals(QObject):
+    finished = Signal(int)  # 预加载的图片数
+
+
+class ImageResources:
+    """
+    图片资源管理器
+
+    每个文件只解码一次为 QImage（可在任意线程中进行，预加载在线程池中完成），
+    GUI 线程中按需转换为 QPixmap，并按 (图片, 尺寸, 缩放方式) 共享缩放后的结果。
+    后台预加载尚未完成时请求同一图片，会等待这次解码而不会重复读取文件。
+    """
+
+    def __init__(self, resource_path=None):
+        self.resource_path = resource_path
+        self._lock = threading.Lock()
+        self._images: Dict[tuple, QImage] = {}
+        self._loading: Dict[tuple, threading.Event] = {}
+        self._current: Dict[str, tuple] = {}  # 路径 -> 当前文件键
+        self._gui_current: Dict[str, tuple] = {}  # 同上，GUI 线程中的 pixmap 缓存使用
+        self._pixmaps: Dict[tuple, QPixmap] = {}
+        self._scaled: Dict[tuple, QPixmap] = {}
+        self._preload_remaining = 0
+        self.signals = _PreloadSignals()
+
+    def resolve(self, path) -> str:
+        """相对路径按资源目录解析"""
+        if self.resource_path and not os.path.isabs(path):
+            path = os.path.join(self.resource_path, path)
+        return os.path.abspath(path)
+
+    def _key(self, path) -> Optional[tuple]:
+        key = _file_key(self.resolve(path))
+        if key is None:
+            return None
+        with self._lock:
+            old = self._current.get(key[0])
+            if old is not None and old != key:
+                # 文件已被替换，丢弃旧内容
+                self._images.pop(old, None)
+            self._current[key[0]] = key
+        return key
+
+    def _gui_key(self, path) -> Optional[tuple]:
+        """GUI 线程中使用的键，文件被替换时同时丢弃旧的 pixmap"""
+        key = self._key(path)
+        if key is None:
+            return None
+        old = self._gui_current.get(key[0])
+        if old is not None and old != key:
+            self._pixmaps.pop(old, None)
+            for scaled_key in [k for k in self._scaled if k[0] == old]:
+                del self._scaled[scaled_key]
+        self._gui_current[key[0]] = key
+        return key
+
+    # ---------- 加载 ----------
+
+    def image(self, path) -> QImage:
+        """解码后的图片（线程安全），文件不存在或无法解码时返回空 QImage"""
+        key = self._key(path)
+        if key is None:
+            return QImage()
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                return image
+            event = self._loading.get(key)
+            owner = event is None
+            if owner:
+                event = self._loading[key] = threading.Event()
+        if not owner:
+            event.wait()
+            with self._lock:
+                return self._images.get(key, QImage())
+
+        image = QImage(key[0])
+        if image.isNull():
+            logger.error(f"图片加载失败: {key[0]}")
+        else:
+            image = image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+        with self._lock:
+            self._images[key] = image
+            self._loading.pop(key, None)
+        event.set()
+        return image
+
+    def pixmap(self, path) -> QPixmap:
+        """原尺寸的共享 QPixmap（只能在 GUI 线程中调用）"""
+        key = self._gui_key(path)
+        if key is None:
+            return QPixmap()
+        pixmap = self._pixmaps.get(key)
+        if pixmap is None:
+            pixmap = self._pixmaps[key] = QPixmap.fromImage(self.image(path))
+        return pixmap
+
+    def scaled(self, path, width, height, aspect_mode=Qt.IgnoreAspectRatio,
+               transform=Qt.SmoothTransformation) -> QPixmap:
+        """缩放后的共享 QPixmap，相同参数只缩放一次"""
+        key = self._gui_key(path)
+        if key is None:
+            return QPixmap()
+        width, height = int(width), int(height)
+        scaled_key = (key, width, height, int(aspect_mode), int(transform))
+        pixmap = self._scaled.get(scaled_key)
+        if pixmap is None:
+            source = self.pixmap(path)
+            pixmap = source.scaled(width, height, aspect_mode, transform) if not source.isNull() else source
+            self._scaled[scaled_key] = pixmap
+        return pixmap
+
+    def icon(self, path) -> QIcon:
+        return QIcon(self.pixmap(path))
+
+    # ---------- 预加载 ----------
+
+    def preload(self, paths: Iterable[str] = STARTUP_IMAGES):
+        """在线程池中并行解码图片，全部完成后发出 signals.finished"""
+        paths = [path for path in paths if _file_key(self.resolve(path)) is not None]
+        with self._lock:
+            self._preload_remaining += len(paths)
+        pool = QThreadPool.globalInstance()
+        for path in paths:
+            pool.start(_PreloadTask(self, path))
+        return len(paths)
+
+    def _preload_done(self):
+        with self._lock:
+            self._preload_remaining -= 1
+            finished = self._preload_remaining == 0
+            count = len(self._images)
+            images = sum(map(_image_bytes, self._images.values()))
+        if finished:
+            # 在工作线程中，只统计解码后的图片（pixmap 缓存属于 GUI 线程）
+            logger.info(f"图片预加载完成: {count} 张，{images / 1024 / 1024:.1f}MB")
+            self.signals.finished.emit(count)
+
+    # ---------- 统计 ----------
+
+    def memory_usage(self) -> dict:
+        """各级缓存占用的内存（字节）"""
+        with self._lock:
+            images = sum(map(_image_bytes, self._images.values()))
+            count = len(self._images)
+        pixmaps = sum(map(_image_bytes, self._pixmaps.values()))
+        scaled = sum(map(_image_bytes, self._scaled.values()))
+        return {'files': count, 'images': images, 'pixmaps': pixmaps, 'scaled': scaled,
+                'total': images + pixmaps + scaled}
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._current.clear()
+        self._gui_current.clear()
+        self._pixmaps.clear()
+        self._scaled.clear()
+
+
+_resources = None
+
+
+def get_image_resources(resource_path=None) -> ImageResources:
+    """全局共享的图片资源管理器（首次调用时设置资源目录）"""
+    global _resources
+    if _resources is None:
+        _resources = ImageResources(resource_path)
+    elif resource_path and not _resources.resource_path:
+        _resources.resource_path = resource_path
+    return _resources
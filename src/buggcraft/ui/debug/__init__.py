@@ -0,0 +1 @@
+# 调试与性能分析工具
@@ -0,0 +1,420 @@
+# 界面性能分析：绘制耗时、事件循环延迟与槽函数阻塞时间，可叠加显示并导出为 Chrome trace
+
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from PySide6.QtCore import Qt, QObject, QTimer, QAbstractAnimation
+from PySide6.QtGui import QColor, QFont, QKeySequence, QPainter, QShortcut
+from PySide6.QtWidgets import QWidget
+
+from config.constants import TRACE_DIR
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# 设置该环境变量（任意非空值）时即使未打开调试开关也启用分析
+ENV_FLAG = 'BUGGCRAFT_PROFILE'
+# 最多保留的跟踪事件数，超出后丢弃最早的
+MAX_EVENTS = 200_000
+# 检测事件循环延迟的定时器间隔（毫秒），约为一帧
+LAG_INTERVAL_MS = 16
+# 叠加层统计最近多少次延迟采样
+LAG_SAMPLES = 240
+# 单次绘制或槽函数超过该耗时（毫秒）时写入警告日志
+SLOW_THRESHOLD_MS = 50
+# 叠加层刷新间隔（毫秒）
+OVERLAY_INTERVAL_MS = 500
+# 只统计这些包中定义的控件的绘制耗时
+PAINT_PACKAGES = ('ui', 'windows')
+
+
+def profiling_requested(settings_manager=None) -> bool:
+    """调试开关（debug_endble）或环境变量打开时启用分析"""
+    if os.environ.get(ENV_FLAG):
+        return True
+    return bool(settings_manager and settings_manager.get_setting('debug_endble', False))
+
+
+def _widget_classes(base=QWidget):
+    """base 的全部 Python 子类"""
+    seen, stack = set(), [base]
+    while stack:
+        for cls in stack.pop().__subclasses__():
+            if cls not in seen:
+                seen.add(cls)
+                stack.append(cls)
+                yield cls
+
+
+def _positional_limit(func):
+    """func 最多接收的位置参数个数，可接收任意个时返回 None"""
+    try:
+        parameters = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return None
+    count = 0
+    for parameter in parameters:
+        if parameter.kind == parameter.VAR_POSITIONAL:
+            return None
+        if parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD):
+            count += 1
+    return count
+
+
+def _leaf_animations(animation):
+    """动画组中的全部子动画（非动画组时返回自身）"""
+    if not hasattr(animation, 'animationCount'):
+        return [animation]
+    leaves = []
+    for index in range(animation.animationCount()):
+        leaves.extend(_leaf_animations(animation.animationAt(index)))
+    return leaves
+
+
+class UIProfiler(QObject):
+    """
+    界面性能分析器
+
+    记录的每段耗时都保存为 Chrome trace 的完整事件（ph=X，时间单位微秒），
+    导出后可在 chrome://tracing 或 Perfetto 中查看；同时按名称累计次数、总耗时与最长耗时，供叠加层显示。
+    未启用时各个 instrument/track 方法什么都不做，不会给界面增加任何开销。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._events = deque(maxlen=MAX_EVENTS)
+        self._threads = {}  # 线程标识 -> 名称
+        self.paints = {}  # 控件类名 -> [次数, 总耗时, 最长耗时]
+        self.slots = {}  # 槽函数名 -> [次数, 总耗时, 最长耗时]
+        self.animations = {}  # 动画名 -> 最近一次播放的统计
+        self.lag = deque(maxlen=LAG_SAMPLES)  # 最近的事件循环延迟（毫秒）
+        self._lag_timer = None
+        self._last_tick = None
+
+    # ---------- 开关 ----------
+
+    def start(self):
+        """启用分析并开始检测事件循环延迟"""
+        if self.enabled:
+            return
+        self.enabled = True
+        self._lag_timer = QTimer(self)
+        self._lag_timer.setTimerType(Qt.PreciseTimer)
+        self._lag_timer.setInterval(LAG_INTERVAL_MS)
+        self._lag_timer.timeout.connect(self._on_tick)
+        self._last_tick = None
+        self._lag_timer.start()
+        logger.info(f"界面性能分析已启用，跟踪文件导出到 {TRACE_DIR}")
+
+    def stop(self):
+        if self._lag_timer is not None:
+            self._lag_timer.stop()
+            self._lag_timer = None
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._events.clear()
+            self.paints.clear()
+            self.slots.clear()
+            self.animations.clear()
+            self.lag.clear()
+
+    # ---------- 记录 ----------
+
+    def _us(self, moment) -> float:
+        return round((moment - self._origin) * 1e6, 3)
+
+    def record(self, name, category, started, ended, args=None, thread=None):
+        """
+        记录一段耗时（started/ended 为 time.perf_counter() 的值）
+
+        :param thread: 事件所属的线程标识，默认为当前线程
+        """
+        thread = thread or threading.get_ident()
+        event = {'name': name, 'cat': category, 'ph': 'X', 'ts': self._us(started),
+                 'dur': round((ended - started) * 1e6, 3), 'pid': self._pid, 'tid': thread}
+        if args:
+            event['args'] = args
+        with self._lock:
+            self._events.append(event)
+            if thread not in self._threads:
+                self._threads[thread] = next((t.name for t in threading.enumerate() if t.ident == thread), str(thread))
+
+    def counter(self, name, values: dict):
+        """记录计数器（在 trace 中显示为曲线）"""
+        event = {'name': name, 'ph': 'C', 'ts': self._us(time.perf_counter()),
+                 'pid': self._pid, 'tid': threading.get_ident(), 'args': values}
+        with self._lock:
+            self._events.append(event)
+
+    def _finish(self, table, name, category, started, args=None):
+        ended = time.perf_counter()
+        self.record(name, category, started, ended, args)
+        elapsed = ended - started
+        with self._lock:
+            stat = table.get(name)
+            if stat is None:
+                table[name] = [1, elapsed, elapsed]
+            else:
+                stat[0] += 1
+                stat[1] += elapsed
+                stat[2] = max(stat[2], elapsed)
+        if elapsed * 1000 >= SLOW_THRESHOLD_MS:
+            logger.warning(f"{name} 阻塞界面 {elapsed * 1000:.1f}ms")
+
+    def _on_tick(self):
+        """定时器实际触发间隔与预期间隔之差即为事件循环的延迟"""
+        now = time.perf_counter()
+        if self._last_tick is not None:
+            expected = self._last_tick + LAG_INTERVAL_MS / 1000
+            drift = max(0.0, (now - expected) * 1000)
+            self.lag.append(drift)
+            self.counter('事件循环延迟', {'ms': round(drift, 2)})
+            if drift >= SLOW_THRESHOLD_MS:
+                self.record('事件循环阻塞', 'lag', expected, now, {'ms': round(drift, 1)})
+        self._last_tick = now
+
+    # ---------- 插桩 ----------
+
+    def instrument_paint_events(self) -> int:
+        """为项目中自定义了 paintEvent 的控件类统计绘制耗时，返回插桩的类数"""
+        if not self.enabled:
+            return 0
+        count = 0
+        for cls in _widget_classes():
+            module = cls.__module__ or ''
+            if module.split('.')[0] not in PAINT_PACKAGES or module.startswith(__name__):
+                continue
+            if 'paintEvent' in cls.__dict__ and self._wrap_paint(cls):
+                count += 1
+        logger.info(f"已为 {count} 个控件类统计绘制耗时")
+        return count
+
+    def _wrap_paint(self, cls) -> bool:
+        original = cls.__dict__['paintEvent']
+        if getattr(original, '_profiled', False):
+            return False
+        name = cls.__name__
+        profiler = self
+
+        @functools.wraps(original)
+        def paintEvent(widget, event):
+            started = time.perf_counter()
+            try:
+                return original(widget, event)
+            finally:
+                rect = event.rect()
+                profiler._finish(profiler.paints, name, 'paint', started,
+                                 {'area': f'{rect.width()}x{rect.height()}'})
+
+        paintEvent._profiled = True
+        cls.paintEvent = paintEvent
+        return True
+
+    def timed(self, slot, name=None):
+        """返回统计 slot 每次执行耗时的包装函数；未启用时原样返回 slot"""
+        if not self.enabled:
+            return slot
+        name = name or getattr(slot, '__qualname__', repr(slot))
+        # 连接到参数较少的槽时，Qt 会丢弃多余的信号参数，包装函数需保持同样的行为
+        limit = _positional_limit(slot)
+
+        @functools.wraps(slot)
+        def wrapper(*args):
+            started = time.perf_counter()
+            try:
+                return slot(*(args if limit is None else args[:limit]))
+            finally:
+                self._finish(self.slots, name, 'slot', started)
+
+        wrapper._profiled = True
+        return wrapper
+
+    def instrument_slots(self, cls, *names):
+        """
+        统计 cls 中各槽函数的执行耗时
+
+        需在连接信号之前调用：已连接的槽保存的是原来的函数。
+        """
+        if not self.enabled:
+            return
+        for name in names:
+            method = cls.__dict__.get(name)
+            if method is None or getattr(method, '_profiled', False):
+                continue
+            setattr(cls, name, self.timed(method, f'{cls.__name__}.{name}'))
+
+    def connect_timed(self, signal, slot, name=None):
+        """连接信号，并统计槽函数的执行耗时"""
+        return signal.connect(self.timed(slot, name))
+
+    def track_animation(self, animation, name):
+        """
+        统计动画（或并行/串行动画组）每次播放的实际时长与帧数
+
+        需在 start() 之前调用；帧数取时长最长的子动画的 valueChanged 次数。
+        """
+        if not self.enabled:
+            return animation
+        leaves = [leaf for leaf in _leaf_animations(animation) if hasattr(leaf, 'valueChanged')]
+        state = {'frames': 0, 'started': None}
+
+        def on_frame(*_):
+            state['frames'] += 1
+
+        def on_state(new_state, old_state):
+            if new_state == QAbstractAnimation.Running:
+                state['frames'] = 0
+                state['started'] = time.perf_counter()
+            elif new_state == QAbstractAnimation.Stopped and state['started'] is not None:
+                started, state['started'] = state['started'], None
+                ended = time.perf_counter()
+                elapsed = ended - started
+                args = {
+                    'frames': state['frames'],
+                    'fps': round(state['frames'] / elapsed, 1) if elapsed > 0 else 0.0,
+                    'expected_ms': animation.totalDuration(),
+                    'actual_ms': round(elapsed * 1000, 1),
+                }
+                self.record(name, 'animation', started, ended, args)
+                with self._lock:
+                    self.animations[name] = args
+
+        animation.stateChanged.connect(on_state)
+        if leaves:
+            max(leaves, key=lambda leaf: leaf.totalDuration()).valueChanged.connect(on_frame)
+        return animation
+
+    # ---------- 汇总与导出 ----------
+
+    def summary_lines(self, limit=6) -> list:
+        """叠加层显示的统计文本"""
+        with self._lock:
+            lag = list(self.lag)
+            paints = sorted(self.paints.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+            slots = sorted(self.slots.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+            animations = list(self.animations.items())[-limit:]
+            events = len(self._events)
+
+        lines = []
+        if lag:
+            lines.append(f"事件循环延迟  平均 {sum(lag) / len(lag):.1f}ms  最长 {max(lag):.1f}ms")
+        lines.append("绘制（按总耗时）")
+        for name, (count, total, peak) in paints:
+            lines.append(f"  {name:<20} {count:>6}次 {total / count * 1000:6.2f}ms 最长 {peak * 1000:6.1f}ms")
+        if slots:
+            lines.append("槽函数")
+            for name, (count, total, peak) in slots:
+                lines.append(f"  {name:<20} {count:>6}次 {total / count * 1000:6.2f}ms 最长 {peak * 1000:6.1f}ms")
+        if animations:
+            lines.append("动画（最近一次）")
+            for name, info in animations:
+                lines.append(f"  {name:<20} {info['fps']:5.1f}fps {info['frames']}帧 "
+                             f"{info['actual_ms']:.0f}/{info['expected_ms']}ms")
+        lines.append(f"跟踪事件 {events}")
+        return lines
+
+    def export_trace(self, path=None) -> str:
+        """导出为 Chrome trace 格式（JSON），返回文件路径"""
+        if path is None:
+            os.makedirs(TRACE_DIR, exist_ok=True)
+            path = os.path.join(TRACE_DIR, time.strftime('ui-%Y%m%d-%H%M%S.json'))
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': self._pid, 'tid': 0,
+                     'args': {'name': 'BuggCraft'}}]
+        metadata.extend({'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': thread,
+                         'args': {'name': name}} for thread, name in threads.items())
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        logger.info(f"已导出界面跟踪文件: {path}（{len(events)} 个事件）")
+        return path
+
+
+class ProfilerOverlay(QWidget):
+    """叠加在窗口右上角的性能统计，Ctrl+Shift+P 显示/隐藏，Ctrl+Shift+T 导出跟踪文件"""
+
+    def __init__(self, parent, profiler=None):
+        super().__init__(parent)
+        self.profiler = profiler or get_profiler()
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setAttribute(Qt.WA_NoSystemBackground)
+        self.setFont(QFont('Consolas', 9))
+        self.setFixedSize(460, 300)
+        self._lines = []
+        self._message = ''
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(OVERLAY_INTERVAL_MS)
+        self._timer.timeout.connect(self.refresh)
+
+        toggle = QShortcut(QKeySequence('Ctrl+Shift+P'), parent)
+        toggle.activated.connect(self.toggle)
+        export = QShortcut(QKeySequence('Ctrl+Shift+T'), parent)
+        export.activated.connect(self.export)
+        self.hide()
+
+    def toggle(self):
+        if self.isVisible():
+            self._timer.stop()
+            self.hide()
+        else:
+            self.refresh()
+            self.show()
+            self.raise_()
+            self._timer.start()
+
+    def export(self):
+        try:
+            self._message = f"已导出 {os.path.basename(self.profiler.export_trace())}"
+        except OSError as e:
+            logger.error(f"导出跟踪文件失败: {e}")
+            self._message = f"导出失败: {e}"
+        self.refresh()
+
+    def refresh(self):
+        parent = self.parentWidget()
+        if parent is not None:
+            self.move(parent.width() - self.width() - 12, 70)
+        self._lines = self.profiler.summary_lines()
+        if self._message:
+            self._lines.append(self._message)
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(0, 0, 0, 190))
+        painter.drawRoundedRect(self.rect(), 6, 6)
+        painter.setPen(QColor('#9EF01A'))
+        line_height = self.fontMetrics().height()
+        y = 8 + self.fontMetrics().ascent()
+        for line in self._lines:
+            if y > self.height() - 6:
+                break
+            painter.drawText(10, y, line)
+            y += line_height
+
+
+_profiler = None
+
+
+def get_profiler() -> UIProfiler:
+    """全局共享的性能分析器（只在 GUI 线程中创建）"""
+    global _profiler
+    if _profiler is None:
+        _profiler = UIProfiler()
+    return _profiler
@@ -0,0 +1,208 @@
+# 界面卡顿监测：事件循环长时间未运转时抓取界面线程的 Python 调用栈，并按调用位置汇总
+
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+
+from PySide6.QtCore import QObject, QTimer
+
+from config.constants import TRACE_DIR
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# 界面线程心跳间隔（毫秒）
+HEARTBEAT_MS = 100
+# 心跳超过预期时间多久未到即视为卡顿（毫秒）
+DEFAULT_THRESHOLD_MS = 250
+# 卡顿期间抓取调用栈的间隔（秒）
+SAMPLE_INTERVAL = 0.05
+# 每个调用栈最多保留的层数
+MAX_STACK_DEPTH = 40
+# 项目源码目录，用于区分项目代码与第三方库
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _describe(frame) -> str:
+    """调用位置的简短描述：相对路径:行号 函数名"""
+    filename = frame.filename
+    if filename.startswith(PROJECT_ROOT):
+        filename = os.path.relpath(filename, PROJECT_ROOT)
+    return f"{filename}:{frame.lineno} {frame.name}"
+
+
+def _call_site(stack):
+    """
+    卡顿的调用位置 (入口, 热点)
+
+    入口为事件循环调用的第一个项目函数（通常是槽函数），热点为栈顶最近的项目函数；
+    栈中没有项目代码时取最内层的帧。
+    """
+    if not stack:
+        return '<未知>', '<未知>'
+    main_file = getattr(sys.modules.get('__main__'), '__file__', None)
+    frames = [frame for frame in stack if frame.filename != main_file] or stack
+    project = [frame for frame in frames if frame.filename.startswith(PROJECT_ROOT)]
+    entry = (project or frames)[0]
+    hotspot = (project or frames)[-1]
+    return _describe(entry), _describe(hotspot)
+
+
+class StallSite:
+    """同一调用位置的卡顿统计"""
+
+    __slots__ = ('entry', 'hotspot', 'count', 'total', 'peak', 'stack')
+
+    def __init__(self, entry, hotspot):
+        self.entry = entry
+        self.hotspot = hotspot
+        self.count = 0
+        self.total = 0.0
+        self.peak = 0.0
+        self.stack = []  # 最近一次抓取到的调用栈（格式化后的文本行）
+
+    def to_dict(self) -> dict:
+        return {
+            'entry': self.entry,
+            'hotspot': self.hotspot,
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 1),
+            'max_ms': round(self.peak * 1000, 1),
+            'stack': self.stack,
+        }
+
+
+class StallWatchdog(QObject):
+    """
+    事件循环卡顿监测
+
+    界面线程中的定时器定期更新心跳时间，独立的监测线程发现心跳超时后，
+    通过 sys._current_frames() 每隔 SAMPLE_INTERVAL 抓取一次界面线程的调用栈，
+    心跳恢复时以出现次数最多的调用位置记录这次卡顿的时长。
+    同一位置只在第一次出现时输出完整调用栈，之后只计数，summary() 按总时长排序。
+    """
+
+    def __init__(self, threshold_ms=DEFAULT_THRESHOLD_MS, profiler=None, parent=None):
+        super().__init__(parent)
+        self.threshold = threshold_ms / 1000
+        self.profiler = profiler  # 启用界面性能分析时，卡顿同时写入跟踪文件
+        self.sites = {}  # (入口, 热点) -> StallSite
+        self._lock = threading.Lock()
+        self._main_thread = None
+        self._last_beat = time.perf_counter()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._heartbeat = QTimer(self)
+        self._heartbeat.setInterval(HEARTBEAT_MS)
+        self._heartbeat.timeout.connect(self._beat)
+
+    def start(self):
+        """开始监测（须在界面线程中调用）"""
+        if self._thread is not None:
+            return
+        self._main_thread = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._stopping.clear()
+        self._heartbeat.start()
+        self._thread = threading.Thread(target=self._run, name='StallWatchdog', daemon=True)
+        self._thread.start()
+        logger.info(f"界面卡顿监测已启动，阈值 {self.threshold * 1000:.0f}ms")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._heartbeat.stop()
+        self._stopping.set()
+        self._thread.join(timeout=1)
+        self._thread = None
+
+    def _beat(self):
+        self._last_beat = time.perf_counter()
+
+    # ---------- 监测线程 ----------
+
+    def _main_stack(self):
+        frame = sys._current_frames().get(self._main_thread)
+        if frame is None:
+            return []
+        return traceback.extract_stack(frame, limit=MAX_STACK_DEPTH)
+
+    def _run(self):
+        interval = HEARTBEAT_MS / 1000
+        stalled_since = None
+        samples = Counter()
+        stacks = {}
+        while not self._stopping.wait(SAMPLE_INTERVAL):
+            beat = self._last_beat
+            if time.perf_counter() - beat > interval + self.threshold:
+                if stalled_since is None:
+                    stalled_since = beat + interval
+                    samples.clear()
+                    stacks.clear()
+                stack = self._main_stack()
+                site = _call_site(stack)
+                samples[site] += 1
+                stacks[site] = stack
+            elif stalled_since is not None:
+                if samples:
+                    self._record(stalled_since, beat, samples, stacks)
+                stalled_since = None
+
+    def _record(self, started, ended, samples, stacks):
+        duration = max(0.0, ended - started)
+        site_key, hits = samples.most_common(1)[0]
+        stack = traceback.format_list(stacks[site_key])
+        with self._lock:
+            site = self.sites.get(site_key)
+            if site is None:
+                site = self.sites[site_key] = StallSite(*site_key)
+            site.count += 1
+            site.total += duration
+            site.peak = max(site.peak, duration)
+            site.stack = stack
+            count = site.count
+
+        entry, hotspot = site_key
+        if count == 1:
+            logger.warning(f"界面卡顿 {duration * 1000:.0f}ms：{entry} -> {hotspot}\n{''.join(stack)}")
+        else:
+            logger.warning(f"界面卡顿 {duration * 1000:.0f}ms：{entry} -> {hotspot}（该位置第 {count} 次）")
+
+        if self.profiler is not None and self.profiler.enabled:
+            others = {f'{e} -> {h}': n for (e, h), n in samples.items() if (e, h) != site_key}
+            args = {'entry': entry, 'hotspot': hotspot, 'samples': hits}
+            if others:
+                args['other_sites'] = others
+            self.profiler.record('界面卡顿', 'stall', started, ended, args, thread=self._main_thread)
+
+    # ---------- 汇总 ----------
+
+    def summary(self, limit=None) -> list:
+        """按卡顿总时长排序的各调用位置统计"""
+        with self._lock:
+            sites = sorted(self.sites.values(), key=lambda site: site.total, reverse=True)
+            return [site.to_dict() for site in sites[:limit]]
+
+    def log_summary(self, limit=10):
+        sites = self.summary(limit)
+        if not sites:
+            return
+        lines = [f"  {site['total_ms']:>8.0f}ms {site['count']:>4}次 最长 {site['max_ms']:.0f}ms  "
+                 f"{site['entry']} -> {site['hotspot']}" for site in sites]
+        logger.info("界面卡顿汇总（按总时长）：\n" + '\n'.join(lines))
+
+    def export(self, path=None) -> str:
+        """将汇总写入 JSON 文件，返回文件路径"""
+        if path is None:
+            os.makedirs(TRACE_DIR, exist_ok=True)
+            path = os.path.join(TRACE_DIR, time.strftime('stalls-%Y%m%d-%H%M%S.json'))
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'threshold_ms': self.threshold * 1000, 'sites': self.summary()}, f,
+                      ensure_ascii=False, indent=2)
+        logger.info(f"已导出界面卡顿汇总: {path}")
+        return path
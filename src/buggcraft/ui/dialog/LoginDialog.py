@@ -8,9 +8,10 @@ from PySide6.QtWidgets import (
     QWidget, QApplication, QFrame, QGraphicsDropShadowEffect
 )
 from PySide6.QtCore import Qt, QTimer, Signal
-from PySide6.QtGui import QColor, QPalette, QMouseEvent, QPixmap
+from PySide6.QtGui import QColor, QPalette, QMouseEvent
 
 from core.auth.microsoft import MicrosoftAuthenticator, MinecraftSignals
+from ui.cache.resources import get_image_resources
 
 
 class LoginWaitDialog(QDialog):
@@ -48,26 +49,18 @@ class LoginWaitDialog(QDialog):
 
         title_layout = QHBoxLayout()
         self.title_icon = QLabel()
-        self.title_icon.setPixmap(QPixmap(os.path.abspath(
+        self.title_icon.setPixmap(get_image_resources().scaled(os.path.abspath(
             os.path.join(self.resource_path, 'images', 'login', 'start-logging.png')
-        )).scaled(
-            20, 23,
-            Qt.IgnoreAspectRatio,
-            Qt.SmoothTransformation
-        ))
+        ), 20, 23))
         self.title_icon.setStyleSheet(f"background-color: transparent;")
         self.title_icon.setAlignment(Qt.AlignCenter)
 
         # 添加Minecraft图标
         self.minecraft_icon = QLabel()
         minecraft_icon_path = os.path.abspath(os.path.join(self.resource_path, 'images', 'user', 'logo_minecraft.png'))
-        minecraft_pixmap = QPixmap(minecraft_icon_path)
+        minecraft_pixmap = get_image_resources().scaled(minecraft_icon_path, 13, 16)
         if not minecraft_pixmap.isNull():
-            self.minecraft_icon.setPixmap(minecraft_pixmap.scaled(
-                13, 16,
-                Qt.IgnoreAspectRatio,
-                Qt.SmoothTransformation
-            ))
+            self.minecraft_icon.setPixmap(minecraft_pixmap)
         self.minecraft_icon.setStyleSheet("background-color: transparent;")
         self.minecraft_icon.setAlignment(Qt.AlignCenter)
 
@@ -1,9 +1,11 @@
 # 基础页面类
 from PySide6.QtWidgets import QWidget, QVBoxLayout
-from PySide6.QtGui import QPixmap, QPainter
+from PySide6.QtGui import QPainter
 from PySide6.QtCore import Qt
 import os
 from config.settings import get_settings_manager
+from ui.cache.pixmap import get_render_cache, draw_scaled
+from ui.cache.resources import get_image_resources
 
 import logging
 logger = logging.getLogger(__name__)
@@ -25,22 +27,15 @@ class BasePage(QWidget):
         """设置页面背景图片"""
         full_path = os.path.abspath(os.path.join(self.resource_path, image_path))
         if os.path.exists(full_path):
-            self.bg_image = QPixmap(full_path)
+            self.bg_image = get_image_resources().pixmap(full_path)
         else:
             logger.info(f"背景图片不存在: {full_path}")
             
     def paintEvent(self, event):
         """重绘事件 - 绘制背景"""
         if self.bg_image:
-            painter = QPainter(self)
-            # 缩放图片以适应窗口
-            scaled = self.bg_image.scaled(
-                self.size(),
-                Qt.KeepAspectRatioByExpanding,
-                Qt.SmoothTransformation
-            )
-            # 居中绘制
-            x = (self.width() - scaled.width()) // 2
-            y = (self.height() - scaled.height()) // 2
-            painter.drawPixmap(x, y, scaled)
+            with get_render_cache().paint_timer(type(self).__name__):
+                painter = QPainter(self)
+                # 缩放结果按尺寸缓存，只在页面尺寸变化时重新缩放；只绘制需要重绘的区域
+                draw_scaled(painter, self, self.bg_image, Qt.KeepAspectRatioByExpanding, event.rect())
         super().paintEvent(event)
@@ -1,9 +1,26 @@
 # src/buggcraft/ui/pages/multiplayer_page.py
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                              QLineEdit, QPushButton, QScrollArea)
-from PySide6.QtCore import Qt, Signal
-from ..widgets.cards import QMCard
+                              QLineEdit, QPushButton)
+from PySide6.QtCore import Qt, Signal, QTimer
+from ..widgets.server_list import ServerListModel, ServerListView
 from .base_page import BasePage
+from config.constants import SERVER_STATUS_CACHE
+from core.multiplayer.worker import (ServerPingThread, LanDiscoveryThread, TunnelThread, RouteProbeThread,
+                                     SearchIndexThread)
+from core.multiplayer.probe import best_route, TARGET_RELAY
+from core.multiplayer.ping import parse_address
+from core.multiplayer.tunnel import DEFAULT_RELAY_PORT
+from utils.progress import format_bytes
+from core.multiplayer.status_cache import ServerStatusCache, cache_key
+from core.multiplayer.search import ServerSearchIndex
+from ..cache.favicon import FaviconCache
+
+# 后台检查过期状态的间隔（毫秒）
+STATUS_REFRESH_INTERVAL = 10 * 1000
+# 每页显示的服务器数量
+PAGE_SIZE = 50
+# 服务器数量达到该值时在后台线程中建立搜索索引
+INDEX_THREAD_THRESHOLD = 500
 
 class MultiplayerPage(BasePage):
     """联机大厅页面 - 继承BasePage"""
@@ -14,8 +31,26 @@ class MultiplayerPage(BasePage):
     def __init__(self, home_path, scale_ratio=1.0, parent=None):
         super().__init__(home_path, scale_ratio, parent)
         self.current_page = 1
-        self.total_pages = 5
+        self.total_pages = 1
         self.servers = []  # 服务器列表
+        self.lan_servers = []  # 局域网世界（由局域网发现实时维护）
+        self.results = []  # 当前搜索结果（已排序），分页从中切片
+        self.search_index = ServerSearchIndex()
+        self.index_generation = 0  # 每次重建索引加一，忽略过期的后台建立结果
+        self.index_pending = None  # 后台建立索引期间的增量修改，换上新索引前补做
+        self.ping_thread = None
+        self.lan_thread = None
+        self.tunnel_thread = None
+        self.probe_thread = None
+        self.probe_stats = {}  # 缓存键 -> 收藏服务器的探测摘要
+        self.relay_stats = {}  # 中继地址 -> 探测摘要
+        self.status_cache = ServerStatusCache(SERVER_STATUS_CACHE)
+        self.favicon_cache = FaviconCache(self.status_cache.favicon_dir, parent=self)
+
+        # 页面可见时定期刷新过期的服务器状态（条目有效期带随机抖动，刷新会自然错开）
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(STATUS_REFRESH_INTERVAL)
+        self.refresh_timer.timeout.connect(self.refresh_server_status)
         self.init_ui()
         self.load_sample_servers()
         
@@ -45,6 +80,7 @@ class MultiplayerPage(BasePage):
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("输入服务器名称或描述")
         self.search_input.setStyleSheet("background-color: rgba(255, 255, 255, 0.1); color: #ffffff;")
+        self.search_input.textChanged.connect(self.on_search)
         search_layout.addWidget(self.search_input)
         
         self.search_btn = QPushButton("搜索")
@@ -63,27 +99,37 @@ class MultiplayerPage(BasePage):
         search_layout.addWidget(self.search_btn)
         
         content_layout.addLayout(search_layout)
-        
-        # 服务器列表区域
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setStyleSheet("""
-            QScrollArea {
-                background-color: transparent;
+
+        # 内网穿透：把局域网世界通过中继分享给好友
+        tunnel_layout = QHBoxLayout()
+        self.tunnel_btn = QPushButton("分享局域网世界")
+        self.tunnel_btn.clicked.connect(self.toggle_tunnel)
+        self.tunnel_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #4a4a4a;
+                color: #ffffff;
                 border: none;
+                padding: 5px 10px;
             }
-            QScrollArea > QWidget > QWidget {
-                background-color: transparent;
+            QPushButton:hover {
+                background-color: #5a5a5a;
             }
         """)
+        tunnel_layout.addWidget(self.tunnel_btn)
+        self.tunnel_label = QLabel("")
+        self.tunnel_label.setStyleSheet("color: #aaaaaa;")
+        self.tunnel_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        tunnel_layout.addWidget(self.tunnel_label)
+        tunnel_layout.addStretch()
+        content_layout.addLayout(tunnel_layout)
         
-        self.server_list_widget = QWidget()
-        self.server_list_layout = QVBoxLayout(self.server_list_widget)
-        self.server_list_layout.setAlignment(Qt.AlignTop)
-        self.server_list_widget.setStyleSheet("background-color: transparent;")
-        
-        self.scroll_area.setWidget(self.server_list_widget)
-        content_layout.addWidget(self.scroll_area)
+        # 服务器列表区域（模型/视图，只绘制可见的行）
+        self.server_model = ServerListModel(self)
+        self.server_view = ServerListView()
+        self.server_view.setModel(self.server_model)
+        self.server_view.set_favicon_cache(self.favicon_cache)
+        self.server_view.server_selected.connect(self.select_server)
+        content_layout.addWidget(self.server_view)
         
         # 分页控件
         pagination_layout = QHBoxLayout()
@@ -108,7 +154,7 @@ class MultiplayerPage(BasePage):
         """)
         pagination_layout.addWidget(self.prev_btn)
         
-        self.page_label = QLabel("1/5")
+        self.page_label = QLabel("1/1")
         self.page_label.setStyleSheet("color: #ffffff; padding: 5px 10px;")
         pagination_layout.addWidget(self.page_label)
         
@@ -163,77 +209,341 @@ class MultiplayerPage(BasePage):
         self.display_servers()
     
     def display_servers(self):
-        """显示服务器列表"""
-        # 清空现有服务器列表
-        for i in reversed(range(self.server_list_layout.count())): 
-            widget = self.server_list_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
-        
-        # 添加服务器卡片
-        for server in self.servers:
-            card = QMCard(
-                server["name"],
-                server["address"],
-                server["players"],
-                server["max_players"],
-                server["ping"],
-                server["description"]
-            )
-            card.selected.connect(lambda s=server: self.select_server(s))
-            self.server_list_layout.addWidget(card)
+        """重建搜索索引并显示服务器列表"""
+        servers = self._all_servers()
+        # 先写入缓存的 MOTD 等信息，使其可以被搜索
+        for server in servers:
+            self._apply_cached(server)
+        self.index_generation += 1
+        if len(servers) < INDEX_THREAD_THRESHOLD:
+            self.index_pending = None
+            self.search_index.rebuild(servers)
+            self.update_results()
+            return
+        # 列表较大时在后台建立索引，建好之前继续使用旧索引
+        self.index_pending = []
+        thread = SearchIndexThread(servers, self.index_generation, parent=self)
+        thread.index_ready.connect(self.on_index_ready)
+        thread.finished.connect(thread.deleteLater)
+        thread.start()
+        self.update_results()
+
+    def on_index_ready(self, index, generation):
+        """后台建立的索引完成：补做期间的增量修改后换上"""
+        if generation != self.index_generation:
+            return
+        for method, server in self.index_pending or ():
+            getattr(index, method)(server)
+        self.index_pending = None
+        self.search_index = index
+        self.update_results()
+
+    def _update_index(self, method, server):
+        """增量更新搜索索引（add / update / remove），后台正在建立新索引时一并记录"""
+        getattr(self.search_index, method)(server)
+        if self.index_pending is not None:
+            self.index_pending.append((method, server))
+
+    def update_results(self, reset_page=False):
+        """按当前搜索词重新取得结果，并显示当前页"""
+        query = self.search_input.text()
+        # 没有搜索词时保持原有顺序（局域网世界在前）
+        self.results = self.search_index.search(query) if query.strip() else self._all_servers()
+        self.total_pages = max(1, -(-len(self.results) // PAGE_SIZE))
+        self.current_page = 1 if reset_page else min(self.current_page, self.total_pages)
+        self.show_page()
+        if self.probe_thread is not None:
+            self.probe_thread.set_targets(*self._probe_targets())
+        elif self.isVisible():
+            self.start_probe()
+
+    def show_page(self):
+        """显示当前页，只有这一页的服务器会进入模型并被 ping"""
+        start = (self.current_page - 1) * PAGE_SIZE
+        page = self.results[start:start + PAGE_SIZE]
+        for server in page:
+            self._apply_cached(server)
+        self.server_model.set_servers(page)
+        self.update_pagination()
+        if self.isVisible():
+            # 上一轮 ping 的可能是已经不在当前页的服务器
+            self.stop_refresh()
+            self.refresh_server_status()
+
+    def _all_servers(self):
+        """局域网世界在前，其后是服务器列表"""
+        return self.lan_servers + self.servers
+
+    def _apply_cached(self, server):
+        """有缓存时直接使用缓存的状态"""
+        entry = self.status_cache.get(server["address"])
+        if entry:
+            self._apply_entry(server, entry)
+        summary = self.probe_stats.get(cache_key(server["address"]))
+        if summary:
+            self._apply_probe(server, summary)
+
+    @staticmethod
+    def _apply_entry(server, entry):
+        """将缓存条目写入服务器数据"""
+        if entry.get("online"):
+            server["players"] = entry.get("players_online", 0)
+            server["max_players"] = entry.get("players_max", 0)
+            server["motd"] = entry.get("motd", "")
+            server["version"] = entry.get("version_name", "")
+            server["favicon_hash"] = entry.get("favicon_hash")
+        server["ping"] = entry.get("latency")
+        server["latency_history"] = entry.get("latency_history")
+
+    @staticmethod
+    def _apply_probe(server, summary):
+        """将探测摘要写入服务器数据（历史更长，覆盖缓存中的延迟历史）"""
+        server["latency_history"] = summary.get("history")
+        server["latency_p50"] = summary.get("p50")
+        server["latency_p90"] = summary.get("p90")
+        server["jitter"] = summary.get("jitter")
+        server["loss"] = summary.get("loss")
+
+    def refresh_server_status(self, force=False):
+        """
+        并发 ping 缺失或过期的服务器，结果到达时逐个更新卡片
+
+        :param force: 忽略缓存，刷新全部服务器
+        """
+        if self.ping_thread is not None:
+            if not force:
+                return  # 上一轮还未结束
+            self.stop_refresh()
+
+        addresses = [server["address"] for server in self.server_model.servers()]
+        if force:
+            self.status_cache.invalidate()
+        addresses = self.status_cache.stale(addresses)
+        if not addresses:
+            return
+
+        self.ping_thread = ServerPingThread(addresses, parent=self)
+        self.ping_thread.status_ready.connect(self.on_server_status)
+        self.ping_thread.finished.connect(self._on_ping_finished)
+        self.ping_thread.finished.connect(self.ping_thread.deleteLater)
+        self.ping_thread.start()
+
+    def _on_ping_finished(self):
+        if self.sender() is self.ping_thread:
+            self.ping_thread = None
+        self.status_cache.save()
+
+    def stop_refresh(self):
+        """停止正在进行的 ping"""
+        if self.ping_thread is not None:
+            try:
+                self.ping_thread.status_ready.disconnect(self.on_server_status)
+            except (RuntimeError, TypeError):
+                pass
+            self.ping_thread.stop()
+            self.ping_thread = None
+
+    def on_server_status(self, status):
+        """收到单个服务器的状态：写入缓存，只重绘指向该服务器的行"""
+        entry = self.status_cache.update(status)
+        key = cache_key(status.address)
+        for server in self.server_model.servers():
+            if cache_key(server["address"]) == key:
+                self._apply_entry(server, entry)
+                if key in self.probe_stats:
+                    self._apply_probe(server, self.probe_stats[key])
+                # MOTD 可能变化，增量更新索引（字段未变化时开销很小）
+                self._update_index('update', server)
+        self.server_model.refresh_key(key)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh_server_status()
+        self.refresh_timer.start()
+        self.start_lan_discovery()
+        self.start_probe()
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        self.stop_refresh()
+        self.stop_lan_discovery()
+        self.stop_probe()
+        self.status_cache.save()
+        super().hideEvent(event)
     
+    def start_lan_discovery(self):
+        """开始监听局域网世界广播"""
+        if self.lan_thread is not None:
+            return
+        self.lan_thread = LanDiscoveryThread(parent=self)
+        self.lan_thread.worlds_changed.connect(self.on_lan_worlds_changed)
+        self.lan_thread.finished.connect(self.lan_thread.deleteLater)
+        self.lan_thread.start()
+
+    def stop_lan_discovery(self):
+        """停止局域网发现并移除局域网世界"""
+        if self.lan_thread is not None:
+            try:
+                self.lan_thread.worlds_changed.disconnect(self.on_lan_worlds_changed)
+            except (RuntimeError, TypeError):
+                pass
+            self.lan_thread.stop()
+            self.lan_thread = None
+        if self.lan_servers:
+            self.on_lan_worlds_changed([])
+
+    def on_lan_worlds_changed(self, worlds):
+        """局域网世界出现、消失或 MOTD 变化"""
+        old_lan = self.lan_servers
+        self.lan_servers = [
+            {"name": f"[局域网] {world.motd}", "address": world.address, "players": 0,
+             "max_players": 0, "ping": None, "description": "局域网游戏", "lan": True, "port": world.port}
+            for world in worlds
+        ]
+        for server in old_lan:
+            self._update_index('remove', server)
+        for server in self.lan_servers:
+            self._apply_cached(server)
+            self._update_index('add', server)
+        self.update_results()
+
+    def _relay_addresses(self):
+        """设置中的中继服务器（多个时以逗号分隔）"""
+        relays = self.settings_manager.get_setting("multiplayer.tunnel.relay", "") or ""
+        return [relay.strip() for relay in relays.split(",") if relay.strip()]
+
+    def _probe_targets(self):
+        """需要持续探测的目标：收藏的服务器，以及配置了多个时的中继"""
+        favorites = [server["address"] for server in self.servers if server.get("favorite")]
+        relays = self._relay_addresses()
+        return favorites, relays if len(relays) > 1 else []
+
+    def start_probe(self):
+        """开始探测收藏服务器与中继的线路质量"""
+        if self.probe_thread is not None:
+            return
+        servers, relays = self._probe_targets()
+        if not servers and not relays:
+            return
+        self.probe_thread = RouteProbeThread(servers, relays, parent=self)
+        self.probe_thread.sample_ready.connect(self.on_probe_sample)
+        self.probe_thread.finished.connect(self.probe_thread.deleteLater)
+        self.probe_thread.start()
+
+    def stop_probe(self):
+        if self.probe_thread is not None:
+            try:
+                self.probe_thread.sample_ready.disconnect(self.on_probe_sample)
+            except (RuntimeError, TypeError):
+                pass
+            self.probe_thread.stop()
+            self.probe_thread = None
+
+    def on_probe_sample(self, address, summary):
+        """收到一次探测结果：中继记录下来用于选择线路，服务器更新卡片上的延迟历史"""
+        if summary.get("kind") == TARGET_RELAY:
+            self.relay_stats[address] = summary
+            return
+        key = cache_key(address)
+        self.probe_stats[key] = summary
+        for server in self.server_model.servers():
+            if cache_key(server["address"]) == key:
+                self._apply_probe(server, summary)
+        self.server_model.refresh_key(key)
+
+    def toggle_tunnel(self):
+        if self.tunnel_thread is not None:
+            self.stop_tunnel()
+        else:
+            self.start_tunnel()
+
+    def start_tunnel(self, local_port=None):
+        """
+        通过中继开放本地世界
+
+        :param local_port: 本地世界端口，默认使用发现的第一个局域网世界
+        """
+        if self.tunnel_thread is not None:
+            return
+        relays = self._relay_addresses()
+        if not relays:
+            self.tunnel_label.setText("请先在设置中配置中继服务器")
+            return
+        # 配置了多个中继时选择探测结果最好的一个，尚无足够样本时使用第一个
+        relay = best_route({address: self.relay_stats.get(address) for address in relays}) or relays[0]
+        if local_port is None:
+            if not self.lan_servers:
+                self.tunnel_label.setText("未发现局域网世界，请先在游戏中对局域网开放")
+                return
+            local_port = self.lan_servers[0]["port"]
+
+        relay_host, relay_port = parse_address(relay, DEFAULT_RELAY_PORT)
+        self.tunnel_thread = TunnelThread(
+            relay_host, relay_port, local_port,
+            token=self.settings_manager.get_setting("multiplayer.tunnel.token", ""),
+            parent=self,
+        )
+        self.tunnel_thread.ready.connect(self.on_tunnel_ready)
+        self.tunnel_thread.metrics_updated.connect(self.on_tunnel_metrics)
+        self.tunnel_thread.error.connect(self.on_tunnel_error)
+        self.tunnel_thread.finished.connect(self._on_tunnel_finished)
+        self.tunnel_thread.finished.connect(self.tunnel_thread.deleteLater)
+        self.tunnel_thread.start()
+        self.tunnel_btn.setText("停止分享")
+        self.tunnel_label.setText(f"正在连接中继 {relay_host}:{relay_port}...")
+
+    def stop_tunnel(self):
+        if self.tunnel_thread is not None:
+            self.tunnel_thread.stop()
+
+    def _on_tunnel_finished(self):
+        if self.sender() is self.tunnel_thread:
+            self.tunnel_thread = None
+        self.tunnel_btn.setText("分享局域网世界")
+        if not self.tunnel_label.text().startswith("隧道出错"):
+            self.tunnel_label.setText("")
+
+    def on_tunnel_ready(self, public_address):
+        self.tunnel_label.setText(f"好友可通过 {public_address} 加入")
+
+    def on_tunnel_error(self, message):
+        self.tunnel_label.setText(f"隧道出错: {message}")
+
+    def on_tunnel_metrics(self, metrics):
+        """显示隧道的延迟、连接数与吞吐量"""
+        streams = metrics.get("streams", [])
+        rtt = metrics.get("rtt")
+        rate_in = sum(stream["rate_in"] for stream in streams)
+        rate_out = sum(stream["rate_out"] for stream in streams)
+        text = (f"好友可通过 {metrics.get('public_address')} 加入 | "
+                f"延迟: {'-' if rtt is None else f'{rtt:.0f}ms'} | 连接: {len(streams)} | "
+                f"↑ {format_bytes(rate_out)}/s ↓ {format_bytes(rate_in)}/s")
+        self.tunnel_label.setText(text)
+        self.tunnel_label.setToolTip("\n".join(
+            f"{stream['peer'] or stream['stream_id']}: ↑ {format_bytes(stream['bytes_out'])} "
+            f"↓ {format_bytes(stream['bytes_in'])}，窗口暂停 {stream['stalls']} 次"
+            for stream in streams
+        ))
+
     def select_server(self, server):
         """选择服务器"""
         self.server_selected.emit(server)
     
     def on_search(self):
-        """搜索服务器"""
-        search_text = self.search_input.text().lower()
-        if not search_text:
-            # 如果搜索文本为空，显示所有服务器
-            self.display_servers()
-            return
-        
-        # 过滤服务器
-        filtered_servers = [
-            server for server in self.servers
-            if search_text in server["name"].lower() or 
-               search_text in server["description"].lower()
-        ]
-        
-        # 清空现有服务器列表
-        for i in reversed(range(self.server_list_layout.count())): 
-            widget = self.server_list_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
-        
-        # 添加过滤后的服务器卡片
-        for server in filtered_servers:
-            card = QMCard(
-                server["name"],
-                server["address"],
-                server["players"],
-                server["max_players"],
-                server["ping"],
-                server["description"]
-            )
-            card.selected.connect(lambda s=server: self.select_server(s))
-            self.server_list_layout.addWidget(card)
+        """搜索服务器（查询索引，结果按相关度排序后分页）"""
+        self.update_results(reset_page=True)
     
     def prev_page(self):
         """上一页"""
         if self.current_page > 1:
             self.current_page -= 1
-            self.update_pagination()
-            # 这里可以添加加载对应页面数据的逻辑
+            self.show_page()
     
     def next_page(self):
         """下一页"""
         if self.current_page < self.total_pages:
             self.current_page += 1
-            self.update_pagination()
-            # 这里可以添加加载对应页面数据的逻辑
+            self.show_page()
     
     def update_pagination(self):
         """更新分页状态"""
@@ -249,17 +559,25 @@ class MultiplayerPage(BasePage):
     def add_server(self, server):
         """添加服务器"""
         self.servers.append(server)
-        self.display_servers()
+        self._apply_cached(server)
+        self._update_index('add', server)
+        self.update_results()
     
     def remove_server(self, server_name):
         """移除服务器"""
+        for server in self.servers:
+            if server["name"] == server_name:
+                self._update_index('remove', server)
         self.servers = [s for s in self.servers if s["name"] != server_name]
-        self.display_servers()
+        self.update_results()
     
     def update_server(self, server_name, updated_server):
         """更新服务器信息"""
         for i, server in enumerate(self.servers):
             if server["name"] == server_name:
                 self.servers[i] = updated_server
+                self._update_index('remove', server)
+                self._apply_cached(updated_server)
+                self._update_index('add', updated_server)
                 break
-        self.display_servers()
+        self.update_results()
@@ -656,6 +656,14 @@ class SettingsPage(BasePage):
         else:
             logger.info(f"保存设置失败: {key} = {value}")
     
+    def is_busy(self):
+        """是否有尚未完成的后台任务（如 Java 搜索）"""
+        thread = getattr(self, 'search_thread', None)
+        try:
+            return thread is not None and thread.isRunning()
+        except RuntimeError:  # 线程结束后对象已被删除
+            return False
+
     def save_all_settings(self):
         """显式保存所有设置（可用于点击保存按钮时）"""
         # 这里可以添加一些验证逻辑
@@ -6,7 +6,7 @@ from PySide6.QtCore import Qt, Signal
 from ..widgets.buttons import QMStartButton
 from .base_page import BasePage
 from utils.helpers import get_physical_resolution
-from core.launcher import MinecraftLibLauncher
+from core.launcher import MinecraftLibLauncher, STOP_STATE_TEXT, STOP_DONE
 
 import logging
 logger = logging.getLogger(__name__)
@@ -25,6 +25,7 @@ class SinglePlayerPage(BasePage):
         self.launcher.signals.started.connect(self.minecraft_handle_started)
         self.launcher.signals.stopped.connect(self.minecraft_handle_stopped)
         self.launcher.signals.error.connect(self.minecraft_handle_error)
+        self.launcher.signals.stop_progress.connect(self.minecraft_handle_stop_progress)
         self.current_client = False  # 游戏是否启动
 
         self.launch_btn = None
@@ -106,10 +107,9 @@ class SinglePlayerPage(BasePage):
             # 启动线程
             self.launcher.start()
         else:
-            # 游戏已启动 - 停止过程
-            from PySide6.QtWidgets import QApplication
+            # 游戏已启动 - 停止过程（在后台线程中进行，结束后由 stopped 信号恢复按钮）
+            self.launch_btn.setEnabled(False)
             self.launch_btn.set_texts(f"正在停止游戏...", self.launcher.version)
-            QApplication.processEvents()
             self.launcher.stop()
 
     def set_minecraft_version(self, version):
@@ -146,6 +146,11 @@ class SinglePlayerPage(BasePage):
         QTimer.singleShot(1000, lambda: handle_status(exit_code))
 
     
+    def minecraft_handle_stop_progress(self, state, remaining):
+        """停止进度处理"""
+        if state != STOP_DONE:
+            self.launch_btn.set_texts(f"{STOP_STATE_TEXT[state]}...", self.launcher.version)
+
     def minecraft_handle_error(self, message):
         """错误处理"""
         logger.info(f'minecraft_handle_error {message}')
@@ -1 +1,109 @@
-# 主题定义
\ No newline at end of file
+# 主题定义
+
+import functools
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# 主题颜色
+THEMES = {
+    'dark': {
+        'text': '#f8f8f8',
+        'text_button': '#f2f2f2',
+        'text_white': '#FFFFFF',
+        'avatar_background': '#2b2b2b',
+        'avatar_border': '#7859FF',
+        'avatar_border_logout': '#ffffff',
+        'button_switch': '#2A2C3E',
+        'button_login': '#7959FF',
+        'button_border': '#000000',
+    },
+}
+DEFAULT_THEME = 'dark'
+
+# 应用级样式表：控件以 objectName / role 属性区分，状态通过动态属性 state 切换，
+# 状态变化时无需重新解析样式表
+_STYLESHEET = """
+QLabel[role="buttonText"] {{
+    color: {text_button};
+    background-color: transparent;
+}}
+
+QLabel#userAvatar {{
+    background-color: {avatar_background};
+    border: none;
+}}
+QLabel#userAvatar[state="logged_in"] {{
+    border-radius: 0px;
+    border: 2px solid {avatar_border};
+}}
+QLabel#userAvatar[state="logged_out"] {{
+    border: 2px solid {avatar_border_logout};
+}}
+
+QLabel#usernameLabel {{
+    color: {text};
+}}
+QLabel#usernameLabel[state="logged_out"] {{
+    font-weight: bold;
+}}
+
+QLabel#legalLoginButton {{
+    background-color: transparent;
+}}
+QLabel#legalLoginButton[state="switch_account"],
+QLabel#legalLoginButton[state="login"] {{
+    color: {text_white};
+    font-weight: bold;
+    border: 1px solid {button_border};
+    border-radius: 0px;
+}}
+QLabel#legalLoginButton[state="switch_account"] {{
+    background: {button_switch};
+}}
+QLabel#legalLoginButton[state="login"] {{
+    background: {button_login};
+}}
+
+QMStartButton, QMStartButton QWidget {{
+    background: transparent;
+    border-radius: 4px;
+    margin: 0;
+    padding: 0;
+}}
+"""
+
+
+@functools.lru_cache
+def compile_stylesheet(theme=DEFAULT_THEME) -> str:
+    """生成主题的样式表（每个主题只生成一次）"""
+    return _STYLESHEET.format(**THEMES[theme])
+
+
+def apply_theme(app, theme=DEFAULT_THEME):
+    """在应用级别设置样式表，整个程序只解析一次"""
+    app.setStyleSheet(compile_stylesheet(theme))
+    logger.info(f"已应用主题: {theme}")
+
+
+def set_state(widget, value, name='state'):
+    """
+    切换控件的状态属性
+
+    只对该控件重新应用样式（unpolish/polish），不会重新解析样式表，也不影响子控件；
+    状态未变化时什么都不做。
+    """
+    if widget.property(name) == value:
+        return
+    widget.setProperty(name, value)
+    style = widget.style()
+    style.unpolish(widget)
+    style.polish(widget)
+    widget.update()
+
+
+def set_role(widget, role):
+    """标记控件的样式角色（创建控件时调用）"""
+    widget.setProperty('role', role)
+    return widget
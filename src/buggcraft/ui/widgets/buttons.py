@@ -3,7 +3,11 @@
 import os
 from PySide6.QtWidgets import (QWidget, QLabel, QVBoxLayout, QHBoxLayout)
 from PySide6.QtCore import Qt, Signal
-from PySide6.QtGui import QFont, QPixmap, QPainter, QPalette
+from PySide6.QtGui import QFont, QPainter, QPalette
+
+from ui.cache.pixmap import get_render_cache, draw_scaled
+from ui.cache.resources import get_image_resources
+from ui.styles.themes import set_state
 
 
 class QMButton(QLabel):
@@ -49,12 +53,7 @@ class QMButton(QLabel):
         
         # 设置背景图片
         if self.background_image and os.path.exists(self.background_image):
-            self.setPixmap(QPixmap(self.background_image).scaled(
-                self._size_w * self.scale_ratio,
-                self._size_h * self.scale_ratio,
-                Qt.IgnoreAspectRatio,
-                Qt.SmoothTransformation
-            ))
+            self.setPixmap(get_image_resources().scaled(self.background_image, self._size_w * self.scale_ratio, self._size_h * self.scale_ratio))
         else:
             self.setStyleSheet(self.background_color)
         
@@ -77,12 +76,7 @@ class QMButton(QLabel):
         w, h = self.icon_size
         self.icon_label = QLabel()
         if self.icon and os.path.exists(self.icon):
-            self.icon_label.setPixmap(QPixmap(self.icon).scaled(
-                w * self.scale_ratio,
-                h * self.scale_ratio,
-                Qt.IgnoreAspectRatio,
-                Qt.SmoothTransformation
-            ))
+            self.icon_label.setPixmap(get_image_resources().scaled(self.icon, w * self.scale_ratio, h * self.scale_ratio))
         self.icon_label.setStyleSheet(f"background-color: transparent;")
         self.icon_label.setAlignment(Qt.AlignCenter)
         
@@ -118,22 +112,12 @@ class QMButton(QLabel):
         """设置按钮图标"""
         w, h = self.icon_size
         if os.path.exists(icon_path):
-            self.icon_label.setPixmap(QPixmap(icon_path).scaled(
-                w * self.scale_ratio, 
-                h * self.scale_ratio, 
-                Qt.IgnoreAspectRatio, 
-                Qt.SmoothTransformation
-            ))
+            self.icon_label.setPixmap(get_image_resources().scaled(icon_path, w * self.scale_ratio, h * self.scale_ratio))
     
     def setBackground(self, bg_path):
         """设置按钮背景"""
         if os.path.exists(bg_path):
-            self.setPixmap(QPixmap(bg_path).scaled(
-                self._size_w * self.scale_ratio,
-                self._size_h * self.scale_ratio,
-                Qt.IgnoreAspectRatio,
-                Qt.SmoothTransformation
-            ))
+            self.setPixmap(get_image_resources().scaled(bg_path, self._size_w * self.scale_ratio, self._size_h * self.scale_ratio))
     
     def enterEvent(self, event):
         """鼠标进入事件 - 添加悬停效果"""
@@ -223,48 +207,26 @@ class QMStartButton(QWidget):
         if self.resource_path:
             bg_image_path = os.path.abspath(os.path.join(self.resource_path, 'images', 'user', 'start_game_btn.png'))
         if os.path.exists(bg_image_path):
-            self.bg_pixmap = QPixmap(bg_image_path)
-            if self.bg_pixmap and not self.bg_pixmap.isNull():
-                self.bg_pixmap = self.bg_pixmap.scaled(
-                    239, 74, 
-                    Qt.KeepAspectRatio, 
-                    Qt.SmoothTransformation
-                )
+            # 保留原图，按设备像素比缩放的结果由渲染缓存提供
+            self.bg_pixmap = get_image_resources().pixmap(bg_image_path)
     
     def paintEvent(self, event):
         """绘制背景图片"""
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        
-        if self.bg_pixmap and not self.bg_pixmap.isNull():
-            # 计算居中位置
-            x = (self.width() - self.bg_pixmap.width()) // 2
-            y = (self.height() - self.bg_pixmap.height()) // 2
-            painter.drawPixmap(x, y, self.bg_pixmap)
+        with get_render_cache().paint_timer("QMStartButton"):
+            painter = QPainter(self)
+            painter.setRenderHint(QPainter.Antialiasing)
+            # 居中绘制（缩放结果已缓存）
+            draw_scaled(painter, self, self.bg_pixmap, Qt.KeepAspectRatio, event.rect())
         
         super().paintEvent(event)
     
     def set_start_style(self):
         """启动游戏样式"""
-        self.setStyleSheet(f"""
-            QWidget {{
-                background: transparent;
-                border-radius: 4px;
-                margin: 0;
-                padding: 0;
-            }}
-        """)
+        set_state(self, "start")
     
     def set_stop_style(self):
         """停止游戏样式"""
-        self.setStyleSheet(f"""
-            QWidget {{
-                background-color: transparent;
-                border-radius: 4px;
-                margin: 0;
-                padding: 0;
-            }}
-        """)
+        set_state(self, "stop")
 
     def adjust_container_position(self, spacing):
         """根据间距调整文本容器位置"""
@@ -1,8 +1,10 @@
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, QSizePolicy
-from PySide6.QtGui import QPixmap, QPainter, QColor
+from PySide6.QtGui import QPainter, QColor
 from PySide6.QtCore import Qt
 import os
 
+from ui.cache.resources import get_image_resources
+
 
 import logging
 logger = logging.getLogger(__name__)
@@ -107,10 +109,10 @@ class QMCard(QWidget):
         if icon and os.path.exists(icon):
             icon_label = QLabel()
             icon_label.setStyleSheet("background-color: transparent;")
-            pixmap = QPixmap(icon)
+            pixmap = get_image_resources().scaled(icon, 28, 28, Qt.KeepAspectRatio)
             if not pixmap.isNull():
                 # 设置图标大小为16x16，居中显示
-                icon_label.setPixmap(pixmap.scaled(28, 28, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+                icon_label.setPixmap(pixmap)
                 icon_label.setAlignment(Qt.AlignCenter)
                 icon_label.setFixedSize(28, 28)  # 固定图标大小
             title_layout.addWidget(icon_label)
@@ -44,28 +44,53 @@ class QMCard(QFrame):
         info_layout = QHBoxLayout()
         
         # 玩家数量
-        players_label = QLabel(f"玩家: {self.players}/{self.max_players}")
-        players_label.setStyleSheet("color: #aaaaaa;")
-        info_layout.addWidget(players_label)
+        self.players_label = QLabel()
+        self.players_label.setStyleSheet("color: #aaaaaa;")
+        info_layout.addWidget(self.players_label)
         
         # 延迟
-        ping_label = QLabel(f"延迟: {self.ping}ms")
-        if self.ping < 50:
-            ping_label.setStyleSheet("color: #4CAF50;")
-        elif self.ping < 100:
-            ping_label.setStyleSheet("color: #FFC107;")
-        else:
-            ping_label.setStyleSheet("color: #F44336;")
-        info_layout.addWidget(ping_label)
+        self.ping_label = QLabel()
+        info_layout.addWidget(self.ping_label)
+        self._refresh_info()
         
         info_layout.addStretch()
         layout.addLayout(info_layout)
         
         # 描述
-        desc_label = QLabel(self.description)
-        desc_label.setStyleSheet("color: #cccccc;")
-        desc_label.setWordWrap(True)
-        layout.addWidget(desc_label)
+        self.desc_label = QLabel(self.description)
+        self.desc_label.setStyleSheet("color: #cccccc;")
+        self.desc_label.setWordWrap(True)
+        layout.addWidget(self.desc_label)
+
+    def _refresh_info(self):
+        """刷新玩家数量与延迟显示"""
+        self.players_label.setText(f"玩家: {self.players}/{self.max_players}")
+        if self.ping is None:
+            self.ping_label.setText("延迟: 离线")
+            self.ping_label.setStyleSheet("color: #888888;")
+            return
+        self.ping_label.setText(f"延迟: {self.ping}ms")
+        if self.ping < 50:
+            self.ping_label.setStyleSheet("color: #4CAF50;")
+        elif self.ping < 100:
+            self.ping_label.setStyleSheet("color: #FFC107;")
+        else:
+            self.ping_label.setStyleSheet("color: #F44336;")
+
+    def update_status(self, players, max_players, ping, description=None):
+        """
+        更新服务器状态（由 Ping 结果驱动）
+
+        :param ping: 延迟（毫秒），None 表示离线
+        :param description: 新的描述（MOTD），为 None 时保持不变
+        """
+        self.players = players
+        self.max_players = max_players
+        self.ping = ping
+        self._refresh_info()
+        if description:
+            self.description = description
+            self.desc_label.setText(description)
     
     def mousePressEvent(self, event):
         """点击选择服务器"""
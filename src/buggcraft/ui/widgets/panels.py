@@ -5,13 +5,16 @@ from PySide6.QtWidgets import (
     QWidget, QLabel, QLineEdit, QVBoxLayout, QHBoxLayout, QGraphicsOpacityEffect, QMessageBox
 )
 from PySide6.QtCore import Qt, Signal, QSize, QEasingCurve, QPropertyAnimation, QPoint, QRect, QParallelAnimationGroup, QTimer
-from PySide6.QtGui import QFont, QPixmap, QColor, QPainter
+from PySide6.QtGui import QFont, QColor, QPainter
 
 from core.auth.microsoft import MicrosoftAuthenticator, MinecraftSignals
 from ui.widgets.user_widget import QMWidget
 from ui.widgets.buttons import QMButton
 from ui.dialog.LoginDialog import LoginWaitDialog
 from config.settings import get_settings_manager
+from ui.cache.resources import get_image_resources
+from ui.styles.themes import set_state, set_role
+from ui.debug.profiler import get_profiler
 
 
 import logging
@@ -109,7 +112,7 @@ class UserPanel(QWidget):
         self.minecraft_logo.setAlignment(Qt.AlignCenter)
         minecraft_logo_path = os.path.abspath(os.path.join(self.resource_path, 'images', 'user', 'MINECRAFT.png'))
         if os.path.exists(minecraft_logo_path):
-            minecraft_pixmap = QPixmap(minecraft_logo_path)
+            minecraft_pixmap = get_image_resources().pixmap(minecraft_logo_path)
             if not minecraft_pixmap.isNull():
                 self.minecraft_logo.setPixmap(minecraft_pixmap)
                 self.minecraft_logo.setFixedSize(minecraft_pixmap.size())
@@ -123,18 +126,13 @@ class UserPanel(QWidget):
         self.avatar = QLabel()
         self.avatar.setAlignment(Qt.AlignCenter)
         self.avatar.setFixedSize(80, 80)
-        self.avatar.setStyleSheet("""
-            QLabel {
-                background-color: #2b2b2b;
-                border: none;
-            }
-        """)
+        self.avatar.setObjectName("userAvatar")
         # 设置默认头像
         default_avatar_path = os.path.abspath(os.path.join(self.resource_path, 'images', 'user', 'unlogged_avatar.png'))
         if os.path.exists(default_avatar_path):
-            pixmap = QPixmap(default_avatar_path)
+            pixmap = get_image_resources().scaled(default_avatar_path, 80, 80)
             if not pixmap.isNull():
-                self.avatar.setPixmap(pixmap.scaled(80, 80, Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+                self.avatar.setPixmap(pixmap)
                 logger.info(f"初始化时加载默认头像: unlogged_avatar.png")
             else:
                 logger.error(f"默认头像加载失败，图片格式可能有问题: {default_avatar_path}")
@@ -145,7 +143,7 @@ class UserPanel(QWidget):
         self.username_label = QLabel("未登录")
         self.username_label.setFont(QFont("Source Han Sans CN Heavy", 8))
         self.username_label.setAlignment(Qt.AlignCenter)
-        self.username_label.setStyleSheet(" color: #f8f8f8;")
+        self.username_label.setObjectName("usernameLabel")
         
         # 离线登录状态标签（仅在离线登录时显示）
         # self.offline_status_label = QLabel("离线登录")
@@ -192,6 +190,7 @@ class UserPanel(QWidget):
             230, 40,
             font_size=10
         )
+        self.legal_login_btn.setObjectName("legalLoginButton")
         
         # 创建启动游戏按钮 
         self.start_game_btn = None
@@ -354,14 +353,12 @@ class UserPanel(QWidget):
         button = QLabel()
         button.mousePressEvent = lambda event: click_handler()
         button.setFixedSize(width, height)
-        button.setPixmap(QPixmap(image_path).scaled(
-            width, height, Qt.IgnoreAspectRatio, Qt.SmoothTransformation
-        ))
+        button.setPixmap(get_image_resources().scaled(image_path, width, height))
         
         text_label = QLabel(text, button)
         text_label.setFont(QFont("Source Han Sans CN Heavy", font_size))
         text_label.setAlignment(Qt.AlignCenter)
-        text_label.setStyleSheet("color: #f2f2f2; background-color: transparent;")
+        set_role(text_label, "buttonText")
         text_label.setGeometry(0, 0, width, height)
         
         return button
@@ -397,7 +394,7 @@ class UserPanel(QWidget):
         
         if is_active:
             # 激活状态显示背景图片
-            btn.setPixmap(QPixmap(active_image).scaled(155, 44, Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+            btn.setPixmap(get_image_resources().scaled(active_image, 155, 44))
         else:
             # 未激活状态保持透明背景
             btn.clear()  # 清除背景图片
@@ -413,9 +410,9 @@ class UserPanel(QWidget):
                 # 已登录状态：显示offline_login.png背景和用户信息
                 offline_avatar_path = os.path.abspath(os.path.join(self.resource_path, 'images', 'user', 'offline_login.png'))
                 if os.path.exists(offline_avatar_path):
-                    pixmap = QPixmap(offline_avatar_path)
+                    pixmap = get_image_resources().scaled(offline_avatar_path, 80, 80)
                     if not pixmap.isNull():
-                        self.avatar.setPixmap(pixmap.scaled(80, 80, Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+                        self.avatar.setPixmap(pixmap)
                         logger.info(f"切换为离线登录头像: offline_login.png")
                     else:
                         logger.error(f"离线登录头像加载失败: {offline_avatar_path}")
@@ -442,19 +439,7 @@ class UserPanel(QWidget):
                 
                 # 设置样式和大小 
                 self.legal_login_btn.setFixedSize(230, 40)
-                self.legal_login_btn.setStyleSheet("""
-                    QLabel {
-                        color: #FFFFFF;
-                        font-weight: bold;
-                        background: #2A2C3E;
-                        border: 1px solid #000000;
-                        opacity: 0.8;
-                        border-radius: 0px;
-                    }
-                    QLabel:hover {
-                        opacity: 1.0;
-                    }
-                """)
+                set_state(self.legal_login_btn, "switch_account")
                 self.legal_login_btn.setText("切换账号")
                 self.legal_login_btn.setAlignment(Qt.AlignCenter)
                 
@@ -468,9 +453,9 @@ class UserPanel(QWidget):
                 # 未登录状态：显示unlogged_avatar.png背景
                 unlogged_avatar_path = os.path.abspath(os.path.join(self.resource_path, 'images', 'user', 'unlogged_avatar.png'))
                 if os.path.exists(unlogged_avatar_path):
-                    pixmap = QPixmap(unlogged_avatar_path)
+                    pixmap = get_image_resources().scaled(unlogged_avatar_path, 80, 80)
                     if not pixmap.isNull():
-                        self.avatar.setPixmap(pixmap.scaled(80, 80, Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+                        self.avatar.setPixmap(pixmap)
                     else:
                         logger.error(f"未登录头像加载失败: {unlogged_avatar_path}")
                 else:
@@ -496,19 +481,7 @@ class UserPanel(QWidget):
                 self.legal_login_btn.setFixedSize(230, 40)
                 
                 # 使用登录按钮的样式
-                self.legal_login_btn.setStyleSheet("""
-                    QLabel {
-                        color: #FFFFFF;
-                        font-weight: bold;
-                        background: #7959FF;
-                        border: 1px solid #000000;
-                        opacity: 0.8;
-                        border-radius: 0px;
-                    }
-                    QLabel:hover {
-                        opacity: 1.0;
-                    }
-                """)
+                set_state(self.legal_login_btn, "login")
                 self.legal_login_btn.setText("登录")
                 self.legal_login_btn.setAlignment(Qt.AlignCenter)
                 
@@ -538,9 +511,9 @@ class UserPanel(QWidget):
                     # 使用已保存的正版登录头像路径
                     avatar_path = self.auth.minecraft_avatar_path
                     if os.path.exists(avatar_path):
-                        pixmap = QPixmap(avatar_path)
+                        pixmap = get_image_resources().scaled(avatar_path, 80, 80)
                         if not pixmap.isNull():
-                            self.avatar.setPixmap(pixmap.scaled(80, 80, Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+                            self.avatar.setPixmap(pixmap)
                         else:
                             logger.error(f"正版登录头像加载失败: {avatar_path}")
                     else:
@@ -549,9 +522,9 @@ class UserPanel(QWidget):
                     # 如果没有保存的头像使用默认的头像
                     minecraft_avatar_path = os.path.abspath(os.path.join(self.resource_path, 'images', 'user', 'unlogged_avatar.png'))
                     if os.path.exists(minecraft_avatar_path):
-                        pixmap = QPixmap(minecraft_avatar_path)
+                        pixmap = get_image_resources().scaled(minecraft_avatar_path, 80, 80)
                         if not pixmap.isNull():
-                            self.avatar.setPixmap(pixmap.scaled(80, 80, Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+                            self.avatar.setPixmap(pixmap)
                         else:
                             logger.error(f"正版登录默认头像加载失败: {minecraft_avatar_path}")
                     else:
@@ -576,19 +549,7 @@ class UserPanel(QWidget):
                     for child in self.legal_login_btn.findChildren(QLabel):
                         child.deleteLater()
                     self.legal_login_btn.setFixedSize(230, 40)
-                    self.legal_login_btn.setStyleSheet("""
-                        QLabel {
-                            color: #FFFFFF;
-                            font-weight: bold;
-                            background: #2A2C3E;
-                            border: 1px solid #000000;
-                            opacity: 0.8;
-                            border-radius: 0px;
-                        }
-                        QLabel:hover {
-                            opacity: 1.0;
-                        }
-                    """)
+                    set_state(self.legal_login_btn, "switch_account")
                     self.legal_login_btn.setText("切换账号")
                     self.legal_login_btn.setAlignment(Qt.AlignCenter)
                     
@@ -599,9 +560,9 @@ class UserPanel(QWidget):
                 # 更新头像
                 default_avatar_path = os.path.abspath(os.path.join(self.resource_path, 'images', 'user', 'unlogged_avatar.png'))
                 if os.path.exists(default_avatar_path):
-                    pixmap = QPixmap(default_avatar_path)
+                    pixmap = get_image_resources().scaled(default_avatar_path, 80, 80)
                     if not pixmap.isNull():
-                        self.avatar.setPixmap(pixmap.scaled(80, 80, Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+                        self.avatar.setPixmap(pixmap)
                     else:
                         logger.error(f"正版登录头像加载失败: {default_avatar_path}")
                 else:
@@ -619,9 +580,9 @@ class UserPanel(QWidget):
                 # 恢复正版登录按钮背景图片
                 legal_login_btn_path = os.path.abspath(os.path.join(self.resource_path, 'images', 'user', 'legal_login_btn.png'))
                 if os.path.exists(legal_login_btn_path):
-                    pixmap = QPixmap(legal_login_btn_path)
+                    pixmap = get_image_resources().scaled(legal_login_btn_path, 230, 40)
                     if not pixmap.isNull():
-                        self.legal_login_btn.setPixmap(pixmap.scaled(230, 40, Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+                        self.legal_login_btn.setPixmap(pixmap)
                     else:
                         logger.error(f"正版登录按钮背景图片加载失败: {legal_login_btn_path}")
                 else:
@@ -631,16 +592,12 @@ class UserPanel(QWidget):
                 text_label = QLabel("正版登录", self.legal_login_btn)
                 text_label.setFont(QFont("Source Han Sans CN Heavy", 10))
                 text_label.setAlignment(Qt.AlignCenter)
-                text_label.setStyleSheet("color: #f2f2f2; background-color: transparent;")
+                set_role(text_label, "buttonText")
                 text_label.setGeometry(0, 0, 230, 40)
                 text_label.show()   
                 
                 # 正版登录按钮样式
-                self.legal_login_btn.setStyleSheet("""
-                    QLabel {
-                        background-color: transparent;
-                    }
-                """)
+                set_state(self.legal_login_btn, "image")
                 
                 # 清除离线模式设置的文本
                 self.legal_login_btn.setText("")
@@ -748,6 +705,7 @@ class UserPanel(QWidget):
         self.tab_container_out.setEndValue(0.0)
         self.tab_container_out.setEasingCurve(QEasingCurve.OutCubic)
         self.tab_container_out.finished.connect(ani_show_)  # 动画完成后隐藏
+        get_profiler().track_animation(self.tab_container_out, '登录信息淡出')
         self.tab_container_out.start()
     
     def animations_show_user_login(self, user_hide_time=100, user_show_time=300):
@@ -765,6 +723,7 @@ class UserPanel(QWidget):
         self.tab_container_out.setEndValue(1.0)
         self.tab_container_out.setEasingCurve(QEasingCurve.OutCubic)
         self.tab_container_out.finished.connect(ani_show_)  # 动画完成后隐藏
+        get_profiler().track_animation(self.tab_container_out, '登录选项淡入')
         self.tab_container_out.start()
 
     def animations_show_user(self):
@@ -818,6 +777,7 @@ class UserPanel(QWidget):
         self.container_animation_group.addAnimation(self.container_size_animation)
         self.container_animation_group.addAnimation(self.container_pos_animation)
         self.container_animation_group.finished.connect(self.on_show_animation_finished)
+        get_profiler().track_animation(self.container_animation_group, '用户面板展开')
         
         # 启动动画
         self.container_animation_group.start()
@@ -860,6 +820,7 @@ class UserPanel(QWidget):
         self.container_animation_group.addAnimation(self.container_size_animation)
         self.container_animation_group.addAnimation(self.container_pos_animation)
         self.container_animation_group.finished.connect(self.on_hide_animation_finished)
+        get_profiler().track_animation(self.container_animation_group, '用户面板收起')
         
         # 启动动画
         self.container_animation_group.start()
@@ -913,14 +874,9 @@ class UserPanel(QWidget):
         self.setBackgroundColor(self.backgroundColor)
         self.auth.clear(os.path.join(self.cache_path))
         self.avatar.clear()
-        self.avatar.setStyleSheet(f"""
-            QLabel {{
-                background-color: #2b2b2b;
-                border: {2}px solid #ffffff;
-            }}
-        """)
+        set_state(self.avatar, "logged_out")
         self.username_label.setText("未登录")
-        self.username_label.setStyleSheet(f"font-weight: bold; color: #f8f8f8;")
+        set_state(self.username_label, "logged_out")
         # self.login_status.setText("请选择登录方式")
         # self.login_status.setStyleSheet(f"color: #808080;")
         self.signals.output.emit("已退出正版登录")
@@ -938,24 +894,14 @@ class UserPanel(QWidget):
         self.username_label.setText(username)
         # self.login_status.setText(f"<font color='#4CAF50'>{'正版登录' if login_type == 'online' else '离线登录'}</font>")
 
-        # 更新头像
-        border_color = '#7859FF'
-        if not login_type == "online":
-            border_color = '#7859FF'
-
-        self.avatar.setStyleSheet(f"""
-            QLabel {{
-                background-color: #2b2b2b;
-                border-radius: 0px;
-                border: 2px solid {border_color};
-            }}
-        """)
+        # 更新头像边框
+        set_state(self.avatar, "logged_in")
         
         # 更新头像 - 优先使用登录获取的头像，否则使用默认头像
         if skin_avatar and os.path.exists(skin_avatar):
             # 使用登录成功后获取的用户头像
             logger.info(f"使用登录获取的头像: {skin_avatar}")
-            self.avatar.setPixmap(QPixmap(skin_avatar).scaled(80, 80, Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+            self.avatar.setPixmap(get_image_resources().scaled(skin_avatar, 80, 80))
             
             # 正版登录保存头像路径到auth对象
             if login_type == "online":
@@ -965,7 +911,7 @@ class UserPanel(QWidget):
             default_avatar_path = os.path.abspath(os.path.join(self.resource_path, 'images', 'user', 'unlogged_avatar.png'))
             logger.info(f"使用默认头像: {default_avatar_path}")
             if os.path.exists(default_avatar_path):
-                self.avatar.setPixmap(QPixmap(default_avatar_path).scaled(80, 80, Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+                self.avatar.setPixmap(get_image_resources().scaled(default_avatar_path, 80, 80))
                 # 保存默认头像路径
                 self.auth.minecraft_avatar_path = default_avatar_path
             else:
@@ -980,19 +926,7 @@ class UserPanel(QWidget):
                 child.deleteLater()
             # 设置按钮样式为切换账号样式
             self.legal_login_btn.setFixedSize(230, 40)
-            self.legal_login_btn.setStyleSheet("""
-                QLabel {
-                    color: #FFFFFF;
-                    font-weight: bold;
-                    background: #2A2C3E;
-                    border: 1px solid #000000;
-                    opacity: 0.8;
-                    border-radius: 0px;
-                }
-                QLabel:hover {
-                    opacity: 1.0;
-                }
-            """)
+            set_state(self.legal_login_btn, "switch_account")
             self.legal_login_btn.setText("切换账号")
             self.legal_login_btn.setAlignment(Qt.AlignCenter)
             
@@ -1139,9 +1073,9 @@ class UserPanel(QWidget):
         # 恢复默认头像
         default_avatar_path = os.path.abspath(os.path.join(self.resource_path, 'images', 'user', 'unlogged_avatar.png'))
         if os.path.exists(default_avatar_path):
-            pixmap = QPixmap(default_avatar_path)
+            pixmap = get_image_resources().scaled(default_avatar_path, 80, 80)
             if not pixmap.isNull():
-                self.avatar.setPixmap(pixmap.scaled(80, 80, Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+                self.avatar.setPixmap(pixmap)
                 logger.info(f"恢复默认头像: unlogged_avatar.png")
             else:
                 logger.error(f"默认头像加载失败: {default_avatar_path}")
@@ -1149,13 +1083,7 @@ class UserPanel(QWidget):
             logger.error(f"默认头像文件不存在: {default_avatar_path}")
         
         self.username_label.setText("未登录")
-        self.avatar.setStyleSheet("""
-            QLabel {
-                background-color: #2b2b2b;
-                border-radius: 0px;
-                border: 2px solid #7859FF;
-            }
-        """)
+        set_state(self.avatar, "logged_in")
         self.legal_login_btn.clear()
         for child in self.legal_login_btn.findChildren(QLabel):
             child.deleteLater()
@@ -1165,9 +1093,9 @@ class UserPanel(QWidget):
         # 恢复正版登录按钮背景图片
         legal_login_btn_path = os.path.abspath(os.path.join(self.resource_path, 'images', 'user', 'legal_login_btn.png'))
         if os.path.exists(legal_login_btn_path):
-            pixmap = QPixmap(legal_login_btn_path)
+            pixmap = get_image_resources().scaled(legal_login_btn_path, 230, 40)
             if not pixmap.isNull():
-                self.legal_login_btn.setPixmap(pixmap.scaled(230, 40, Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+                self.legal_login_btn.setPixmap(pixmap)
             else:
                 logger.error(f"正版登录按钮背景图片加载失败: {legal_login_btn_path}")
         else:
@@ -1176,14 +1104,10 @@ class UserPanel(QWidget):
         text_label = QLabel("正版登录", self.legal_login_btn)
         text_label.setFont(QFont("Source Han Sans CN Heavy", 10))
         text_label.setAlignment(Qt.AlignCenter)
-        text_label.setStyleSheet("color: #f2f2f2; background-color: transparent;")
+        set_role(text_label, "buttonText")
         text_label.setGeometry(0, 0, 230, 40)
         text_label.show()   
-        self.legal_login_btn.setStyleSheet("""
-            QLabel {
-                background-color: transparent;
-            }
-        """)
+        set_state(self.legal_login_btn, "image")
         self.legal_login_btn.setText("")
         self.legal_login_btn.mousePressEvent = lambda event: self.authorized_online_login()
         # self.offline_status_label.hide()
@@ -0,0 +1,286 @@
+# 服务器列表（模型/视图）
+
+from PySide6.QtWidgets import QListView, QStyledItemDelegate, QStyle, QAbstractItemView
+from PySide6.QtCore import Qt, Signal, QAbstractListModel, QModelIndex, QSize, QRect, QRectF, QPointF
+from PySide6.QtGui import QColor, QFont, QPainter, QPen, QFontMetrics, QPainterPath, QPolygonF
+
+from core.multiplayer.status_cache import cache_key
+
+
+# 卡片高度与间距（像素）
+CARD_HEIGHT = 120
+CARD_SPACING = 6
+# 延迟折线图的宽度（像素）
+SPARKLINE_WIDTH = 96
+# 服务器图标的边长（像素）
+ICON_SIZE = 64
+
+ServerRole = Qt.UserRole + 1
+AddressRole = Qt.UserRole + 2
+PlayersRole = Qt.UserRole + 3
+MaxPlayersRole = Qt.UserRole + 4
+PingRole = Qt.UserRole + 5
+DescriptionRole = Qt.UserRole + 6
+
+_ROLE_KEYS = {
+    Qt.DisplayRole: "name",
+    AddressRole: "address",
+    PlayersRole: "players",
+    MaxPlayersRole: "max_players",
+    PingRole: "ping",
+    DescriptionRole: "description",
+}
+
+
+def ping_color(ping):
+    """延迟对应的颜色（与 QMCard 一致）"""
+    if ping is None:
+        return QColor("#888888")
+    if ping < 50:
+        return QColor("#4CAF50")
+    if ping < 100:
+        return QColor("#FFC107")
+    return QColor("#F44336")
+
+
+def tooltip(server):
+    """地址，以及探测得到的抖动与丢包"""
+    lines = [server.get("address", "")]
+    if server.get("latency_p50") is not None:
+        lines.append(f"延迟中位数: {server['latency_p50']:.0f}ms  P90: {server.get('latency_p90') or 0:.0f}ms")
+    if server.get("jitter") is not None:
+        lines.append(f"抖动: {server['jitter']:.1f}ms")
+    if server.get("loss") is not None:
+        lines.append(f"丢包: {server['loss'] * 100:.0f}%")
+    return "\n".join(lines)
+
+
+def draw_sparkline(painter: QPainter, rect: QRect, history):
+    """绘制延迟历史折线，丢失的样本在底部画红点并断开折线"""
+    if not history or len(history) < 2:
+        return
+    values = [value for value in history if value is not None]
+    top = max(values) if values else 1.0
+    bottom = min(values) if values else 0.0
+    span = max(top - bottom, 1.0)
+    step = rect.width() / (len(history) - 1)
+
+    path = QPainterPath()
+    pen_down = False
+    losses = []
+    for i, value in enumerate(history):
+        x = rect.left() + i * step
+        if value is None:
+            losses.append(QPointF(x, rect.bottom()))
+            pen_down = False
+            continue
+        point = QPointF(x, rect.bottom() - (value - bottom) / span * rect.height())
+        if pen_down:
+            path.lineTo(point)
+        else:
+            path.moveTo(point)
+            pen_down = True
+
+    painter.setBrush(Qt.NoBrush)
+    painter.setPen(QPen(ping_color(values[-1] if values else None), 1.5))
+    painter.drawPath(path)
+    if losses:
+        painter.setPen(QPen(QColor("#F44336"), 3))
+        painter.drawPoints(QPolygonF(losses))
+
+
+class ServerListModel(QAbstractListModel):
+    """
+    服务器列表模型
+
+    直接持有服务器字典（与页面共享同一批对象），并维护 缓存键 -> 行号 的索引，
+    Ping 结果到达时只对相关的行发出 dataChanged。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._servers = []
+        self._rows = {}  # 缓存键 -> 行号列表
+
+    # ---------- Qt 接口 ----------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._servers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._servers):
+            return None
+        server = self._servers[index.row()]
+        if role == ServerRole:
+            return server
+        if role == Qt.ToolTipRole:
+            return tooltip(server)
+        key = _ROLE_KEYS.get(role)
+        return server.get(key) if key else None
+
+    # ---------- 数据操作 ----------
+
+    def _reindex(self):
+        self._rows = {}
+        for row, server in enumerate(self._servers):
+            self._rows.setdefault(cache_key(server["address"]), []).append(row)
+
+    def servers(self):
+        return list(self._servers)
+
+    def server_at(self, row):
+        return self._servers[row]
+
+    def set_servers(self, servers):
+        """整体替换列表"""
+        self.beginResetModel()
+        self._servers = list(servers)
+        self._reindex()
+        self.endResetModel()
+
+    def append(self, server):
+        """在末尾追加一个服务器"""
+        row = len(self._servers)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._servers.append(server)
+        self._rows.setdefault(cache_key(server["address"]), []).append(row)
+        self.endInsertRows()
+
+    def remove_rows(self, predicate):
+        """移除满足条件的服务器"""
+        for row in reversed(range(len(self._servers))):
+            if predicate(self._servers[row]):
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._servers[row]
+                self.endRemoveRows()
+        self._reindex()
+
+    def replace(self, row, server):
+        """替换某一行"""
+        old_key = cache_key(self._servers[row]["address"])
+        self._servers[row] = server
+        if old_key != cache_key(server["address"]):
+            self._reindex()
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def refresh_favicon(self, favicon_hash):
+        """图标解码完成后，重绘使用该图标的行"""
+        for row, server in enumerate(self._servers):
+            if server.get("favicon_hash") == favicon_hash:
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+
+    def refresh_key(self, key):
+        """通知指向某个服务器的所有行已更新"""
+        for row in self._rows.get(key, []):
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+
+class ServerCardDelegate(QStyledItemDelegate):
+    """绘制服务器卡片（外观与 QMCard 一致），只有可见的行会被绘制"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.favicon_cache = None
+        self.name_font = QFont()
+        self.name_font.setPixelSize(16)
+        self.name_font.setBold(True)
+        self.text_font = QFont()
+        self.text_font.setPixelSize(13)
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), CARD_HEIGHT + CARD_SPACING)
+
+    def paint(self, painter: QPainter, option, index):
+        server = index.data(ServerRole)
+        if server is None:
+            return
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        rect = QRectF(option.rect).adjusted(1, 1, -1, -CARD_SPACING - 1)
+        selected = bool(option.state & QStyle.State_Selected)
+        hovered = bool(option.state & QStyle.State_MouseOver)
+        painter.setBrush(QColor("#2b2b2b" if selected else "#353535"))
+        border = QColor("#4CAF50") if selected or hovered else QColor("#555555")
+        painter.setPen(QPen(border, 2 if selected else 1))
+        painter.drawRoundedRect(rect, 8, 8)
+
+        content = rect.toRect().adjusted(15, 15, -15, -15)
+        # 服务器图标（未解码完成时先留空，解码后由视图重绘这一行）
+        favicon_hash = server.get("favicon_hash")
+        if favicon_hash and self.favicon_cache is not None:
+            icon = self.favicon_cache.pixmap(favicon_hash, ICON_SIZE, painter.device().devicePixelRatioF())
+            if icon is not None:
+                painter.drawPixmap(content.left(), content.top(), icon)
+            content.setLeft(content.left() + ICON_SIZE + 12)
+        # 服务器名称
+        painter.setFont(self.name_font)
+        painter.setPen(QColor("#ffffff"))
+        name_height = QFontMetrics(self.name_font).height()
+        painter.drawText(QRect(content.left(), content.top(), content.width(), name_height),
+                         Qt.AlignLeft | Qt.AlignVCenter,
+                         QFontMetrics(self.name_font).elidedText(server.get("name", ""), Qt.ElideRight, content.width()))
+
+        # 玩家数量与延迟
+        painter.setFont(self.text_font)
+        metrics = QFontMetrics(self.text_font)
+        line_top = content.top() + name_height + 6
+        players_text = f"玩家: {server.get('players', 0)}/{server.get('max_players', 0)}"
+        painter.setPen(QColor("#aaaaaa"))
+        painter.drawText(QRect(content.left(), line_top, content.width(), metrics.height()),
+                         Qt.AlignLeft | Qt.AlignVCenter, players_text)
+        ping = server.get("ping")
+        painter.setPen(ping_color(ping))
+        painter.drawText(QRect(content.left() + metrics.horizontalAdvance(players_text) + 12, line_top,
+                               content.width(), metrics.height()),
+                         Qt.AlignLeft | Qt.AlignVCenter,
+                         "延迟: 离线" if ping is None else f"延迟: {ping}ms")
+        # 延迟历史（右上角）
+        draw_sparkline(painter, QRect(content.right() - SPARKLINE_WIDTH, line_top + 2,
+                                      SPARKLINE_WIDTH, metrics.height() - 4),
+                       server.get("latency_history"))
+
+        # 描述（自动换行，超出部分截断）
+        desc_top = line_top + metrics.height() + 6
+        painter.setPen(QColor("#cccccc"))
+        painter.drawText(QRect(content.left(), desc_top, content.width(), content.bottom() - desc_top),
+                         Qt.AlignLeft | Qt.AlignTop | Qt.TextWordWrap, server.get("description", ""))
+        painter.restore()
+
+
+class ServerListView(QListView):
+    """虚拟化的服务器列表视图"""
+    server_selected = Signal(dict)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # 行高固定，视图无需逐行计算尺寸
+        self.setUniformItemSizes(True)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.verticalScrollBar().setSingleStep(20)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setMouseTracking(True)
+        self.setFrameShape(QListView.NoFrame)
+        self.setStyleSheet("QListView { background-color: transparent; border: none; }")
+        self.viewport().setAutoFillBackground(False)
+        self.setItemDelegate(ServerCardDelegate(self))
+        self.clicked.connect(self._on_clicked)
+
+    def set_favicon_cache(self, cache):
+        """设置服务器图标缓存，图标解码完成时重绘对应的行"""
+        self.itemDelegate().favicon_cache = cache
+        cache.favicon_ready.connect(self._on_favicon_ready)
+
+    def _on_favicon_ready(self, favicon_hash):
+        model = self.model()
+        if model is not None:
+            model.refresh_favicon(favicon_hash)
+
+    def _on_clicked(self, index):
+        server = index.data(ServerRole)
+        if server is not None:
+            self.server_selected.emit(server)
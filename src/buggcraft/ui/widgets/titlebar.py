@@ -3,9 +3,11 @@ from PySide6.QtWidgets import (
     QWidget, QLabel, QPushButton, QHBoxLayout, 
     QSizePolicy, QVBoxLayout, QSpacerItem
 )
-from PySide6.QtGui import QFont, QPixmap, QColor, QIcon, QPainter, QMouseEvent
+from PySide6.QtGui import QFont, QColor, QPainter, QMouseEvent
 from PySide6.QtCore import Qt, QPoint, QSize
 
+from ui.cache.resources import get_image_resources
+
 
 class TitleBar(QWidget):
     """优化的自定义标题栏 - 使用布局管理器实现自适应"""
@@ -19,7 +21,7 @@ class TitleBar(QWidget):
         self.drag_position = QPoint()
         
         # 图标资源
-        start_icon = QIcon(os.path.abspath(os.path.join(self.resource_path, 'images', 'bar', 'ic.png')))
+        start_icon = get_image_resources().icon(os.path.abspath(os.path.join(self.resource_path, 'images', 'bar', 'ic.png')))
         
         # 标签页配置
         self.tab_icons = {
@@ -35,7 +37,7 @@ class TitleBar(QWidget):
         self.control_buttons = ["最小化", "关闭"]
         
         # 创建透明图标 
-        self.transparent_icon = QIcon(os.path.abspath(os.path.join(self.resource_path, 'images', 'bar', 'ic_no.png')))
+        self.transparent_icon = get_image_resources().icon(os.path.abspath(os.path.join(self.resource_path, 'images', 'bar', 'ic_no.png')))
         
         self.setFixedHeight(58)  # 固定高度，确保按钮不被裁切
         self.init_ui()
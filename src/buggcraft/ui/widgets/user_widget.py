@@ -1,16 +1,19 @@
 # UserWidget 类
 
 from PySide6.QtCore import Qt, QSize
-from PySide6.QtGui import QPixmap, QPainter
+from PySide6.QtGui import QPainter
 from PySide6.QtWidgets import (QWidget, QSizePolicy)
 
+from ui.cache.pixmap import get_render_cache, draw_scaled
+from ui.cache.resources import get_image_resources
+
 
 class QMWidget(QWidget):
     """支持背景图片"""
     def __init__(self, background_path, parent=None):
         super().__init__(parent)
         self.background_path = background_path
-        self.background_pixmap = QPixmap(background_path)
+        self.background_pixmap = get_image_resources().pixmap(background_path)
         
         # 设置尺寸策略：水平方向尽可能扩展，垂直方向固定（由sizeHint决定）
         # 关键：水平 Policy 为 Expanding，垂直 Policy 为 Fixed
@@ -41,19 +44,8 @@ class QMWidget(QWidget):
         return super().sizeHint()
 
     def paintEvent(self, event):
-        painter = QPainter(self)
-        if not self.background_pixmap.isNull():
-            # 获取控件当前的实际大小
-            widget_size = self.size()
-            # 使用 KeepAspectRatio 模式进行缩放，确保图片不变形
-            scaled_pixmap = self.background_pixmap.scaled(
-                widget_size,
-                Qt.KeepAspectRatio,
-                Qt.SmoothTransformation
-            )
-            # 计算图片在控件中居中显示的位置
-            x = (widget_size.width() - scaled_pixmap.width()) // 2
-            y = (widget_size.height() - scaled_pixmap.height()) // 2
-            # 绘制图片
-            painter.drawPixmap(x, y, scaled_pixmap)
+        with get_render_cache().paint_timer(type(self).__name__):
+            painter = QPainter(self)
+            # 使用 KeepAspectRatio 模式缩放后居中绘制，缩放结果按尺寸缓存
+            draw_scaled(painter, self, self.background_pixmap, Qt.KeepAspectRatio, event.rect())
         super().paintEvent(event)
@@ -1 +1,107 @@
-# 文件操作工具
\ No newline at end of file
+# 文件工具函数
+
+import os
+import zlib
+import hashlib
+import tempfile
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """
+    计算文件的 SHA-256 摘要
+
+    :param path: 文件路径
+    :param chunk_size: 每次读取的字节数
+    :return: 十六进制摘要字符串
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_crc32(path, chunk_size=1024 * 1024):
+    """
+    计算文件的 CRC-32（与 ZIP 条目中记录的值一致）
+
+    :param path: 文件路径
+    :param chunk_size: 每次读取的字节数
+    :return: 无符号 32 位整数
+    """
+    crc = 0
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            crc = zlib.crc32(chunk, crc)
+    return crc & 0xFFFFFFFF
+
+
+def file_matches(path, size, sha256=None):
+    """
+    判断磁盘上的文件是否与期望的大小/摘要一致（先比较大小，再比较摘要）
+
+    :param path: 文件路径
+    :param size: 期望大小（字节）
+    :param sha256: 期望摘要，为 None 时只比较大小
+    :return: 一致返回 True
+    """
+    try:
+        if os.path.getsize(path) != size:
+            return False
+    except OSError:
+        return False
+    if sha256 is None:
+        return True
+    return file_sha256(path) == sha256
+
+
+def atomic_write_bytes(path, data):
+    """
+    原子写入文件：先写入同目录下的临时文件，再使用 os.replace 覆盖目标
+
+    :param path: 目标文件路径
+    :param data: 要写入的字节数据
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix='.tmp-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_replace(src, dst):
+    """
+    将已写好的文件原子地移动到目标位置（自动创建目标目录）
+
+    :param src: 源文件路径（需与目标位于同一文件系统）
+    :param dst: 目标文件路径
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(dst)), exist_ok=True)
+    os.replace(src, dst)
+
+
+def is_safe_relpath(path):
+    """判断相对路径是否安全（不能是绝对路径，也不能跳出目标目录）"""
+    if not path or path.startswith(('/', '\\')) or ':' in path:
+        return False
+    parts = path.replace('\\', '/').split('/')
+    return '..' not in parts
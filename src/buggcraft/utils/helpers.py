@@ -5,15 +5,18 @@ import os
 from PySide6.QtCore import QSize
 from PySide6.QtGui import QGuiApplication
 
+from utils.system_metrics import get_system_metrics
 
-import psutil  # 需要安装：pip install psutil
-from PySide6.QtCore import QTimer
+# 为系统预留的内存（MB），滑块最大值为空闲内存减去该值
+RESERVED_MEMORY_MB = 512
+# 滑块范围按该粒度（MB）取整，空闲内存的小幅波动不会改变范围
+MEMORY_RANGE_STEP = 256
 
 
 class MemorySliderManager:
     """内存滑块与系统内存监控管理器"""
     
-    def __init__(self, slider, allocated_label, used_label, free_label):
+    def __init__(self, slider, allocated_label, used_label, free_label, metrics=None):
         """
         初始化内存管理器
         
@@ -21,42 +24,41 @@ class MemorySliderManager:
         :param allocated_label: 已分配内存标签 (QLabel)
         :param used_label: 已使用内存标签 (QLabel)
         :param free_label: 空闲内存标签 (QLabel)
+        :param metrics: 系统资源采样服务，默认使用全局共享的服务
         """
         self.slider = slider
         self.allocated_label = allocated_label
         self.used_label = used_label
         self.free_label = free_label
+        self.metrics = metrics or get_system_metrics()
         
         # 连接滑块值改变信号
         self.slider.valueChanged.connect(self.update_allocated_memory)
         
-        # 创建定时器更新系统内存使用情况
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_system_memory)
-        self.timer.start(1000)  # 每秒更新一次
+        # 订阅共享的系统内存采样（只在滑块可见时采样）
+        self.metrics.subscribe(self.update_system_memory, widget=self.slider)
     
     def update_allocated_memory(self, value):
         """更新分配的内存值"""
         # 更新分配值显示
         self.allocated_label.setText(f"{value} MB")
     
-    def update_system_memory(self):
-        """更新系统内存使用情况"""
-        # 获取系统内存信息
-        mem = psutil.virtual_memory()
-        
-        # 计算内存值（单位：MB）
-        total_mb = mem.total // (1024 * 1024)
-        used_mb = mem.used // (1024 * 1024)
-        free_mb = mem.free // (1024 * 1024)
+    def update_system_memory(self, snapshot=None):
+        """更新系统内存使用情况（未指定快照时立即采样一次）"""
+        if snapshot is None:
+            # 采样结果会通过订阅再次调用本方法
+            self.metrics.refresh()
+            return
         
         # 更新UI显示
-        self.used_label.setText(f"{used_mb} MB")
-        self.free_label.setText(f"{free_mb} MB")
+        self.used_label.setText(f"{snapshot.used_mb} MB")
+        self.free_label.setText(f"{snapshot.free_mb} MB")
         
-        # 可选：根据系统内存限制滑块最大值
-        # self.slider.setMaximum(total_mb)
-        self.slider.setRange(512, free_mb - 512)  # 系统预留512
+        # 根据空闲内存限制滑块最大值，范围不变时不重设
+        maximum = (snapshot.free_mb - RESERVED_MEMORY_MB) // MEMORY_RANGE_STEP * MEMORY_RANGE_STEP
+        maximum = max(RESERVED_MEMORY_MB, maximum)
+        if self.slider.minimum() != RESERVED_MEMORY_MB or self.slider.maximum() != maximum:
+            self.slider.setRange(RESERVED_MEMORY_MB, maximum)
 
 
 def scale_component(original_size: QSize, target_size: QSize) -> float:
@@ -531,6 +531,22 @@ def urlencode(query, doseq=False, safe='', encoding=None, errors=None,
     return '&'.join(l)
 
 
+class _ProgressStream:
+    """包装 HTTP 响应，每次 read 时调用进度回调"""
+
+    def __init__(self, response, progress):
+        self.response = response
+        self.progress = progress
+        length = response.getheader('Content-Length')
+        self.total = int(length) if length and length.isdigit() else None
+
+    def read(self, size=-1):
+        chunk = self.response.read(size)
+        if chunk:
+            self.progress(len(chunk), self.total)
+        return chunk
+
+
 class minecraft_httpx:
     """一个基于 http.client 的智能 HTTP 工具类，支持自动 Content-Type 检测"""
 
@@ -650,13 +666,14 @@ class minecraft_httpx:
         return minecraft_httpx.request('POST', url, data=data, headers=headers)
 
     @staticmethod
-    def download(url, headers=None):
+    def download(url, headers=None, progress=None):
         """
         从指定的URL下载资源（如图片、文件等）
 
         Args:
             url: 完整的请求 URL
             headers: 可选的额外请求头字典
+            progress: 可选的进度回调 progress(本次读取字节数, 响应总长度或None)
 
         Returns:
             bytes: 资源的二进制数据，失败时返回 None
@@ -693,8 +710,9 @@ class minecraft_httpx:
                 return None
             
             # 读取数据
-            data = response.read()
-            return data
+            if progress is None:
+                return response.read()
+            return minecraft_httpx._read_with_progress(response, progress)
             
         except Exception as e:
             logger.info(f"下载失败: {e}")
@@ -702,6 +720,121 @@ class minecraft_httpx:
         finally:
             conn.close()
 
+    @staticmethod
+    def download_range(url, start, end, headers=None, progress=None):
+        """
+        使用 HTTP Range 请求下载资源的一段字节 [start, end]（闭区间）
+
+        Args:
+            url: 完整的请求 URL
+            start: 起始字节偏移
+            end: 结束字节偏移（包含）
+            headers: 可选的额外请求头字典
+            progress: 可选的进度回调，同 download
+
+        Returns:
+            bytes: 该区间的二进制数据；服务器不支持 Range 或请求失败时返回 None
+        """
+        parsed_url = minecraft_httpx._parse_url(url)
+        if not parsed_url:
+            return None
+
+        host, port, path, is_https = parsed_url
+        request_headers = {
+            'User-Agent': 'MinecraftLauncher/1.0',
+            'Range': f'bytes={start}-{end}'
+        }
+        if headers:
+            request_headers.update(headers)
+
+        conn = minecraft_httpx._create_connection(host, port, is_https)
+        if not conn:
+            return None
+
+        try:
+            conn.request("GET", path, headers=request_headers)
+            response = conn.getresponse()
+
+            # 服务器忽略 Range 时会返回 200 和完整内容，此时不读取响应体直接放弃
+            if response.status != 206:
+                logger.info(f"区间下载失败，HTTP状态码: {response.status}")
+                return None
+
+            if progress is None:
+                data = response.read()
+            else:
+                data = minecraft_httpx._read_with_progress(response, progress)
+            if len(data) != end - start + 1:
+                logger.info(f"区间下载长度不符: 期望 {end - start + 1}，实际 {len(data)}")
+                return None
+            return data
+
+        except Exception as e:
+            logger.info(f"区间下载失败: {e}")
+            return None
+        finally:
+            conn.close()
+
+    @staticmethod
+    def download_stream(url, consumer, headers=None, progress=None):
+        """
+        以流的方式下载资源：不缓存整个响应体，而是把响应交给 consumer 边下载边处理
+
+        Args:
+            url: 完整的请求 URL
+            consumer: 处理函数 consumer(stream)，stream 支持 read(n)，其返回值作为本方法的返回值
+            headers: 可选的额外请求头字典
+            progress: 可选的进度回调，同 download
+
+        Returns:
+            consumer 的返回值；请求失败或处理过程中出错时返回 None
+        """
+        parsed_url = minecraft_httpx._parse_url(url)
+        if not parsed_url:
+            return None
+
+        host, port, path, is_https = parsed_url
+        request_headers = {
+            'User-Agent': 'MinecraftLauncher/1.0'
+        }
+        if headers:
+            request_headers.update(headers)
+
+        conn = minecraft_httpx._create_connection(host, port, is_https)
+        if not conn:
+            return None
+
+        try:
+            conn.request("GET", path, headers=request_headers)
+            response = conn.getresponse()
+
+            if response.status != 200:
+                logger.info(f"下载失败，HTTP状态码: {response.status}")
+                return None
+
+            stream = response if progress is None else _ProgressStream(response, progress)
+            return consumer(stream)
+
+        except Exception as e:
+            logger.info(f"下载失败: {e}")
+            return None
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _read_with_progress(response, progress, chunk_size=64 * 1024):
+        """分块读取响应体，每读取一块调用一次进度回调"""
+        length = response.getheader('Content-Length')
+        total = int(length) if length and length.isdigit() else None
+        buffer = bytearray()
+        while True:
+            chunk = response.read(chunk_size)
+            if not chunk:
+                break
+            buffer += chunk
+            progress(len(chunk), total)
+        return bytes(buffer)
+
     @staticmethod
     def _parse_url(url):
         """
@@ -0,0 +1,148 @@
+# 无界面进度报告：汇总多个并发下载任务的字节进度并估算剩余时间
+
+import time
+import threading
+from collections import deque
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def format_bytes(size):
+    """将字节数格式化为易读的字符串"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(size) < 1024 or unit == 'GB':
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{int(size)} B"
+        size /= 1024
+
+
+def format_duration(seconds):
+    """将秒数格式化为 时:分:秒 / 分:秒"""
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+class TaskProgress:
+    """单个下载任务的进度，可直接作为 minecraft_httpx 的 progress 回调"""
+
+    def __init__(self, reporter, name):
+        self.reporter = reporter
+        self.name = name
+        self.total = 0
+        self.done = 0
+
+    def set_total(self, total):
+        """设置（或修正）该任务的总字节数"""
+        self.reporter._adjust_total(total - self.total)
+        self.total = total
+
+    def advance(self, size):
+        """记录新完成的字节数"""
+        self.done += size
+        if self.done > self.total:
+            # 实际下载量超过预估（如回退为整包下载），同步放大总量
+            self.set_total(self.done)
+        self.reporter._advance(size)
+
+    def __call__(self, size, content_length=None):
+        if content_length and not self.total:
+            self.set_total(content_length)
+        self.advance(size)
+
+
+class ProgressReporter:
+    """
+    汇总进度报告器（线程安全）
+
+    所有任务共享一个总字节数，速度取最近 window 秒内的滑动平均值，
+    剩余时间 = 剩余字节 / 当前速度。进度以日志形式输出，最短间隔为 interval 秒。
+    """
+
+    def __init__(self, title="下载", interval=1.0, window=5.0, output=None):
+        """
+        :param title: 日志前缀
+        :param interval: 两次输出之间的最小间隔（秒）
+        :param window: 计算速度的滑动窗口（秒）
+        :param output: 输出函数，默认为 logger.info
+        """
+        self.title = title
+        self.interval = interval
+        self.window = window
+        self.output = output or logger.info
+
+        self._lock = threading.Lock()
+        self._total = 0
+        self._done = 0
+        self._samples = deque()  # (时间戳, 累计完成字节)
+        self._started = time.monotonic()
+        self._last_report = 0.0
+
+    def task(self, name, total=0):
+        """创建一个子任务"""
+        task = TaskProgress(self, name)
+        if total:
+            task.set_total(total)
+        return task
+
+    def _adjust_total(self, delta):
+        with self._lock:
+            self._total += delta
+
+    def _advance(self, size):
+        now = time.monotonic()
+        with self._lock:
+            self._done += size
+            self._samples.append((now, self._done))
+            while self._samples and now - self._samples[0][0] > self.window:
+                self._samples.popleft()
+            if now - self._last_report < self.interval:
+                return
+            self._last_report = now
+            line = self._format(now)
+        self.output(line)
+
+    @property
+    def speed(self):
+        """当前速度（字节/秒）"""
+        with self._lock:
+            return self._speed(time.monotonic())
+
+    def _speed(self, now):
+        if len(self._samples) >= 2:
+            (t0, d0), (t1, d1) = self._samples[0], self._samples[-1]
+            if t1 > t0:
+                return (d1 - d0) / (t1 - t0)
+        elapsed = now - self._started
+        return self._done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        """预计剩余秒数，未知时返回 None"""
+        with self._lock:
+            return self._eta(time.monotonic())
+
+    def _eta(self, now):
+        speed = self._speed(now)
+        if speed <= 0 or self._total <= 0:
+            return None
+        return max(0.0, (self._total - self._done) / speed)
+
+    def _format(self, now):
+        percent = self._done * 100 / self._total if self._total else 0
+        eta = self._eta(now)
+        eta_text = format_duration(eta) if eta is not None else "--:--"
+        return (
+            f"[{self.title}] {format_bytes(self._done)}/{format_bytes(self._total)} "
+            f"({percent:.0f}%) {format_bytes(self._speed(now))}/s 剩余 {eta_text}"
+        )
+
+    def finish(self):
+        """输出最终汇总"""
+        elapsed = time.monotonic() - self._started
+        with self._lock:
+            done = self._done
+        self.output(f"[{self.title}] 完成，共 {format_bytes(done)}，用时 {format_duration(elapsed)}")
@@ -0,0 +1,389 @@
+# 首次运行资源供给：基于清单的增量下载与安装
+
+import os
+import json
+import shutil
+import struct
+import zlib
+import zipfile
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+from utils.network import minecraft_httpx
+from utils.file_utils import file_sha256, file_matches, atomic_write_bytes, atomic_replace, is_safe_relpath
+from utils.zipstream import StreamingZipExtractor
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# 相邻条目之间的空隙小于该值时合并为一次区间请求
+RANGE_MERGE_GAP = 64 * 1024
+# 单次区间请求的最大跨度
+RANGE_MAX_SPAN = 8 * 1024 * 1024
+
+# ZIP 本地文件头: 签名(4) + 固定字段(26) + 文件名 + 扩展字段
+_LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')
+_LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+
+
+class ResourceManifest:
+    """
+    资源清单
+
+    清单描述一个资源包（如 resources、dependencies）中每个文件的大小与 SHA-256，
+    以及该文件在发布压缩包中的位置，便于只下载发生变化的文件：
+
+        {
+            "name": "dependencies",
+            "version": "2025.09.11",
+            "archive": {"url": "...", "size": 123, "sha256": "..."},
+            "files": {
+                "dependencies/PySide6/Qt6Core.dll": {
+                    "size": 1, "sha256": "...", "offset": 0,
+                    "compressed_size": 1, "method": 8
+                }
+            }
+        }
+
+    其中 offset 为压缩数据（跳过本地文件头之后）在压缩包中的偏移。
+    """
+
+    def __init__(self, name, version, archive=None, files=None):
+        self.name = name
+        self.version = version
+        self.archive = archive or {}
+        self.files: Dict[str, dict] = files or {}
+
+    @classmethod
+    def from_dict(cls, data):
+        """从字典构造清单，并校验路径安全性"""
+        files = data.get('files', {})
+        for path in files:
+            if not is_safe_relpath(path):
+                raise ValueError(f"清单中包含非法路径: {path}")
+        return cls(data['name'], data.get('version'), data.get('archive'), files)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'version': self.version,
+            'archive': self.archive,
+            'files': self.files
+        }
+
+    @property
+    def total_size(self):
+        """所有文件解压后的总大小"""
+        return sum(entry['size'] for entry in self.files.values())
+
+
+def build_manifest(zip_path, name, version, archive_url):
+    """
+    根据发布压缩包生成资源清单（供发布流程使用）
+
+    :param zip_path: 压缩包路径
+    :param name: 资源包名称
+    :param version: 资源包版本
+    :param archive_url: 压缩包下载地址
+    :return: ResourceManifest
+    """
+    files = {}
+    with open(zip_path, 'rb') as raw, zipfile.ZipFile(zip_path, 'r') as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+
+            # 读取本地文件头，计算压缩数据的真实偏移（本地头的扩展字段长度可能与中央目录不同）
+            raw.seek(info.header_offset)
+            header = _LOCAL_HEADER.unpack(raw.read(_LOCAL_HEADER.size))
+            if header[0] != _LOCAL_HEADER_SIGNATURE:
+                raise ValueError(f"无效的本地文件头: {info.filename}")
+            name_len, extra_len = header[-2], header[-1]
+            data_offset = info.header_offset + _LOCAL_HEADER.size + name_len + extra_len
+
+            digest = hashlib.sha256()
+            with zf.open(info) as member:
+                for chunk in iter(lambda: member.read(1024 * 1024), b''):
+                    digest.update(chunk)
+
+            files[info.filename] = {
+                'size': info.file_size,
+                'sha256': digest.hexdigest(),
+                'crc32': info.CRC,
+                'offset': data_offset,
+                'compressed_size': info.compress_size,
+                'method': info.compress_type
+            }
+
+    archive = {
+        'url': archive_url,
+        'size': os.path.getsize(zip_path),
+        'sha256': file_sha256(zip_path)
+    }
+    return ResourceManifest(name, version, archive, files)
+
+
+class ResourceProvisioner:
+    """
+    基于清单的资源供给器
+
+    1. 对比清单与本地已安装状态，找出缺失或变化的文件
+    2. 通过 HTTP Range 只下载这些文件在压缩包中的数据块（服务器不支持时回退到整包下载）
+    3. 逐个校验 SHA-256 后写入暂存目录，全部成功后再原子地替换到安装目录
+    4. 最后写入安装状态，未写入状态的安装在下次启动时会被重新校验
+    """
+
+    def __init__(self, install_dir, state_dir):
+        """
+        :param install_dir: 安装根目录（如 ~/.buggcraft）
+        :param state_dir: 安装状态存放目录
+        """
+        self.install_dir = str(install_dir)
+        self.state_dir = str(state_dir)
+        self.staging_root = os.path.join(self.install_dir, '.staging')
+
+    # ---------- 清单与状态 ----------
+
+    def fetch_manifest(self, manifest_url) -> Optional[ResourceManifest]:
+        """下载并解析资源清单，失败返回 None"""
+        status, data = minecraft_httpx.get(manifest_url)
+        if status != 200 or not isinstance(data, dict):
+            logger.info(f"获取资源清单失败: {manifest_url} (HTTP {status})")
+            return None
+        try:
+            return ResourceManifest.from_dict(data)
+        except (KeyError, ValueError) as e:
+            logger.error(f"资源清单格式错误: {e}")
+            return None
+
+    def _state_path(self, name):
+        return os.path.join(self.state_dir, f'{name}.json')
+
+    def load_state(self, name):
+        """读取已安装状态: {'version': ..., 'files': {path: {size, sha256, mtime_ns}}}"""
+        try:
+            with open(self._state_path(name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'version': None, 'files': {}}
+
+    def save_state(self, name, state):
+        """原子地保存安装状态"""
+        data = json.dumps(state, ensure_ascii=False).encode('utf-8')
+        atomic_write_bytes(self._state_path(name), data)
+
+    # ---------- 校验 ----------
+
+    def _local_path(self, relpath):
+        return os.path.join(self.install_dir, *relpath.split('/'))
+
+    def _is_current(self, relpath, entry, recorded):
+        """
+        判断本地文件是否与清单条目一致
+
+        大小不一致直接判定为变化；大小与修改时间都与上次安装记录一致时信任记录的摘要，
+        否则重新计算摘要。
+        """
+        path = self._local_path(relpath)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+
+        if st.st_size != entry['size']:
+            return False
+
+        if (recorded and recorded.get('mtime_ns') == st.st_mtime_ns
+                and recorded.get('size') == st.st_size):
+            return recorded.get('sha256') == entry['sha256']
+
+        return file_sha256(path) == entry['sha256']
+
+    def plan(self, manifest: ResourceManifest) -> Tuple[List[str], List[str]]:
+        """
+        计算需要更新和需要删除的文件
+
+        :return: (缺失或变化的文件列表, 已不在清单中的旧文件列表)
+        """
+        state = self.load_state(manifest.name)
+        recorded_files = state.get('files', {})
+
+        changed = [
+            relpath for relpath, entry in manifest.files.items()
+            if not self._is_current(relpath, entry, recorded_files.get(relpath))
+        ]
+        removed = [relpath for relpath in recorded_files if relpath not in manifest.files]
+        return changed, removed
+
+    # ---------- 下载 ----------
+
+    @staticmethod
+    def _coalesce(entries):
+        """将按偏移排序的条目合并为尽量少的区间请求: [(start, end, [(relpath, entry), ...]), ...]"""
+        ranges = []
+        for relpath, entry in sorted(entries, key=lambda item: item[1]['offset']):
+            start = entry['offset']
+            end = start + entry['compressed_size'] - 1
+            if ranges:
+                r_start, r_end, members = ranges[-1]
+                if start - r_end <= RANGE_MERGE_GAP and end - r_start < RANGE_MAX_SPAN:
+                    ranges[-1] = (r_start, max(r_end, end), members + [(relpath, entry)])
+                    continue
+            ranges.append((start, end, [(relpath, entry)]))
+        return ranges
+
+    @staticmethod
+    def _inflate(data, method):
+        """解压单个条目的数据，不支持的压缩方式返回 None"""
+        if method == zipfile.ZIP_STORED:
+            return data
+        if method == zipfile.ZIP_DEFLATED:
+            return zlib.decompressobj(-zlib.MAX_WBITS).decompress(data)
+        return None
+
+    def _stage(self, name, relpath, entry, data):
+        """校验并将文件写入暂存目录，返回暂存路径"""
+        if len(data) != entry['size'] or hashlib.sha256(data).hexdigest() != entry['sha256']:
+            raise ValueError(f"文件校验失败: {relpath}")
+        staged = os.path.join(self.staging_root, name, *relpath.split('/'))
+        atomic_write_bytes(staged, data)
+        return staged
+
+    def _fetch_ranges(self, manifest, relpaths, progress=None):
+        """通过区间请求获取变化的文件，返回 {relpath: 暂存路径}；服务器不支持时返回 None"""
+        url = manifest.archive.get('url')
+        entries = [(relpath, manifest.files[relpath]) for relpath in relpaths]
+        if not url or any(
+            'offset' not in entry or 'compressed_size' not in entry
+            or entry.get('method') not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED)
+            for _, entry in entries
+        ):
+            return None
+
+        staged = {}
+        # 空文件无需发起请求
+        for relpath, entry in entries:
+            if entry['compressed_size'] == 0:
+                staged[relpath] = self._stage(manifest.name, relpath, entry, b'')
+        entries = [item for item in entries if item[1]['compressed_size']]
+
+        ranges = self._coalesce(entries)
+        if progress is not None:
+            progress.set_total(sum(end - start + 1 for start, end, _ in ranges))
+
+        for start, end, members in ranges:
+            chunk = minecraft_httpx.download_range(url, start, end, progress=progress)
+            if chunk is None:
+                return None
+            for relpath, entry in members:
+                offset = entry['offset'] - start
+                data = self._inflate(chunk[offset:offset + entry['compressed_size']], entry['method'])
+                staged[relpath] = self._stage(manifest.name, relpath, entry, data)
+        return staged
+
+    def _fetch_archive(self, manifest, relpaths, progress=None):
+        """回退方案：流式下载完整压缩包，边下载边解压需要的文件，返回 {relpath: 暂存路径}"""
+        url = manifest.archive.get('url')
+        if progress is not None and manifest.archive.get('size'):
+            # 区间下载已计入的字节保留在已完成量中，总量按整包大小追加
+            progress.set_total(progress.done + manifest.archive['size'])
+
+        staging_dir = os.path.join(self.staging_root, manifest.name)
+        extractor = StreamingZipExtractor(
+            staging_dir,
+            expected_sha256=manifest.archive.get('sha256'),
+            skip_existing=False,
+            members=relpaths
+        )
+        result = minecraft_httpx.download_stream(url, extractor.extract, progress=progress) if url else None
+        if not result:
+            raise IOError(f"下载压缩包失败: {url}")
+
+        missing = set(relpaths) - set(result.written)
+        if missing:
+            raise ValueError(f"压缩包中缺少文件: {sorted(missing)[:5]}")
+
+        staged = {}
+        for relpath in relpaths:
+            path = extractor.target_path(relpath)
+            entry = manifest.files[relpath]
+            if not file_matches(path, entry['size'], entry['sha256']):
+                raise ValueError(f"文件校验失败: {relpath}")
+            staged[relpath] = path
+        return staged
+
+    # ---------- 安装 ----------
+
+    def provision(self, manifest: ResourceManifest, changed=None, removed=None, progress=None) -> bool:
+        """
+        按清单增量安装资源
+
+        :param manifest: 资源清单
+        :param changed: 预先计算的变化文件列表（为 None 时自动计算）
+        :param removed: 预先计算的待删除文件列表
+        :param progress: 可选的下载进度（utils.progress.TaskProgress）
+        :return: 成功返回 True
+        """
+        if changed is None or removed is None:
+            changed, removed = self.plan(manifest)
+
+        staging_dir = os.path.join(self.staging_root, manifest.name)
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+        try:
+            if changed:
+                size = sum(manifest.files[p]['size'] for p in changed)
+                logger.info(f"[{manifest.name}] 需要更新 {len(changed)} 个文件，共 {size} 字节")
+                staged = self._fetch_ranges(manifest, changed, progress)
+                if staged is None:
+                    logger.info(f"[{manifest.name}] 服务器不支持区间下载，回退到整包下载")
+                    staged = self._fetch_archive(manifest, changed, progress)
+            else:
+                staged = {}
+
+            # 所有文件都已校验通过，再统一替换到安装目录
+            for relpath, staged_path in staged.items():
+                atomic_replace(staged_path, self._local_path(relpath))
+
+            for relpath in removed:
+                try:
+                    os.remove(self._local_path(relpath))
+                except OSError:
+                    pass
+
+            self._commit_state(manifest)
+            logger.info(f"[{manifest.name}] 资源已更新到版本 {manifest.version}")
+            return True
+
+        except Exception as e:
+            logger.exception(f"[{manifest.name}] 资源供给失败: {e}")
+            return False
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def _commit_state(self, manifest):
+        """记录每个文件安装后的大小、摘要与修改时间，作为下次校验的依据"""
+        files = {}
+        for relpath, entry in manifest.files.items():
+            try:
+                st = os.stat(self._local_path(relpath))
+            except OSError:
+                continue
+            files[relpath] = {
+                'size': st.st_size,
+                'sha256': entry['sha256'],
+                'mtime_ns': st.st_mtime_ns
+            }
+        self.save_state(manifest.name, {'version': manifest.version, 'files': files})
+
+
+# 生成资源清单（在 src/buggcraft 下执行）: python -m utils.provision <zip> <name> <version> <url> [output]
+if __name__ == "__main__":
+    import sys
+    zip_path, name, version, url = sys.argv[1:5]
+    output = sys.argv[5] if len(sys.argv) > 5 else f'{name}.manifest.json'
+    manifest = build_manifest(zip_path, name, version, url)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(manifest.to_dict(), f, ensure_ascii=False, indent=2)
+    print(f"已生成清单: {output} ({len(manifest.files)} 个文件)")
@@ -0,0 +1,40 @@
+# 启动测量：由 scripts/bench_startup.py 设置环境变量启动，窗口显示后输出耗时与内存并退出
+# （本模块在设置 Qt 运行环境之前即会被导入，不在模块级导入 PySide6）
+
+import json
+import os
+import time
+
+import psutil
+
+
+# 环境变量，值为基准脚本创建进程时的 time.time()
+BENCH_ENV = 'BUGGCRAFT_STARTUP_BENCH'
+# 结果行的前缀（标准输出），后接 JSON
+BENCH_MARKER = 'STARTUP_BENCH '
+
+
+def benchmarking() -> bool:
+    return bool(os.environ.get(BENCH_ENV))
+
+
+def report_when_shown(app):
+    """
+    测量模式下，窗口显示后的第一轮事件循环结束时输出结果并退出应用
+
+    输出的 startup_s 为从创建进程到此时的耗时，rss 为此时进程的常驻内存（字节）。
+    """
+    if not benchmarking():
+        return
+    from PySide6.QtCore import QTimer  # Qt 运行环境设置完成后才能导入
+
+    def report():
+        spawned = float(os.environ[BENCH_ENV])
+        result = {
+            'startup_s': round(time.time() - spawned, 4),
+            'rss': psutil.Process().memory_info().rss,
+        }
+        print(BENCH_MARKER + json.dumps(result), flush=True)
+        app.quit()
+
+    QTimer.singleShot(0, report)
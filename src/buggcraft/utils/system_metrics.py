@@ -0,0 +1,208 @@
+# 系统资源采样：在后台线程中统一采样内存与 CPU，发布只读快照供各控件订阅
+
+import threading
+import time
+from collections import namedtuple
+
+import psutil
+from PySide6.QtCore import QObject, QEvent, Signal
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# 有可见的订阅控件时的采样间隔（秒）
+ACTIVE_INTERVAL = 1.0
+# 暂停原因：没有可见的订阅控件 / 游戏运行中
+PAUSE_HIDDEN = 'hidden'
+PAUSE_GAME = 'game'
+
+_MB = 1024 * 1024
+
+_SnapshotBase = namedtuple('_SnapshotBase', (
+    'timestamp',         # 采样时间（time.time()）
+    'memory_total',      # 字节
+    'memory_used',
+    'memory_free',
+    'memory_available',
+    'memory_percent',
+    'cpu_percent',       # 自上次采样以来的整体 CPU 占用率
+    'cpu_count',
+))
+
+
+class MetricsSnapshot(_SnapshotBase):
+    """一次采样的结果（只读）"""
+    __slots__ = ()
+
+    @property
+    def total_mb(self) -> int:
+        return self.memory_total // _MB
+
+    @property
+    def used_mb(self) -> int:
+        return self.memory_used // _MB
+
+    @property
+    def free_mb(self) -> int:
+        return self.memory_free // _MB
+
+    @property
+    def available_mb(self) -> int:
+        return self.memory_available // _MB
+
+
+def sample_metrics() -> MetricsSnapshot:
+    """立即采样一次（psutil 调用，可在任意线程中执行）"""
+    mem = psutil.virtual_memory()
+    return MetricsSnapshot(
+        timestamp=time.time(),
+        memory_total=mem.total,
+        memory_used=mem.used,
+        memory_free=mem.free,
+        memory_available=mem.available,
+        memory_percent=mem.percent,
+        cpu_percent=psutil.cpu_percent(interval=None),
+        cpu_count=psutil.cpu_count() or 1,
+    )
+
+
+class SystemMetricsService(QObject):
+    """
+    系统资源采样服务
+
+    采样在后台线程中进行，结果经信号转到 GUI 线程后以 updated 发布，订阅者不需要各自创建定时器。
+    只在有可见的订阅控件时按 ACTIVE_INTERVAL 采样；订阅控件全部隐藏或游戏运行期间暂停采样，
+    恢复时立即补采一次。
+    """
+
+    updated = Signal(object)  # MetricsSnapshot
+    _sampled = Signal(object)  # 后台线程 -> GUI 线程
+
+    def __init__(self, interval=ACTIVE_INTERVAL, parent=None):
+        super().__init__(parent)
+        self.interval = interval
+        self.latest = None  # 最近一次的 MetricsSnapshot
+        self._widgets = []  # 订阅时关联的控件，据其可见性决定是否采样
+        self._paused = {PAUSE_HIDDEN}
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._sampled.connect(self._publish)
+
+    # ---------- 订阅 ----------
+
+    def subscribe(self, callback, widget=None):
+        """
+        订阅快照更新
+
+        :param callback: 在 GUI 线程中以 MetricsSnapshot 调用
+        :param widget: 使用数据的控件；指定后只在它可见时采样，并在控件销毁时自动取消关联
+        """
+        self.updated.connect(callback)
+        if widget is not None and widget not in self._widgets:
+            self._widgets.append(widget)
+            widget.installEventFilter(self)
+            # 控件销毁后不再回调（回调通常会访问控件）
+            widget.destroyed.connect(lambda *_, w=widget, c=callback: self.unsubscribe(c, w))
+        if self.latest is not None:
+            callback(self.latest)
+        self._update_visibility()
+        self._ensure_thread()
+
+    def unsubscribe(self, callback, widget=None):
+        try:
+            self.updated.disconnect(callback)
+        except (RuntimeError, TypeError):
+            pass
+        if widget is not None:
+            self._forget(widget)
+
+    def _forget(self, widget):
+        if widget in self._widgets:
+            self._widgets.remove(widget)
+            self._update_visibility()
+
+    def eventFilter(self, watched, event):
+        if event.type() in (QEvent.Show, QEvent.Hide):
+            self._update_visibility()
+        return False
+
+    def _update_visibility(self):
+        visible = False
+        for widget in self._widgets:
+            try:
+                if widget.isVisible():
+                    visible = True
+                    break
+            except RuntimeError:  # 控件已销毁
+                continue
+        self.set_paused(PAUSE_HIDDEN, not visible)
+
+    # ---------- 暂停 ----------
+
+    def set_paused(self, reason, paused=True):
+        """按原因暂停/恢复采样，所有原因都解除后才恢复"""
+        was_paused = bool(self._paused)
+        if paused:
+            self._paused.add(reason)
+        else:
+            self._paused.discard(reason)
+        if was_paused and not self._paused:
+            logger.debug("系统资源采样已恢复")
+            self._wake.set()
+        elif not was_paused and self._paused:
+            logger.debug(f"系统资源采样已暂停: {', '.join(sorted(self._paused))}")
+
+    @property
+    def paused(self) -> bool:
+        return bool(self._paused)
+
+    def refresh(self) -> MetricsSnapshot:
+        """立即采样并发布（GUI 线程中调用）"""
+        self._publish(sample_metrics())
+        return self.latest
+
+    # ---------- 后台线程 ----------
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='SystemMetrics', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        psutil.cpu_percent(interval=None)  # 第一次调用只建立 CPU 统计的基准
+        while not self._stopping:
+            if self._paused:
+                # 暂停期间不采样，直到恢复或停止时被唤醒
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            try:
+                self._sampled.emit(sample_metrics())
+            except Exception as e:
+                logger.warning(f"系统资源采样失败: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _publish(self, snapshot):
+        self.latest = snapshot
+        self.updated.emit(snapshot)
+
+    def stop(self):
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+
+_service = None
+
+
+def get_system_metrics() -> SystemMetricsService:
+    """全局共享的系统资源采样服务（在 GUI 线程中首次调用）"""
+    global _service
+    if _service is None:
+        _service = SystemMetricsService()
+    return _service
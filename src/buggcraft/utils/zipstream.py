@@ -0,0 +1,324 @@
+# 流式 ZIP 解压：边下载边解压，不落地中间压缩包
+
+import os
+import zlib
+import struct
+import hashlib
+import tempfile
+
+from utils.file_utils import file_crc32, atomic_replace, is_safe_relpath
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+_LOCAL_SIGNATURE = b'PK\x03\x04'
+_DESCRIPTOR_SIGNATURE = b'PK\x07\x08'
+# 本地文件头之后出现这些签名说明条目已读完（中央目录 / ZIP64 结束记录 / 结束记录）
+_END_SIGNATURES = (b'PK\x01\x02', b'PK\x06\x06', b'PK\x06\x07', b'PK\x05\x06')
+
+# 本地文件头（不含签名）: 版本, 标志, 压缩方式, 时间, 日期, CRC, 压缩大小, 原始大小, 文件名长度, 扩展字段长度
+_LOCAL_HEADER = struct.Struct('<5H3L2H')
+
+_FLAG_ENCRYPTED = 0x01
+_FLAG_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+
+_ZIP64_EXTRA_ID = 0x0001
+_ZIP64_LIMIT = 0xFFFFFFFF
+
+_METHOD_STORED = 0
+_METHOD_DEFLATED = 8
+
+
+class _ArchiveReader:
+    """对输入流的缓冲读取，同时计算整个压缩包的 SHA-256"""
+
+    def __init__(self, stream, chunk_size):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = b''
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def _fill(self):
+        chunk = self.stream.read(self.chunk_size)
+        if chunk:
+            self.digest.update(chunk)
+            self.size += len(chunk)
+        return chunk
+
+    def read_some(self, limit):
+        """读取至多 limit 字节（至少 1 字节，除非流已结束）"""
+        if not self.buffer:
+            self.buffer = self._fill()
+        data, self.buffer = self.buffer[:limit], self.buffer[limit:]
+        return data
+
+    def read_exact(self, size):
+        """精确读取 size 字节，流提前结束时抛出 EOFError"""
+        parts = []
+        while size > 0:
+            data = self.read_some(size)
+            if not data:
+                raise EOFError("压缩包数据不完整")
+            parts.append(data)
+            size -= len(data)
+        return b''.join(parts)
+
+    def unread(self, data):
+        """将多读的数据放回缓冲区"""
+        if data:
+            self.buffer = data + self.buffer
+
+    def skip(self, size):
+        while size > 0:
+            data = self.read_some(min(size, self.chunk_size))
+            if not data:
+                raise EOFError("压缩包数据不完整")
+            size -= len(data)
+
+    def drain(self):
+        """读完剩余数据（中央目录等），使摘要覆盖整个压缩包"""
+        self.buffer = b''
+        while self._fill():
+            pass
+
+
+class ExtractResult:
+    """解压结果"""
+
+    def __init__(self):
+        self.written = []   # 实际写入的文件（相对路径）
+        self.skipped = []   # 磁盘上已一致而跳过的文件
+        self.sha256 = None  # 整个压缩包的摘要
+        self.size = 0       # 压缩包字节数
+
+    def __bool__(self):
+        return True
+
+    def __repr__(self):
+        return f"<ExtractResult written={len(self.written)} skipped={len(self.skipped)}>"
+
+
+class StreamingZipExtractor:
+    """
+    流式 ZIP 解压器
+
+    按顺序解析本地文件头，边读取边解压，每个文件先写入目标目录下的临时文件，
+    校验 CRC-32 与大小后暂存；整个压缩包读完并通过 SHA-256 校验后，
+    再统一用 os.replace 替换到目标位置。任一步失败都会清理临时文件，
+    已有文件不会被改动。
+
+    磁盘上已存在且大小、CRC 与条目一致的文件不会重新写入，
+    因此在部分失败后重新供给时只需写入缺失或损坏的文件。
+    """
+
+    def __init__(self, extract_dir, expected_sha256=None, skip_existing=True,
+                 members=None, chunk_size=64 * 1024):
+        """
+        :param extract_dir: 解压目标目录
+        :param expected_sha256: 压缩包的期望摘要，为 None 时不校验
+        :param skip_existing: 是否跳过磁盘上已一致的文件
+        :param members: 只解压这些条目（相对路径集合），为 None 时解压全部
+        :param chunk_size: 每次读取的字节数
+        """
+        self.extract_dir = str(extract_dir)
+        self.expected_sha256 = expected_sha256
+        self.skip_existing = skip_existing
+        self.members = set(members) if members is not None else None
+        self.chunk_size = chunk_size
+
+    def target_path(self, relpath):
+        return os.path.join(self.extract_dir, *relpath.rstrip('/').split('/'))
+
+    def extract(self, stream) -> ExtractResult:
+        """
+        从输入流解压
+
+        :param stream: 支持 read(n) 的输入流（如 HTTP 响应）
+        :return: ExtractResult
+        :raises ValueError: 压缩包格式错误或校验失败
+        """
+        reader = _ArchiveReader(stream, self.chunk_size)
+        result = ExtractResult()
+        pending = []  # [(临时文件, 目标路径, 相对路径)]
+
+        try:
+            while True:
+                signature = reader.read_exact(4)
+                if signature in _END_SIGNATURES:
+                    break
+                if signature != _LOCAL_SIGNATURE:
+                    raise ValueError("无效的 ZIP 本地文件头")
+                self._extract_entry(reader, result, pending)
+
+            reader.drain()
+            result.sha256 = reader.digest.hexdigest()
+            result.size = reader.size
+            if self.expected_sha256 and result.sha256 != self.expected_sha256:
+                raise ValueError(f"压缩包校验失败: 期望 {self.expected_sha256}，实际 {result.sha256}")
+
+            for temp_path, target, relpath in pending:
+                atomic_replace(temp_path, target)
+                result.written.append(relpath)
+            pending = []
+            return result
+
+        finally:
+            for temp_path, _, _ in pending:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    def _extract_entry(self, reader, result, pending):
+        (_, flags, method, _, _, crc, compressed_size, size,
+         name_len, extra_len) = _LOCAL_HEADER.unpack(reader.read_exact(_LOCAL_HEADER.size))
+        raw_name = reader.read_exact(name_len)
+        extra = reader.read_exact(extra_len)
+
+        relpath = raw_name.decode('utf-8' if flags & _FLAG_UTF8 else 'cp437').replace('\\', '/')
+        if not is_safe_relpath(relpath):
+            raise ValueError(f"压缩包中包含非法路径: {relpath}")
+        if flags & _FLAG_ENCRYPTED:
+            raise ValueError(f"不支持加密的条目: {relpath}")
+        if method not in (_METHOD_STORED, _METHOD_DEFLATED):
+            raise ValueError(f"不支持的压缩方式 {method}: {relpath}")
+
+        zip64 = self._find_zip64_extra(extra)
+        if compressed_size == _ZIP64_LIMIT or size == _ZIP64_LIMIT:
+            if zip64 is None:
+                raise ValueError(f"缺少 ZIP64 扩展字段: {relpath}")
+            size, compressed_size = self._zip64_sizes(zip64, size, compressed_size)
+
+        has_descriptor = bool(flags & _FLAG_DESCRIPTOR)
+        if has_descriptor and method == _METHOD_STORED:
+            # 未压缩且大小写在数据之后的条目无法确定边界
+            raise ValueError(f"不支持流式读取的条目: {relpath}")
+
+        wanted = self.members is None or relpath in self.members
+        is_dir = relpath.endswith('/')
+        target = self.target_path(relpath)
+        actual_crc = actual_size = None
+
+        if is_dir:
+            if wanted:
+                os.makedirs(target, exist_ok=True)
+            self._consume(reader, method, compressed_size, has_descriptor, None)
+        elif not wanted or (not has_descriptor and self._is_current(target, size, crc)):
+            self._consume(reader, method, compressed_size, has_descriptor, None)
+            if wanted:
+                result.skipped.append(relpath)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(prefix='.tmp-', dir=os.path.dirname(target))
+            pending.append((temp_path, target, relpath))
+            with os.fdopen(fd, 'wb') as f:
+                actual_crc, actual_size = self._consume(reader, method, compressed_size, has_descriptor, f)
+                f.flush()
+                os.fsync(f.fileno())
+
+        if has_descriptor:
+            crc, compressed_size, size = self._read_descriptor(reader, zip64 is not None)
+
+        if actual_size is not None:
+            if actual_size != size or actual_crc != crc:
+                raise ValueError(f"文件校验失败: {relpath}")
+            # 带数据描述符的条目只有读完数据才知道 CRC，此时再比较磁盘上的文件，一致则丢弃临时文件
+            if has_descriptor and self._is_current(target, size, crc):
+                temp_path, _, _ = pending.pop()
+                os.remove(temp_path)
+                result.skipped.append(relpath)
+
+    def _is_current(self, target, size, crc):
+        if not self.skip_existing:
+            return False
+        try:
+            if os.path.getsize(target) != size:
+                return False
+            return file_crc32(target) == crc
+        except OSError:
+            return False
+
+    def _consume(self, reader, method, compressed_size, has_descriptor, output):
+        """
+        读取一个条目的压缩数据；output 不为 None 时解压写入
+
+        :return: (CRC-32, 解压后大小)，未写入时为 (None, None)
+        """
+        if output is None and not has_descriptor:
+            reader.skip(compressed_size)
+            return None, None
+
+        crc, size = 0, 0
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS) if method == _METHOD_DEFLATED else None
+        remaining = None if has_descriptor else compressed_size
+
+        while remaining is None or remaining > 0:
+            if decompressor is not None and decompressor.eof:
+                break
+            data = reader.read_some(self.chunk_size if remaining is None else min(remaining, self.chunk_size))
+            if not data:
+                raise EOFError("压缩包数据不完整")
+            if remaining is not None:
+                remaining -= len(data)
+            if decompressor is not None:
+                data = decompressor.decompress(data)
+            if output is not None and data:
+                output.write(data)
+                crc = zlib.crc32(data, crc)
+                size += len(data)
+
+        if decompressor is not None:
+            if not decompressor.eof:
+                raise ValueError("压缩数据不完整")
+            reader.unread(decompressor.unused_data)
+            if remaining:
+                reader.skip(remaining)
+
+        if output is None:
+            return None, None
+        return crc & 0xFFFFFFFF, size
+
+    @staticmethod
+    def _find_zip64_extra(extra):
+        """返回 ZIP64 扩展字段的内容，不存在时返回 None"""
+        offset = 0
+        while offset + 4 <= len(extra):
+            header_id, data_size = struct.unpack_from('<2H', extra, offset)
+            offset += 4
+            if header_id == _ZIP64_EXTRA_ID:
+                return extra[offset:offset + data_size]
+            offset += data_size
+        return None
+
+    @staticmethod
+    def _zip64_sizes(fields, size, compressed_size):
+        """从 ZIP64 扩展字段中读取真实大小（只包含本地头中被置为 0xFFFFFFFF 的字段）"""
+        position = 0
+        if size == _ZIP64_LIMIT:
+            size, = struct.unpack_from('<Q', fields, position)
+            position += 8
+        if compressed_size == _ZIP64_LIMIT:
+            compressed_size, = struct.unpack_from('<Q', fields, position)
+        return size, compressed_size
+
+    @staticmethod
+    def _read_descriptor(reader, zip64):
+        """读取数据描述符，返回 (CRC, 压缩大小, 原始大小)"""
+        head = reader.read_exact(4)
+        if head == _DESCRIPTOR_SIGNATURE:
+            head = reader.read_exact(4)
+        crc, = struct.unpack('<L', head)
+        if zip64:
+            compressed_size, size = struct.unpack('<2Q', reader.read_exact(16))
+        else:
+            compressed_size, size = struct.unpack('<2L', reader.read_exact(8))
+        return crc, compressed_size, size
+
+
+def extract_stream(stream, extract_dir, expected_sha256=None, skip_existing=True, members=None):
+    """便捷函数：从输入流解压到目录，返回 ExtractResult"""
+    extractor = StreamingZipExtractor(extract_dir, expected_sha256, skip_existing, members)
+    return extractor.extract(stream)
@@ -6,7 +6,7 @@ from PySide6.QtWidgets import (
     QMainWindow, QWidget, QStackedWidget, QVBoxLayout, QHBoxLayout
 )
 from PySide6.QtCore import Qt, QTimer, QSize
-from PySide6.QtGui import QPixmap, QPainter
+from PySide6.QtGui import QPainter
 
 logger = logging.getLogger(__name__)
 
@@ -14,8 +14,14 @@ from utils.helpers import scale_component
 from config.settings import get_settings_manager
 # from core.launcher import MinecraftLibLauncher
 from core.visibility import LauncherVisibilityManager
+from core.dormant import DormantModeManager
 from core.auth.microsoft import MicrosoftAuthenticator
 from ui.widgets.titlebar import TitleBar
+from ui.cache.pixmap import get_render_cache, draw_scaled
+from ui.cache.resources import get_image_resources
+from ui.debug.profiler import get_profiler, profiling_requested, ProfilerOverlay
+from ui.debug.watchdog import StallWatchdog
+from utils.system_metrics import get_system_metrics, PAUSE_GAME
 # from ui.widgets.buttons import QMStartButton
 # from ui.widgets.cards import QMCard
 from ui.widgets.panels import UserPanel
@@ -32,20 +38,45 @@ logger = logging.getLogger(__name__)
 class MinecraftLauncher(QMainWindow):
     """主启动器界面"""
 
+    SETTINGS_PAGE_INDEX = 1  # 设置页面在 content_stack 中的位置
+
     def __init__(self, cache_path, config_path, resource_path):
         super().__init__()
 
         self.cache_path = cache_path
         self.config_path = config_path
         self.resource_path = resource_path
+        # 在后台线程中预先解码启动时要用到的图片，构建界面时直接取用
+        get_image_resources(self.resource_path).preload()
 
         self.scale_ratio = scale_component(QSize(1280, 832), QSize(1280-1280/3, 832-832/3))
         self.settings_manager = get_settings_manager(self.config_path)  # 获取配置管理器
         self.visibility_manager = LauncherVisibilityManager(self)  # 初始化可见性管理器
+        self.dormant_manager = DormantModeManager(self)  # 游戏运行期间的低占用模式
         self.current_tab = "singleplayer"
+
+        # 界面性能分析（调试开关或环境变量 BUGGCRAFT_PROFILE），插桩须在创建页面、连接信号之前完成
+        self.profiler = get_profiler()
+        if profiling_requested(self.settings_manager):
+            self.profiler.start()
+            self.profiler.instrument_paint_events()
+            self.profiler.instrument_slots(
+                MinecraftLauncher, 'minecraft_handle_output', 'minecraft_handle_started',
+                'minecraft_handle_stopped', 'minecraft_handle_error', 'minecraft_handle_progress'
+            )
+            self.profiler.instrument_slots(
+                SinglePlayerPage, 'started_game', 'minecraft_handle_started', 'minecraft_handle_stop_progress',
+                'minecraft_handle_stopped', 'minecraft_handle_error'
+            )
+
+        # 界面卡顿监测：事件循环停顿时抓取调用栈，按调用位置汇总
+        self.stall_watchdog = StallWatchdog(profiler=self.profiler, parent=self)
+        self.stall_watchdog.start()
         
         # 设置背景图片
         self.bg_image = None
+        self.bg_released = False  # 低占用模式下释放了背景图片，下次绘制时重新加载
+        self.settings_page = None
         self.load_background_image()
 
         # 移除默认标题栏
@@ -54,12 +85,17 @@ class MinecraftLauncher(QMainWindow):
         self.set_window_size_from_background()
 
         self.init_ui()
+        usage = get_image_resources().memory_usage()
+        logger.info(f"图片资源: {usage['files']} 张，占用 {usage['total'] / 1024 / 1024:.1f}MB")
+        if self.profiler.enabled:
+            self.profiler_overlay = ProfilerOverlay(self, self.profiler)
+        self.register_dormant_hooks()
 
     def load_background_image(self):
         """加载背景图片"""
         bg_path = os.path.abspath(os.path.join(self.resource_path, 'images', 'minecraft_bg.png'))
         if os.path.exists(bg_path):
-            self.bg_image = QPixmap(bg_path)
+            self.bg_image = get_image_resources().pixmap(bg_path)
             logger.info(f"主窗口背景图片加载成功: {bg_path}")
             logger.info(f"背景图片尺寸: {self.bg_image.width()}x{self.bg_image.height()}")
         else:
@@ -84,10 +120,14 @@ class MinecraftLauncher(QMainWindow):
 
     def paintEvent(self, event):
         """重绘事件 - 绘制背景图片"""
+        if self.bg_released:
+            self.bg_released = False
+            self.load_background_image()
         if self.bg_image:
-            painter = QPainter(self)
-            # 直接绘制原始尺寸的背景图片，不进行缩放
-            painter.drawPixmap(0, 0, self.bg_image)
+            with get_render_cache().paint_timer("MinecraftLauncher"):
+                painter = QPainter(self)
+                # 窗口与背景图片尺寸一致，缓存直接返回原图；只绘制需要重绘的区域
+                draw_scaled(painter, self, self.bg_image, Qt.KeepAspectRatio, event.rect())
         super().paintEvent(event)
 
     def integrate_start_game_button(self):
@@ -160,6 +200,8 @@ class MinecraftLauncher(QMainWindow):
         logger.info('minecraft_handle_started 游戏已启动')
         # 应用可见性设置
         self.visibility_manager.apply_setting(self.settings_manager.get_setting('launcher.visibility', "游戏启动后保持不变"))
+        # 释放界面资源，把内存与 CPU 让给游戏
+        self.dormant_manager.enter()
     
     def minecraft_handle_stopped(self, exit_code):
         """游戏停止处理"""
@@ -176,6 +218,7 @@ class MinecraftLauncher(QMainWindow):
         logger.info(f"minecraft_handle_stopped 游戏已退出，代码: {exit_code}")
         QTimer.singleShot(5000, lambda: handle_status(exit_code))
         # 恢复启动器
+        self.dormant_manager.exit()
         self.visibility_manager.restore_if_needed()
     
     def minecraft_handle_error(self, message):
@@ -267,22 +310,62 @@ class MinecraftLauncher(QMainWindow):
         # self.content_stack.addWidget(self.download_page)
         
         # 设置页面
-        self.settings_page = SettingsPage(
-            self,
-            config_path=self.config_path,
-            resource_path=self.resource_path,
-            scale_ratio=self.scale_ratio
-        )
-        self.content_stack.addWidget(self.settings_page)
+        self.ensure_settings_page()
         
         # 更多页面
         # self.more_page = MorePage(self.resource_path, self.scale_ratio)
         # self.content_stack.addWidget(self.more_page)
 
+    def ensure_settings_page(self):
+        """创建设置页面（低占用模式释放后，再次切换到设置页时重新创建）"""
+        if self.settings_page is None:
+            self.settings_page = SettingsPage(
+                self,
+                config_path=self.config_path,
+                resource_path=self.resource_path,
+                scale_ratio=self.scale_ratio
+            )
+            self.content_stack.insertWidget(self.SETTINGS_PAGE_INDEX, self.settings_page)
+        return self.settings_page
+
+    def release_settings_page(self):
+        """释放设置页面（正在显示或有后台任务时保留）"""
+        page = self.settings_page
+        if page is None or self.content_stack.currentWidget() is page or page.is_busy():
+            return
+        page.save_all_settings()
+        self.content_stack.removeWidget(page)
+        page.deleteLater()
+        self.settings_page = None
+        logger.info("[低占用] 已释放设置页面")
+
+    def release_background(self):
+        """释放背景图片与共享的图片缓存（窗口仍可见时保留背景）"""
+        if self.bg_image is not None and (not self.isVisible() or self.isMinimized()):
+            self.bg_image = None
+            self.bg_released = True
+        get_render_cache().clear()
+        get_image_resources().clear()
+
+    def register_dormant_hooks(self):
+        """登记低占用模式下释放/暂停的资源"""
+        metrics = get_system_metrics()
+        self.dormant_manager.register(
+            '系统资源采样',
+            lambda: metrics.set_paused(PAUSE_GAME, True),
+            lambda: metrics.set_paused(PAUSE_GAME, False)
+        )
+        self.dormant_manager.register('卡顿监测', self.stall_watchdog.stop, self.stall_watchdog.start)
+        self.dormant_manager.register('设置页面', self.release_settings_page)  # 切换到设置页时再创建
+        # 退出时在后台线程中重新解码常用图片，背景在下次绘制时加载
+        self.dormant_manager.register('界面图片', self.release_background, get_image_resources().preload)
+
     def switch_pages(self, index):
         """切换标签页"""
         tab_names = ["singleplayer", "multiplayer", "download", "settings", "more"]
         self.current_tab = tab_names[index]
+        if index == self.SETTINGS_PAGE_INDEX:
+            self.ensure_settings_page()
         self.content_stack.setCurrentIndex(index)
         if index == 0:
             self.user_panel.on_show_animation_finished()
@@ -290,7 +373,13 @@ class MinecraftLauncher(QMainWindow):
             self.user_panel.on_hide_animation_finished()
     
     def closeEvent(self, event):
-        self.settings_page.save_all_settings()  # 假设 settings_page 是 SettingsPage 实例
+        if self.settings_page is not None:
+            self.settings_page.save_all_settings()
+        self.stall_watchdog.stop()
+        get_system_metrics().stop()
+        self.stall_watchdog.log_summary()
+        if self.profiler.enabled and self.stall_watchdog.sites:
+            self.stall_watchdog.export()
         super().closeEvent(event)
 
     def show_launch_settings(self):
@@ -0,0 +1,208 @@
+# Mini 版启动器窗口
+
+import os
+from PySide6.QtWidgets import (
+    QWidget, QLabel, QLineEdit, QPushButton, QComboBox, QVBoxLayout, QHBoxLayout, QFormLayout
+)
+from PySide6.QtCore import Qt
+
+from config.settings import get_settings_manager
+from core.launcher import MinecraftLibLauncher, STOP_STATE_TEXT, STOP_DONE
+from core.auth.microsoft import MicrosoftAuthenticator
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class MiniLauncher(QWidget):
+    """
+    Mini 版启动器：只有账户、版本与启动
+
+    使用系统标题栏与默认样式，不创建设置页面、动画与背景图片，
+    启动与登录复用 MinecraftLibLauncher 与 MicrosoftAuthenticator，配置与完整版共用。
+    """
+
+    def __init__(self, cache_path, config_path):
+        super().__init__()
+        self.cache_path = cache_path
+        self.config_path = config_path
+        self.settings_manager = get_settings_manager(self.config_path)
+
+        self.auth = MicrosoftAuthenticator(skins_cache_path=self.cache_path)
+        self.auth.signals.success.connect(self.handle_auth_success)
+        self.auth.signals.failure.connect(lambda message: self.set_status(f"登录失败: {message}"))
+        self.auth.signals.progress.connect(self.set_status)
+
+        self.launcher = MinecraftLibLauncher(config_path=self.config_path)
+        self.launcher.signals.started.connect(self.minecraft_handle_started)
+        self.launcher.signals.stopped.connect(self.minecraft_handle_stopped)
+        self.launcher.signals.error.connect(self.minecraft_handle_error)
+        self.launcher.signals.progress.connect(lambda progress: self.set_status(f"正在准备游戏... {progress}%"))
+        self.launcher.signals.stop_progress.connect(self.minecraft_handle_stop_progress)
+
+        self.setWindowTitle("BuggCraft Mini")
+        self.setFixedWidth(360)
+        self.init_ui()
+        self.restore_login()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(16, 16, 16, 16)
+        layout.setSpacing(10)
+
+        form = QFormLayout()
+        # 账户
+        self.account_label = QLabel("未登录")
+        self.username_input = QLineEdit()
+        self.username_input.setPlaceholderText("离线用户名")
+        self.username_input.returnPressed.connect(self.offline_login)
+
+        account_buttons = QHBoxLayout()
+        self.offline_btn = QPushButton("离线登录")
+        self.offline_btn.clicked.connect(self.offline_login)
+        self.online_btn = QPushButton("正版登录")
+        self.online_btn.clicked.connect(self.online_login)
+        account_buttons.addWidget(self.offline_btn)
+        account_buttons.addWidget(self.online_btn)
+
+        form.addRow("账户", self.account_label)
+        form.addRow("", self.username_input)
+        form.addRow("", account_buttons)
+
+        # 版本
+        self.version_combo = QComboBox()
+        installed = self.settings_manager.get_setting('minecraft.version.installed', []) or []
+        self.version_combo.addItems(installed)
+        current = self.settings_manager.get_setting('minecraft.version.enable')
+        if current:
+            self.version_combo.setCurrentText(current)
+        # 保存的版本未安装时下拉框显示的是第一个版本，写回设置使二者一致
+        shown = self.version_combo.currentText()
+        if shown and shown != current:
+            self.on_version_changed(shown)
+        self.version_combo.currentTextChanged.connect(self.on_version_changed)
+        form.addRow("版本", self.version_combo)
+        layout.addLayout(form)
+
+        # 启动
+        self.launch_btn = QPushButton("启动游戏")
+        self.launch_btn.setMinimumHeight(40)
+        self.launch_btn.clicked.connect(self.started_game)
+        layout.addWidget(self.launch_btn)
+
+        self.status_label = QLabel("准备就绪")
+        self.status_label.setAlignment(Qt.AlignCenter)
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+
+    def set_status(self, message):
+        self.status_label.setText(message)
+
+    # ---------- 账户 ----------
+
+    def restore_login(self):
+        """恢复上次的登录：正版凭据优先，其次为离线登录状态"""
+        if self.auth.load_credentials(os.path.join(self.cache_path)):
+            return
+        if self.settings_manager.get_setting("offline_login.is_logged_in", False):
+            username = self.settings_manager.get_setting("offline_login.username", "")
+            if username:
+                self.auth.minecraft_username = username
+                self.auth.minecraft_login_type = "offline"
+                self.update_account()
+
+    def offline_login(self):
+        """离线登录"""
+        username = self.username_input.text().strip()
+        if not username:
+            self.set_status("请输入用户名")
+            return
+        self.auth.minecraft_uuid = None
+        self.auth.minecraft_token = None
+        self.auth.minecraft_skin = None
+        self.settings_manager.set_setting("offline_login.is_logged_in", True)
+        self.settings_manager.set_setting("offline_login.username", username)
+        self.settings_manager.save_settings()
+        self.handle_auth_success(username, {'uuid': None, 'token': None, 'skin': None, 'type': 'offline'})
+
+    def online_login(self):
+        """正版登录（在系统浏览器中完成）"""
+        self.auth.cancel_authentication()
+        self.auth.start_login()
+
+    def handle_auth_success(self, username, data):
+        """处理登录成功"""
+        self.auth.minecraft_username = username
+        self.auth.minecraft_login_type = data.get('type') or "offline"
+        self.auth.save_credentials(os.path.join(self.cache_path))
+        self.update_account()
+        self.set_status(f"欢迎 {username}!")
+        logger.info(f"登录成功: {username} ({self.auth.minecraft_login_type})")
+
+    def update_account(self):
+        login_type = "正版" if self.auth.minecraft_login_type == "online" else "离线"
+        self.account_label.setText(f"{self.auth.minecraft_username}（{login_type}）")
+
+    # ---------- 版本与启动 ----------
+
+    def on_version_changed(self, version):
+        self.settings_manager.set_setting('minecraft.version.enable', version)
+        self.settings_manager.save_settings()
+
+    def started_game(self):
+        """启动/停止游戏"""
+        if self.launcher.running:
+            self.launch_btn.setEnabled(False)
+            self.set_status("正在停止游戏...")
+            self.launcher.stop()
+            return
+
+        if not self.auth.minecraft_username:
+            self.set_status("请先登录")
+            return
+        version = self.version_combo.currentText()
+        if not version:
+            self.set_status("未找到已安装的游戏版本")
+            return
+
+        self.launch_btn.setEnabled(False)
+        self.set_status("启动中...")
+        self.launcher.set_language('简体中文')
+        self.launcher.set_options(
+            uuid=self.auth.minecraft_uuid,
+            username=self.auth.minecraft_username,
+            token=self.auth.minecraft_token,
+            server=None,
+            version=version,
+            memory=1024,
+            width=854,
+            height=480,
+            fullscreen=False
+        )
+        self.launcher.start()
+
+    def minecraft_handle_started(self):
+        self.launch_btn.setText("停止游戏")
+        self.launch_btn.setEnabled(True)
+        self.set_status("游戏运行中")
+
+    def minecraft_handle_stopped(self, exit_code):
+        self.launch_btn.setText("启动游戏")
+        self.launch_btn.setEnabled(True)
+        self.set_status("游戏已正常退出" if exit_code == 0 else f"游戏已退出，代码: {exit_code}")
+
+    def minecraft_handle_stop_progress(self, state, remaining):
+        if state != STOP_DONE:
+            self.set_status(f"{STOP_STATE_TEXT[state]}...")
+
+    def minecraft_handle_error(self, message):
+        logger.info(f'minecraft_handle_error {message}')
+        self.set_status(message)
+        if not self.launcher.running:
+            self.launch_btn.setText("启动游戏")
+            self.launch_btn.setEnabled(True)
+
+    def closeEvent(self, event):
+        self.auth.cancel_authentication()
+        self.settings_manager.save_settings()
+        super().closeEvent(event)